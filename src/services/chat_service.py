@@ -1,5 +1,6 @@
 from openai import OpenAI
 import requests
+from requests.adapters import HTTPAdapter
 import os
 from src.utils.config import load_config
 from dotenv import load_dotenv
@@ -14,6 +15,12 @@ if openai_available:
 else:
     client = None
 
+# Shared HTTP session for Ollama: keep-alive connections are reused across requests and threads
+# (e.g. concurrent DeepEval judge calls) instead of opening a new TCP connection per call
+ollama_session = requests.Session()
+ollama_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+ollama_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
 class ChatService:
     """Service for handling chat interactions with OpenAI or Ollama models.
     This service abstracts the chat functionality for both OpenAI and Ollama models,
@@ -25,14 +32,16 @@ class ChatService:
         self.ollama_url = self.config['ollama']['ollama_api_url']
         self.ollama_model = self.config['ollama']['ollama_model']
         self.ollama_temp = self.config['ollama']['ollama_temperature']
+        self.ollama_keep_alive = self.config['ollama'].get('ollama_keep_alive', "10m")
 
     # Method to get a response from the chat model based on the provided messages and LLM mode.
-    # It checks the LLM mode and calls the appropriate method for OpenAI or Ollama
-    def get_response(self, messages, llm_mode):
+    # It checks the LLM mode and calls the appropriate method for OpenAI or Ollama.
+    # Ollama callers can override the model, request a JSON schema response format and set the timeout.
+    def get_response(self, messages, llm_mode, **ollama_options):
         if llm_mode == "openai":
             return self._openai_chat(messages)
         else:
-            return self._ollama_chat(messages)
+            return self._ollama_chat(messages, **ollama_options)
 
     # Private methods to handle chat interactions with OpenAI and Ollama models.
     # These methods are not intended to be called directly outside this class.
@@ -51,19 +60,23 @@ class ChatService:
         return response_content
 
     # This method handles chat interactions with Ollama models using a REST API.
-    # It constructs a payload with the model name, messages, and options, then sends a POST request to the Ollama API.
+    # It constructs a payload with the model name, messages, and options, then sends a POST request to the Ollama API
+    # over the shared keep-alive session; 'keep_alive' also keeps the model loaded between requests.
     # It returns the content of the response message.
-    def _ollama_chat(self, messages):
+    def _ollama_chat(self, messages, model=None, response_format=None, temperature=None, timeout=60):
         payload = {
-            "model": self.ollama_model,
+            "model": model or self.ollama_model,
             "messages": messages,
-            "options": {"temperature": self.ollama_temp},
+            "options": {"temperature": self.ollama_temp if temperature is None else temperature},
+            "keep_alive": self.ollama_keep_alive,
             "stream": False
         }
-        response = requests.post(
+        if response_format is not None:
+            payload["format"] = response_format  # "json" or a JSON schema (structured outputs)
+        response = ollama_session.post(
             f"{self.ollama_url}/api/chat",
             json=payload,
-            timeout=60
+            timeout=timeout
         )
         response.raise_for_status()
         return response.json()['message']['content']
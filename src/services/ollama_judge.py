@@ -0,0 +1,78 @@
+import json
+import asyncio
+from typing import List, Optional, Sequence
+from pydantic import BaseModel
+from deepeval.models import DeepEvalBaseLLM
+from src.services.chat_service import ChatService
+from src.utils.config import load_config
+
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+JUDGE_OLLAMA_MODEL = deepeval_config.get("judge_ollama_model", "")   # Judge model on the Ollama host ("" = ollama.ollama_model)
+JUDGE_TIMEOUT = deepeval_config.get("judge_timeout", 120)             # Seconds per judge request (a batch prompt takes longer than a chat turn)
+
+class CaseVerdict(BaseModel):
+    id: int
+    success: bool
+    reason: str
+
+class BatchVerdicts(BaseModel):
+    verdicts: List[CaseVerdict]
+
+class OllamaJudgeModel(DeepEvalBaseLLM):
+    """DeepEval judge model served by the local Ollama host configured in config.yaml.
+    Requests go through ChatService, whose shared session reuses keep-alive connections across
+    judge threads, and 'keep_alive' keeps the judge model loaded for the whole assessment.
+    Besides the single-prompt interface DeepEval metrics use (generate/a_generate), judge_batch
+    grades several test cases with one prompt and parses one structured verdict per case back,
+    so the prompt prefill is paid once per batch instead of once per case.
+    """
+    def __init__(self, model: Optional[str] = None, chat_service: Optional[ChatService] = None):
+        self.chat_service = chat_service or ChatService()
+        super().__init__(model or JUDGE_OLLAMA_MODEL or self.chat_service.ollama_model)
+
+    def load_model(self):
+        return self.chat_service
+
+    def get_model_name(self):
+        return f"ollama/{self.model_name}"
+
+    # Single prompt, as called by DeepEval metrics (G-Eval steps and scoring).
+    # With a schema, Ollama is asked for structured output and the reply is validated into it.
+    def generate(self, prompt: str, schema: Optional[type] = None):
+        content = self.chat_service.get_response(
+            [{"role": "user", "content": prompt}],
+            "ollama",
+            model=self.model_name,
+            response_format=schema.model_json_schema() if schema else None,
+            temperature=0,
+            timeout=JUDGE_TIMEOUT,
+        )
+        return schema.model_validate_json(content) if schema else content
+
+    async def a_generate(self, prompt: str, schema: Optional[type] = None):
+        return await asyncio.to_thread(self.generate, prompt, schema)
+
+    # Grade several test cases with one prompt, showing the judge only the given test case fields.
+    # Returns one verdict dict per test case, in order: {"success": bool, "reason": str},
+    # or {"error": str} when the reply has no verdict for that case.
+    def judge_batch(self, test_cases, criteria: str, fields: Sequence[str] = ("actual_output", "expected_output")) -> List[dict]:
+        cases = [
+            {"id": index, **{field: getattr(case, field) for field in fields}}
+            for index, case in enumerate(test_cases)
+        ]
+        prompt = (
+            "You are an evaluator grading LLM answers.\n"
+            f"Evaluation criteria: {criteria}\n"
+            "Grade every case below independently against the criteria. Return JSON of the form "
+            '{"verdicts": [{"id": <case id>, "success": true or false, "reason": "<one sentence>"}]} '
+            "with exactly one verdict per case id.\n\n"
+            f"Cases:\n{json.dumps(cases, ensure_ascii=False, indent=1)}"
+        )
+        verdicts = {verdict.id: verdict for verdict in self.generate(prompt, schema=BatchVerdicts).verdicts}
+        return [
+            {"success": verdicts[index].success, "reason": verdicts[index].reason} if index in verdicts
+            else {"error": "No verdict for this case in the batched judge reply"}
+            for index in range(len(test_cases))
+        ]
@@ -0,0 +1,136 @@
+# Module to keep run analyses on disk once per run, shared by all UI sessions through an in-process LRU
+import os
+import pickle
+import shutil
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.config import load_config
+
+# Load configurations
+config = load_config()
+analysis_store_config = config.get("analysis_store", {})
+
+ANALYSIS_CACHE_SIZE = analysis_store_config.get("cache_size", 4)   # Analyses kept in memory for all sessions together
+ANALYSIS_FILE = "analysis.pkl"                                      # Analysis skeleton; frames are separate Parquet files
+
+# ========================= Analysis Cache =========================
+
+class AnalysisCache:
+    """
+    Thread-safe LRU of loaded analyses keyed by analysis directory, shared by every session of the process.
+    Each entry keeps the version of the skeleton file it was loaded from: an analysis saved again by
+    another process (the job manager re-running an assessment) is not served from the stale entry.
+    """
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()   # {key: (version, analysis)}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, analysis: Dict[str, Any], version: Tuple[int, int]):
+        with self._lock:
+            self._entries[key] = (version, analysis)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+_cache = AnalysisCache()
+
+class FrameRef:
+    """Placeholder left in the analysis skeleton for a DataFrame or Series stored as a Parquet file."""
+    def __init__(self, file: str, is_series: bool = False, series_name=None):
+        self.file = file
+        self.is_series = is_series
+        self.series_name = series_name
+
+# ========================= Analysis Store Functions =========================
+
+def save_analysis(analysis_dir: str, analysis: Dict[str, Any]):
+    """
+    Persist a run analysis: every DataFrame/Series (at any depth) becomes a Parquet file, the rest
+    (scalars, small dicts, result store handles) a pickled skeleton written last, so a directory
+    with a skeleton is always complete. The analysis is also put in the shared cache.
+    Sessions then only keep the run id and read the analysis with load_analysis.
+    """
+    tmp_dir = f"{analysis_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    file_numbers = itertools.count(1)
+
+    def split(value):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            ref = FrameRef(f"frame_{next(file_numbers):03d}.parquet", isinstance(value, pd.Series), getattr(value, "name", None))
+            frame = value.to_frame(name="value") if ref.is_series else value
+            try:
+                frame.to_parquet(os.path.join(tmp_dir, ref.file), engine="pyarrow")
+                return ref
+            except (ValueError, TypeError, pa.ArrowException):
+                return value   # Not representable in Parquet (e.g. non-string column names): kept in the skeleton
+        if isinstance(value, dict):
+            return {key: split(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [split(item) for item in value]
+        return value
+
+    skeleton = split(analysis)
+    with open(os.path.join(tmp_dir, ANALYSIS_FILE), "wb") as file:
+        pickle.dump(skeleton, file, protocol=pickle.HIGHEST_PROTOCOL)
+    shutil.rmtree(analysis_dir, ignore_errors=True)
+    os.replace(tmp_dir, analysis_dir)
+    _cache.put(analysis_dir, analysis, _skeleton_version(analysis_dir))
+
+def load_analysis(analysis_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Analysis saved in analysis_dir, or None if there is none. Served from the shared cache when
+    possible; otherwise the frames are read through memory-mapped Parquet files and the result is cached.
+    The returned analysis is shared between sessions and must be treated as read-only.
+    """
+    if not analysis_dir:
+        return None
+    version = _skeleton_version(analysis_dir)
+    if version is None:
+        return None
+    analysis = _cache.get(analysis_dir, version)
+    if analysis is not None:
+        return analysis
+
+    with open(os.path.join(analysis_dir, ANALYSIS_FILE), "rb") as file:
+        skeleton = pickle.load(file)
+
+    def resolve(value):
+        if isinstance(value, FrameRef):
+            frame = pq.read_table(os.path.join(analysis_dir, value.file), memory_map=True).to_pandas()
+            return frame["value"].rename(value.series_name) if value.is_series else frame
+        if isinstance(value, dict):
+            return {key: resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        return value
+
+    analysis = resolve(skeleton)
+    _cache.put(analysis_dir, analysis, version)
+    return analysis
+
+def _skeleton_version(analysis_dir: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, inode) of the analysis skeleton, which every save replaces; None if there is none."""
+    try:
+        stat = os.stat(os.path.join(analysis_dir, ANALYSIS_FILE))
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_ino
@@ -1,13 +1,24 @@
 import os
 import sys
 import json
-import shutil
+import time
+import threading
+from itertools import islice
 from datetime import datetime
+import pandas as pd
 from deepeval.test_case import LLMTestCase
-from deepeval.dataset import EvaluationDataset
-from deepeval.test_case import LLMTestCaseParams
 from deepeval.metrics import GEval
 from src.utils.event_logs import thread_safe_add_log
+from src.utils.profiler import profile_node, stage_timer, record_rows
+from src.tools.deepeval_executor import JudgeExecutor
+from src.tools.deepeval_local_grading import split_by_grading_path
+from src.tools.deepeval_cache import JudgeCache, JUDGE_CACHE_ENABLED
+from src.tools.deepeval_checkpoint import CheckpointStore, CHECKPOINTS_ENABLED
+from src.tools.deepeval_metrics import METRIC_REGISTRY, resolve_metrics, split_by_kind, metric_fields
+from src.tools.deepeval_lexical_metrics import compute_lexical_metrics
+from src.tools.deepeval_sampling import plan_stratified_sample, estimate_pass_rate
+from src.tools.deepeval_results_store import write_results_store, SCORE_BINS
+from src.services.ollama_judge import OllamaJudgeModel
 
 # Import configuration loader
 from src.utils.config import load_config
@@ -15,9 +26,18 @@ from src.utils.config import load_config
 config = load_config()
 deepeval_config = config.get("deepeval", {})
 deepeval_results_path = deepeval_config.get("deepeval_results_path", ".deepeval")
-deepeval_results_file = os.path.join(deepeval_results_path, ".latest_test_run.json")
+JUDGE_BACKEND = deepeval_config.get("judge_backend", "openai")     # "openai" (DeepEval's default judge) or "ollama" (local judge)
+JUDGE_BATCH_SIZE = deepeval_config.get("judge_batch_size", 8)      # Ollama judge: test cases per judge prompt (1 = G-Eval per case)
+BATCHED_JUDGE = JUDGE_BACKEND == "ollama" and JUDGE_BATCH_SIZE > 1
+LOAD_BATCH_SIZE = deepeval_config.get("load_batch_size", 2000)     # Test cases read, graded and written per step (bounds memory)
+
+# Assessment directories being written by a running assessment (shared by all sessions of the app)
+_active_assessments = set()
+_active_assessments_lock = threading.Lock()
+_judge_model = None  # Local judge model, created on first use when judge_backend is "ollama"
 # ========================= Framework Node Functions =========================
 
+@profile_node("run_deepeval_assessment")
 def run_deepeval_assessment_node(shared_data, state_snapshot):
     """
     Execute DeepEval quality assessment analysis.
@@ -32,35 +52,49 @@ def run_deepeval_assessment_node(shared_data, state_snapshot):
     """
     thread_safe_add_log(shared_data['logs'], "Starting function run_deepeval_assessment_node...", agent_name="DeepEvalAgent")
 
+    # Extract configuration from shared_data
+    llm_responses_file = shared_data['llm_responses_file']
+    selected_metrics = shared_data['selected_metrics']
+    run_timestamp = shared_data['run_timestamp']
+    assessment_id = shared_data.get('assessment_id') or make_assessment_id(selected_metrics)
+    paths = get_assessment_paths(run_timestamp, assessment_id)
+    shared_data['assessment_paths'] = paths
+
+    # Assessments of other runs or metric sets write to other directories and can run in parallel
+    if not claim_assessment(paths['assessment_dir']):
+        thread_safe_add_log(shared_data['logs'], f"⚠️ Assessment '{assessment_id}' of run {run_timestamp} is already running.", agent_name="DeepEvalAgent")
+        return {'success': False, 'error': f"Assessment '{assessment_id}' of run {run_timestamp} is already running."}
+
     try:
-        # Extract configuration from shared_data
-        llm_responses_file = shared_data['llm_responses_file']
-        selected_metrics = shared_data['selected_metrics']
-        run_timestamp = shared_data['run_timestamp']
+        # Only the job that claimed the assessment may move its previous output aside
+        backup_previous_output(shared_data)
 
         thread_safe_add_log(shared_data['logs'], f"Preparing to load test cases from llm_responses_file: {llm_responses_file}", agent_name="DeepEvalAgent")
         thread_safe_add_log(shared_data['logs'], f"Selected DeepEval metrics: {selected_metrics}", agent_name="DeepEvalAgent")
         thread_safe_add_log(shared_data['logs'], f"Run timestamp: {run_timestamp}", agent_name="DeepEvalAgent")
+        thread_safe_add_log(shared_data['logs'], f"Assessment directory: {paths['assessment_dir']}", agent_name="DeepEvalAgent")
 
-        # Load test cases from JMeter JSON output
-        thread_safe_add_log(shared_data['logs'], f"📖 Loading test cases from: {os.path.basename(llm_responses_file)}", agent_name="DeepEvalAgent")
+        # Test cases are streamed from the JMeter JSON output into the evaluator batch by batch
+        # (sampling mode judges a stratified sample sized for the target precision instead of every response)
+        thread_safe_add_log(shared_data['logs'], f"📖 Streaming test cases from: {os.path.basename(llm_responses_file)} in batches of {LOAD_BATCH_SIZE}", agent_name="DeepEvalAgent")
+        metric_names = ", ".join(METRIC_REGISTRY[key]["name"] for key in resolve_metrics(selected_metrics)[0] or ["correctness"])
+        thread_safe_add_log(shared_data['logs'], f"🔬 Starting DeepEval assessment: {metric_names}...", agent_name="DeepEvalAgent")
         
-        test_cases = load_test_cases_from_jmeter_output(llm_responses_file)
-
-        thread_safe_add_log(shared_data['logs'], f"✅ Loaded {len(test_cases)} test cases successfully.", agent_name="DeepEvalAgent")
-        thread_safe_add_log(shared_data['logs'], "🔬 Starting DeepEval correctness assessment...", agent_name="DeepEvalAgent")
-        
-        execute_deepeval_assessment(test_cases, shared_data)
+        with stage_timer("evaluate"):
+            run_data = execute_deepeval_assessment(llm_responses_file, shared_data)
+        record_rows(run_data['testCount'])
 
         thread_safe_add_log(shared_data['logs'], "✅ DeepEval assessment execution completed.", agent_name="DeepEvalAgent")
         
         # Handle file renaming with JMeter timestamp
-        deepeval_output_file = rename_deepeval_output_with_timestamp(run_timestamp, shared_data)
+        with stage_timer("rename_output"):
+            deepeval_output_file = rename_deepeval_output_with_timestamp(run_timestamp, shared_data)
         
         return {
             'success': True,
-            'test_cases_count': len(test_cases),
+            'test_cases_count': run_data['testCount'],
             'deepeval_output_file': deepeval_output_file,
+            'assessment_dir': paths['assessment_dir'],
             'run_timestamp': run_timestamp,
             'selected_metrics': selected_metrics
         }
@@ -71,7 +105,10 @@ def run_deepeval_assessment_node(shared_data, state_snapshot):
             'success': False,
             'error': str(e)
         }
+    finally:
+        release_assessment(paths['assessment_dir'])
 
+@profile_node("analyze_deepeval_results")
 def analyze_deepeval_results_node(shared_data, state_snapshot):
     """
     Analyze DeepEval results and prepare structured data for UI display.
@@ -84,19 +121,26 @@ def analyze_deepeval_results_node(shared_data, state_snapshot):
         dict: Structured analysis for UI components and report tabs
     """
     try:
-        # Parse the renamed .latest_test_run.json file
+        # Stream the renamed .latest_test_run.json file into the assessment's columnar results store
         thread_safe_add_log(shared_data['logs'], "📊 Parsing DeepEval results for UI display...", agent_name="DeepEvalAgent")
 
         # Get the renamed file path from shared_data results
         run_timestamp = shared_data['run_timestamp']
         deepeval_output_file = shared_data['deepeval_output_file']
-        deepeval_results = parse_latest_test_run_file(deepeval_output_file, shared_data)
-        
-        if not deepeval_results:
-            thread_safe_add_log(shared_data['logs'], "❌ No valid DeepEval results found to analyze.", agent_name="DeepEvalAgent")
+        if not deepeval_output_file or not os.path.exists(deepeval_output_file):
+            thread_safe_add_log(shared_data['logs'], f"❌ DeepEval results file not found: {deepeval_output_file}", agent_name="DeepEvalAgent")
             return {'error': "No valid DeepEval results found."}
-        # Create comprehensive analysis structure for the 5 UI tabs
-        analysis = create_comprehensive_analysis(deepeval_results, shared_data)
+
+        paths = shared_data['assessment_paths']
+        with stage_timer("parse_results"):
+            thread_safe_add_log(shared_data['logs'], f"📖 Streaming DeepEval results from: {deepeval_output_file}", agent_name="DeepEvalAgent")
+            store, metric_store, aggregates, run_data = write_results_store(deepeval_output_file, paths['results_store_file'], paths['metric_store_file'])
+        shared_data['results_store_file'] = paths['results_store_file']
+
+        # Create comprehensive analysis structure for the UI tabs
+        with stage_timer("build_analysis"):
+            analysis = create_comprehensive_analysis(store, metric_store, aggregates, run_data, shared_data)
+        record_rows(analysis['metadata']['total_questions'])
         analysis_str = f"✅ Analysis complete: {analysis['metadata']['pass_count']}/{analysis['metadata']['total_questions']} passed ({analysis['metadata']['overall_pass_rate']:.1f}%)"
         thread_safe_add_log(shared_data['logs'], analysis_str, agent_name="DeepEvalAgent")
 
@@ -108,65 +152,582 @@ def analyze_deepeval_results_node(shared_data, state_snapshot):
 
 # ========================= Supporting Utility Functions =========================
 
-def load_test_cases_from_jmeter_output(json_file_path):
+def make_assessment_id(selected_metrics):
+    """Assessment id derived from the metric set, so re-running the same metrics resumes its checkpoint."""
+    return "-".join(sorted(selected_metrics)) or "correctness"
+
+def get_assessment_paths(run_timestamp, assessment_id):
+    """Return the run-scoped output paths of one assessment: {deepeval_results_path}/runs/{run_timestamp}/{assessment_id}/."""
+    assessment_dir = os.path.join(deepeval_results_path, "runs", run_timestamp, assessment_id)
+    return {
+        "analysis_dir": get_analysis_dir(make_analysis_id(run_timestamp, assessment_id)),
+        "assessment_dir": assessment_dir,
+        "latest_test_run_file": os.path.join(assessment_dir, ".latest_test_run.json"),
+        "deepeval_output_file": os.path.join(assessment_dir, f"{run_timestamp}_.latest_test_run.json"),
+        "checkpoint_file": os.path.join(assessment_dir, "checkpoint.jsonl"),
+        "results_store_file": os.path.join(assessment_dir, f"{run_timestamp}_results.parquet"),
+        "metric_store_file": os.path.join(assessment_dir, f"{run_timestamp}_metric_results.parquet"),
+    }
+
+def make_analysis_id(run_timestamp, assessment_id):
+    """Id of an assessment's analysis, as kept in session state: "{run_timestamp}/{assessment_id}"."""
+    return f"{run_timestamp}/{assessment_id}"
+
+def get_analysis_dir(analysis_id):
+    """Analysis store directory of an assessment (see analysis_store)."""
+    return os.path.join(deepeval_results_path, "runs", analysis_id, "analysis")
+
+def claim_assessment(assessment_dir):
+    """Mark an assessment directory as in use. Returns False if another assessment is writing to it."""
+    with _active_assessments_lock:
+        if assessment_dir in _active_assessments:
+            return False
+        _active_assessments.add(assessment_dir)
+        return True
+
+def release_assessment(assessment_dir):
+    with _active_assessments_lock:
+        _active_assessments.discard(assessment_dir)
+
+class LoadStats:
+    """Counters of a streaming load; bad lines are reported in aggregate once the file has been read."""
+    def __init__(self):
+        self.loaded = 0
+        self.invalid = 0
+        self.first_invalid_line = None
+
+    def describe_invalid(self):
+        return f"{self.invalid} invalid JSON lines (first at line {self.first_invalid_line})"
+
+def read_response_lines(json_file_path):
+    """Yield (line_number, line) for each non-blank line of the JMeter _llm_responses.json output."""
+    with open(json_file_path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if line.strip():
+                yield line_number, line
+
+def select_lines(lines, line_numbers):
+    """Keep only the given line numbers (sampling filter applied before parsing)."""
+    for line_number, line in lines:
+        if line_number in line_numbers:
+            yield line_number, line
+
+def parse_test_cases(lines, stats):
+    """Parse and normalize (line_number, line) pairs into LLMTestCases; invalid lines are counted in 'stats' and skipped."""
+    for line_number, line in lines:
+        try:
+            test_case = parse_test_case_line(line)
+        except json.JSONDecodeError:
+            stats.invalid += 1
+            stats.first_invalid_line = stats.first_invalid_line or line_number
+            continue
+        test_case.additional_metadata['line_number'] = line_number
+        stats.loaded += 1
+        yield test_case
+
+def attach_sample_metadata(test_cases, selection):
+    """Add the stratum and sample weight chosen by plan_stratified_sample to each sampled case."""
+    for test_case in test_cases:
+        test_case.additional_metadata.update(selection[test_case.additional_metadata['line_number']])
+        yield test_case
+
+def batched(items, size):
+    """Group an iterable into lists of up to 'size' items without materializing it."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def load_sampling_metadata(json_file_path, stats):
+    """Metadata-only pass over the responses for plan_stratified_sample (no test cases are kept)."""
+    return pd.DataFrame(
+        [{key: case.additional_metadata[key] for key in ('line_number', 'question_number', 'sample_timestamp')}
+         for case in parse_test_cases(read_response_lines(json_file_path), stats)],
+        columns=['line_number', 'question_number', 'sample_timestamp'],
+    )
+
+def iter_assessment_test_cases(json_file_path, shared_data, stats):
+    """
+    Build the lazy read -> filter -> parse/normalize -> annotate pipeline of an assessment.
+    Without sampling the file is read once as the evaluator consumes it. With sampling a metadata-only
+    pass picks the sample first, then only the sampled lines are parsed.
+
+    Returns:
+        tuple: (test case generator, number of cases it will yield)
+    """
+    sampling = shared_data.get('sampling')
+    if not sampling:
+        shared_data['sampling_plan'] = None
+        with open(json_file_path, 'r', encoding='utf-8') as file:
+            total = sum(1 for line in file if line.strip())  # Upper bound for progress (invalid lines included)
+        return parse_test_cases(read_response_lines(json_file_path), stats), total
+
+    with stage_timer("sample_test_cases"):
+        selection, sampling_plan = plan_stratified_sample(load_sampling_metadata(json_file_path, stats), sampling['margin'], sampling['confidence'])
+    shared_data['sampling_plan'] = sampling_plan
+    thread_safe_add_log(shared_data['logs'], f"🎲 Sampling {sampling_plan['sampleSize']}/{sampling_plan['population']} responses across {sampling_plan['sampledStrata']} question x time-window strata for a ±{sampling['margin'] * 100:.1f} pp pass rate at {sampling['confidence'] * 100:.0f}% confidence.", agent_name="DeepEvalAgent")
+    lines = select_lines(read_response_lines(json_file_path), selection)
+    return attach_sample_metadata(parse_test_cases(lines, LoadStats()), selection), sampling_plan['sampleSize']
+
+def parse_test_case_line(line):
+    """Build an LLMTestCase from one line of the JMeter _llm_responses.json output (raises JSONDecodeError)."""
+    data = json.loads(line.strip())  # Read one JSON object per line
+    return LLMTestCase(
+        input=data.get('prompt', 'MISSING_PROMPT'),
+        actual_output=data.get('llm_response', 'MISSING_RESPONSE').strip().upper(),
+        expected_output=data.get('correct_answer', 'MISSING_ANSWER').strip().upper(),
+        # Dataset explanations of the options ("Explanation A: ..."), compared with the model's reasoning by the lexical metrics
+        context=[str(item) for item in data.get('context') or []] or None,
+        # Load conditions are joined back to each case through question_number and sample_timestamp (see quality_under_load)
+        additional_metadata={
+            'question_number': data.get('question_number'),
+            'sample_timestamp': data.get('sample_timestamp'),
+            'reasoning': data.get('reasoning') or '',
+        }
+    )
+
+def execute_deepeval_assessment(llm_responses_file, shared_data):
     """
-    Load test cases from JMeter JSON output file.
-    Refactored version of the original load_test_cases() function.
+    Execute DeepEval assessment on the selected metrics (judge and lexical, see grade_test_cases).
+    Test cases are streamed from the responses file in batches of LOAD_BATCH_SIZE: each batch is graded by
+    grade_test_cases and appended to .latest_test_run.json before the next one is read, so memory stays
+    proportional to the batch size rather than the file size. Each graded case is checkpointed, so
+    re-running an interrupted assessment of the same run only grades the remaining cases.
+
+    Returns:
+        dict: testRunData totals (without testCases)
     """
-    test_cases = []
-    with open(json_file_path, 'r') as file:
-        for line_num, line in enumerate(file, 1):
-            try:
-                data = json.loads(line.strip())  # Read one JSON object per line
-                test_case = LLMTestCase(
-                    input=data.get('prompt', 'MISSING_PROMPT'),
-                    actual_output=data.get('llm_response', 'MISSING_RESPONSE').strip().upper(),
-                    expected_output=data.get('correct_answer', 'MISSING_ANSWER').strip().upper()
-                )
-                test_cases.append(test_case)
-            except json.JSONDecodeError as e:
-                print(f"[ERROR]: Skipping invalid JSON on line {line_num}: {line.strip()}")
-                print(f"Reason: {e}")
-                continue
-    return test_cases
-
-def execute_deepeval_assessment(test_cases, shared_data):
+    paths = shared_data['assessment_paths']
+    checkpoint = CheckpointStore(paths['checkpoint_file']) if CHECKPOINTS_ENABLED else None
+    stats = LoadStats()
+    test_cases, total = iter_assessment_test_cases(llm_responses_file, shared_data, stats)
+
+    # One executor for all batches keeps its adaptive concurrency; a single batch reports its own progress
+    executor = JudgeExecutor(shared_data)
+    single_batch = total <= LOAD_BATCH_SIZE
+    errors = 0
+    start_time = time.perf_counter()
+    with TestRunWriter(paths['latest_test_run_file'], shared_data.get('sampling_plan')) as writer:
+        for batch in batched(test_cases, LOAD_BATCH_SIZE):
+            case_results = grade_test_cases(batch, shared_data, executor=executor, publish_progress=single_batch,
+                                            checkpoint=checkpoint, index_offset=writer.cases)
+            writer.write(batch, case_results)
+            errors += sum(1 for result in case_results if result.get("error"))
+            if not single_batch:
+                shared_data['current_test_case'] = writer.cases
+                shared_data['progress'] = min(int(writer.cases / total * 100), 100)
+                thread_safe_add_log(shared_data['logs'], f"📦 Graded batch of {len(batch)}: {writer.cases}/{total} test cases so far.", agent_name="DeepEvalAgent")
+        run_data = writer.close(time.perf_counter() - start_time)
+    shared_data['progress'] = 100
+
+    if stats.invalid:
+        thread_safe_add_log(shared_data['logs'], f"⚠️ Skipped {stats.describe_invalid()} in {os.path.basename(llm_responses_file)}.", agent_name="DeepEvalAgent")
+    thread_safe_add_log(shared_data['logs'], f"✅ DeepEval assessment completed ({run_data['testPassed']} passed, {run_data['testFailed']} failed, {errors} judge errors) - results saved to .latest_test_run.json", agent_name="DeepEvalAgent")
+
+    if checkpoint:
+        if errors:
+            thread_safe_add_log(shared_data['logs'], f"♻️ Checkpoint kept: run the assessment again to retry the {errors} cases with judge errors.", agent_name="DeepEvalAgent")
+        else:
+            checkpoint.remove()
+
+    return run_data
+
+def grade_test_cases(test_cases, shared_data, executor=None, publish_progress=True, checkpoint=None, index_offset=0):
     """
-    Execute DeepEval assessment with G-Eval correctness metric.
-    Refactored version of the original evaluate_responses() function.
+    Grade test cases on every selected metric and return one result per case, in input order.
+    Lexical metrics are computed locally for the whole batch, and unambiguous multiple-choice answers
+    are graded locally for correctness first. The remaining cases are deduplicated
+    (identical normalized prompt/response/expected answer), the judge cache is consulted for each distinct
+    case and metric, and only the rest are sent to the judge; every verdict is then copied to the identical cases.
+    Each (metric, judge batch) is one JudgeExecutor item, so the metrics of a case are judged concurrently on the
+    same loaded test case, sharing the in-flight limit (AIMD back-off on rate limits/timeouts, retries with jitter)
+    and the judge's connection pool. A case result holds one metricsData entry per metric.
+    Streaming and batched callers pass their own executor and publish_progress=False to keep cumulative progress.
+    With a CheckpointStore, every graded case is appended as it completes and cases already checkpointed
+    by an interrupted run are skipped; 'index_offset' is the assessment index of the first case of a batch.
     """
-    # Define metrics for evaluation
-    correctness_metric = GEval(
-        name="Correctness",
-        criteria="Determine if actual output matches expected output exactly.",
-        evaluation_params=[LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
-        strict_mode=True  # Enforce strict matching
+    metric_keys = resolve_metrics(shared_data.get('selected_metrics'))[0] or ["correctness"]
+    judge_keys, lexical_keys = split_by_kind(metric_keys)
+    case_results = [None] * len(test_cases)
+
+    # Resume: cases graded by an interrupted run of the same assessment
+    if checkpoint:
+        for index, result in checkpoint.load(test_cases, index_offset).items():
+            case_results[index] = result
+        resumed = sum(1 for result in case_results if result is not None)
+        if resumed:
+            thread_safe_add_log(shared_data['logs'], f"♻️ Resuming from checkpoint: {resumed}/{len(test_cases)} test cases already graded.", agent_name="DeepEvalAgent")
+
+    def save(indexes):
+        if checkpoint:
+            checkpoint.append_many([(index_offset + index, test_cases[index], case_results[index]) for index in indexes])
+
+    # Per-metric results of the cases still being graded: {index: {metric_key: result}}
+    todo = [index for index, result in enumerate(case_results) if result is None]
+    metric_results = {index: {} for index in todo}
+    duplicate_lexical = {}  # Own lexical results of the identical cases of a distinct case: {index: {metric_key: result}}
+
+    def fan_out(index, results, group):
+        """Copy the judge verdicts of a distinct case to its identical cases; returns all their indexes."""
+        case_results[index]["multiplicity"] = len(group)
+        copied = {
+            metric_key: {**result, "gradingMethod": "dedup", "runDuration": 0,
+                         "metricsData": [{**metric, "evaluationCost": 0} for metric in result.get("metricsData") or []] or None}
+            for metric_key, result in results.items() if metric_key not in lexical_keys
+        }
+        for duplicate in group[1:]:
+            own = duplicate_lexical.pop(duplicate, {})
+            case_results[duplicate] = {**combine_metric_results(metric_keys, {**results, **copied, **own}), "multiplicity": len(group)}
+        return group
+
+    def complete(index, duplicates):
+        """
+        Combine the metric results of a case once every metric is graded; returns the completed indexes.
+        'duplicates' maps a distinct case to its group of identical cases, which get its verdicts too.
+        """
+        if len(metric_results[index]) < len(metric_keys):
+            return []
+        results = metric_results.pop(index)
+        case_results[index] = combine_metric_results(metric_keys, results)
+        return fan_out(index, results, duplicates[index]) if index in duplicates else [index]
+
+    if lexical_keys and todo:
+        with stage_timer("lexical_metrics"):
+            lexical_results = compute_lexical_metrics(lexical_keys, [test_cases[index] for index in todo])
+        for metric_key, results in lexical_results.items():
+            for index, result in zip(todo, results):
+                metric_results[index][metric_key] = result
+
+    for metric_key in (key for key in judge_keys if METRIC_REGISTRY[key].get("local_grading")):
+        with stage_timer("local_grading"):
+            local_results, judge_positions = split_by_grading_path([test_cases[index] for index in todo])
+        for position, result in local_results.items():
+            metric_results[todo[position]][metric_key] = result
+        thread_safe_add_log(shared_data['logs'], f"🧮 Graded {len(local_results)}/{len(todo)} test cases locally; {len(judge_positions)} ambiguous cases sent to the judge.", agent_name="DeepEvalAgent")
+    save([completed for index in todo for completed in complete(index, {})])  # Not deduplicated yet
+
+    # Judge each distinct (prompt, response, expected answer) once; identical cases reuse its verdicts
+    duplicates = group_identical_cases(test_cases, list(metric_results))
+    deduplicated = sum(len(group) - 1 for group in duplicates.values())
+    # Lexical scores of identical cases differ when their reasoning does, so they keep their own
+    for group in duplicates.values():
+        for duplicate in group[1:]:
+            duplicate_lexical[duplicate] = {key: result for key, result in metric_results.pop(duplicate).items() if key in lexical_keys}
+    if deduplicated:
+        thread_safe_add_log(shared_data['logs'], f"🧬 Deduplicated {deduplicated} identical test cases: {len(duplicates)} distinct cases remain.", agent_name="DeepEvalAgent")
+
+    # Reuse judge results of identical test cases and metrics from earlier runs
+    cache = JudgeCache() if JUDGE_CACHE_ENABLED and judge_keys and metric_results else None
+    cache_keys = {}
+    if cache:
+        configs = {metric_key: metric_config(metric_key) for metric_key in judge_keys}
+        cache_keys = {
+            (index, metric_key): JudgeCache.make_key(test_cases[index], configs[metric_key])
+            for index, graded in metric_results.items() for metric_key in judge_keys if metric_key not in graded
+        }
+        cached = cache.get_many(cache_keys.values())
+        cached_indexes = []
+        for (index, metric_key), key in cache_keys.items():
+            if key in cached:
+                result = {**cached[key], "gradingMethod": "cache"}
+                result["metricsData"] = [{**metric, "evaluationCost": 0} for metric in result["metricsData"]]  # Already paid for by an earlier run
+                metric_results[index][metric_key] = result
+                cached_indexes.extend(complete(index, duplicates))
+        save(cached_indexes)
+        thread_safe_add_log(shared_data['logs'], f"🗄️ Judge cache: {cache.hits} hits, {cache.misses} misses.", agent_name="DeepEvalAgent")
+
+    # One judge call per (metric, batch): several cases per prompt with the batched local judge, otherwise one case
+    batch_size = JUDGE_BATCH_SIZE if BATCHED_JUDGE else 1
+    batches = []
+    for metric_key in judge_keys:
+        pending = [index for index, graded in metric_results.items() if metric_key not in graded]
+        batches.extend((metric_key, pending[start:start + batch_size]) for start in range(0, len(pending), batch_size))
+
+    if batches:
+        executor = executor or JudgeExecutor(shared_data)
+        metric_names = ", ".join(METRIC_REGISTRY[metric_key]["name"] for metric_key in judge_keys)
+        thread_safe_add_log(shared_data['logs'], f"🔍 Evaluating {len(metric_results)} test cases on {metric_names} with {describe_judge()} in {len(batches)} judge calls (up to {executor.limiter.maximum} concurrent)...", agent_name="DeepEvalAgent")
+
+        def store_batch(position, batch_result):
+            # Called on this thread as each batch finishes
+            metric_key, batch = batches[position]
+            judged = []
+            for index, result in zip(batch, expand_batch_result(batch_result, len(batch))):
+                if cache:
+                    cache.put(cache_keys[(index, metric_key)], result)
+                metric_results[index][metric_key] = {**result, "gradingMethod": "judge"}
+                judged.extend(complete(index, duplicates))
+            save(judged)
+
+        executor.run([(metric_key, [test_cases[index] for index in batch]) for metric_key, batch in batches], judge_metric, on_result=store_batch, publish_progress=publish_progress)
+    elif publish_progress:
+        shared_data['progress'] = 100
+
+    if cache:
+        evicted = cache.evict()
+        if evicted:
+            thread_safe_add_log(shared_data['logs'], f"🗄️ Judge cache evicted {evicted} least recently used entries.", agent_name="DeepEvalAgent")
+
+    return case_results
+
+def get_judge_model():
+    """Judge model passed to DeepEval metrics: None (DeepEval's default OpenAI judge) or the shared local Ollama judge."""
+    global _judge_model
+    if JUDGE_BACKEND == "ollama" and _judge_model is None:
+        _judge_model = OllamaJudgeModel()
+    return _judge_model
+
+def describe_judge():
+    """Human-readable judge description for the logs."""
+    if BATCHED_JUDGE:
+        return f"the batched {get_judge_model().get_model_name()} judge ({JUDGE_BATCH_SIZE} cases per prompt)"
+    if JUDGE_BACKEND == "ollama":
+        return f"G-Eval on {get_judge_model().get_model_name()}"
+    return "G-Eval"
+
+def create_metric(metric_key):
+    """G-Eval metric of the registry. A new instance is needed per test case because metrics keep per-case state."""
+    definition = METRIC_REGISTRY[metric_key]
+    return GEval(
+        name=definition["name"],
+        criteria=definition["criteria"],
+        evaluation_params=definition["evaluation_params"],
+        model=get_judge_model(),  # None = DeepEval's default judge
+        strict_mode=True,  # Enforce strict matching
+        async_mode=False   # Each judge call already runs on its own worker thread
     )
-    
-    # Create dataset and evaluate
-    dataset = EvaluationDataset(test_cases=test_cases)
-    
-    # Show progress indicator
-    thread_safe_add_log(shared_data['logs'], f"🔍 Evaluating {len(test_cases)} test cases with G-Eval correctness metric...", agent_name="DeepEvalAgent")
 
-    # Evaluate the test cases using the correctness metric
-    evaluation_result = dataset.evaluate([correctness_metric])
+def metric_config(metric_key):
+    """Settings that change a metric's verdict; part of the judge cache key."""
+    definition = METRIC_REGISTRY[metric_key]
+    if BATCHED_JUDGE:
+        return {
+            "name": f"{definition['name']} (Batched)",
+            "criteria": definition["criteria"],
+            "strict_mode": True,
+            "threshold": 1.0,
+            "evaluation_model": get_judge_model().get_model_name(),
+        }
+    metric = create_metric(metric_key)
+    return {
+        "name": metric.__name__,
+        "criteria": definition["criteria"],
+        "strict_mode": metric.strict_mode,
+        "threshold": metric.threshold,
+        "evaluation_model": getattr(metric, "evaluation_model", None),
+    }
 
-    thread_safe_add_log(shared_data['logs'], "✅ G-Eval assessment completed - results saved to .latest_test_run.json", agent_name="DeepEvalAgent")
-    
-    return evaluation_result
+def measure_metric(metric_key, test_case):
+    """Judge a single test case on one metric and return its DeepEval metricsData entry."""
+    metric = create_metric(metric_key)
+    start_time = time.perf_counter()
+    metric.measure(test_case)
+    return {
+        "metricsData": [{
+            "name": metric.__name__,
+            "threshold": metric.threshold,
+            "success": bool(metric.is_successful()),
+            "score": metric.score,
+            "reason": metric.reason,
+            "strictMode": metric.strict_mode,
+            "evaluationModel": getattr(metric, "evaluation_model", None),
+            "evaluationCost": getattr(metric, "evaluation_cost", None) or 0,
+            "error": None,
+        }],
+        "runDuration": time.perf_counter() - start_time,
+    }
+
+def group_identical_cases(test_cases, indexes):
+    """
+    Group cases with the same normalized (input, actual_output, expected_output).
+    Returns {first index: [indexes of all identical cases]} in first-occurrence order.
+    """
+    groups = {}
+    for index in indexes:
+        case = test_cases[index]
+        key = tuple(" ".join(str(text or "").split()) for text in (case.input, case.actual_output, case.expected_output))
+        groups.setdefault(key, []).append(index)
+    return {group[0]: group for group in groups.values()}
+
+def judge_metric(item):
+    """Judge task run by JudgeExecutor for one (metric_key, batch of test cases): {"results": [one result per case]}."""
+    metric_key, test_cases = item
+    if BATCHED_JUDGE:
+        return {"results": measure_metric_batch(metric_key, test_cases)}
+    return {"results": [measure_metric(metric_key, test_case) for test_case in test_cases]}
+
+def expand_batch_result(batch_result, size):
+    """Per-case results of a judge batch; a failed batch ({"error": ...}) fails each of its cases."""
+    if "results" in batch_result:
+        return batch_result["results"]
+    return [{"error": batch_result.get("error", "unknown error")} for _ in range(size)]
+
+def measure_metric_batch(metric_key, test_cases):
+    """Judge several test cases on one metric with one prompt to the local judge and return their metricsData entries."""
+    judge = get_judge_model()
+    definition = METRIC_REGISTRY[metric_key]
+    start_time = time.perf_counter()
+    verdicts = judge.judge_batch(test_cases, definition["criteria"], metric_fields(metric_key))
+    duration = (time.perf_counter() - start_time) / len(test_cases)  # Batch time shared by its cases
+    return [
+        {"error": verdict["error"]} if "error" in verdict else {
+            "metricsData": [{
+                "name": f"{definition['name']} (Batched)",
+                "threshold": 1.0,
+                "success": bool(verdict["success"]),
+                "score": 1.0 if verdict["success"] else 0.0,
+                "reason": verdict["reason"],
+                "strictMode": True,
+                "evaluationModel": judge.get_model_name(),
+                "evaluationCost": 0,  # Local model
+                "error": None,
+            }],
+            "runDuration": duration,
+        }
+        for verdict in verdicts
+    ]
+
+def combine_metric_results(metric_keys, results):
+    """
+    Merge the per-metric results of one case into its case result: metricsData in metric order,
+    judge time summed, and the most expensive grading method (judge > cache > dedup > local).
+    Each metricsData entry keeps the grading method of its own metric, which gradingSummary counts.
+    A metric that failed gets a failing placeholder entry and the case keeps an 'error' so it is retried.
+    """
+    metrics_data, errors = [], []
+    for metric_key in metric_keys:
+        result = results[metric_key]
+        method = result.get("gradingMethod", "judge")
+        if result.get("metricsData"):
+            metrics_data.extend({**metric, "gradingMethod": method} for metric in result["metricsData"])
+            continue
+        error = result.get("error", "unknown error")
+        errors.append(f"{METRIC_REGISTRY[metric_key]['name']}: {error}")
+        metrics_data.append({
+            "name": f"{METRIC_REGISTRY[metric_key]['name']} (GEval)", "threshold": 1.0, "success": False, "score": 0,
+            "reason": f"Judge error: {error}", "strictMode": True,
+            "evaluationModel": None, "evaluationCost": 0, "error": error, "gradingMethod": method,
+        })
+    methods = {result.get("gradingMethod", "judge") for result in results.values()}
+    combined = {
+        "metricsData": metrics_data,
+        "runDuration": sum(result.get("runDuration", 0) for result in results.values()),
+        "gradingMethod": next(method for method in ("judge", "cache", "dedup", "local") if method in methods),
+    }
+    if errors:
+        combined["error"] = "; ".join(errors)
+    return combined
+
+def build_case_entry(order, test_case, result):
+    """Assemble one per-case judge result into the testCases entry of .latest_test_run.json read by the analysis."""
+    metrics_data = result.get("metricsData") or [{
+        "name": "Correctness (GEval)", "threshold": 1.0, "success": False, "score": 0,
+        "reason": f"Judge error: {result.get('error', 'unknown error')}", "strictMode": True,
+        "evaluationModel": None, "evaluationCost": 0, "error": result.get("error"),
+    }]
+    return {
+        "name": f"test_case_{order}",
+        "input": test_case.input,
+        "actualOutput": test_case.actual_output,
+        "expectedOutput": test_case.expected_output,
+        "additionalMetadata": getattr(test_case, "additional_metadata", None),
+        "success": all(metric["success"] for metric in metrics_data),
+        "metricsData": metrics_data,
+        "runDuration": result.get("runDuration", 0),
+        "evaluationCost": sum(metric.get("evaluationCost") or 0 for metric in metrics_data),
+        "gradingMethod": result.get("gradingMethod", "judge"),
+        "multiplicity": result.get("multiplicity", 1),
+        "order": order,
+    }
+
+class TestRunWriter:
+    """
+    Incremental writer of .latest_test_run.json. Cases are appended to testRunData.testCases batch by batch
+    and the totals (testPassed, gradingSummary, samplingPlan, ...) follow testCases once close() is called,
+    which is where iter_test_cases expects them. gradingSummary counts verdicts (one per case and metric)
+    by grading method, so a case graded locally on one metric and by the judge on another counts for both.
+    The file is written under a temporary name and only replaces the previous test run when closed;
+    an exception inside the 'with' block discards it.
+    """
+    def __init__(self, path, sampling_plan=None):
+        self.path = path
+        self.sampling_plan = sampling_plan
+        self.cases = 0
+        self.passed = 0
+        self.evaluation_cost = 0
+        self.grading_summary = {"local": 0, "cache": 0, "judge": 0, "dedup": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path + ".tmp", 'w', encoding='utf-8')
+        self._file.write('{"testRunData": {"testCases": [')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._file.closed:
+            self._file.close()
+            os.remove(self.path + ".tmp")
+        return False
+
+    def write(self, test_cases, case_results):
+        for test_case, result in zip(test_cases, case_results):
+            case = build_case_entry(self.cases, test_case, result)
+            self._file.write(("\n" if self.cases == 0 else ",\n") + json.dumps(case))
+            self.cases += 1
+            self.passed += case["success"]
+            self.evaluation_cost += case["evaluationCost"]
+            for metric in case["metricsData"]:
+                method = metric.get("gradingMethod", case["gradingMethod"])
+                if method in self.grading_summary:
+                    self.grading_summary[method] += 1
+
+    def close(self, run_duration):
+        """Write the totals, move the file into place and return them (testRunData without testCases)."""
+        run_data = {
+            "testPassed": self.passed,
+            "testFailed": self.cases - self.passed,
+            "testCount": self.cases,
+            "runDuration": run_duration,
+            "evaluationCost": self.evaluation_cost,
+            "gradingSummary": self.grading_summary,
+            "samplingPlan": self.sampling_plan,
+        }
+        self._file.write("\n], " + json.dumps(run_data)[1:] + "}\n")
+        self._file.close()
+        os.replace(self.path + ".tmp", self.path)
+        return run_data
+
+def backup_previous_output(shared_data):
+    """Move the previous output of the same assessment to its .old/ directory before it is run again (call once claimed)."""
+    try:
+        paths = shared_data['assessment_paths']
+        previous_output = paths['deepeval_output_file']
+        if not os.path.exists(previous_output):
+            thread_safe_add_log(shared_data['logs'], f"📝 No previous results in {paths['assessment_dir']} - no cleanup needed.", agent_name="DeepEvalAgent")
+            return None
+
+        old_dir = os.path.join(paths['assessment_dir'], ".old")
+        os.makedirs(old_dir, exist_ok=True)
+        backup_filename = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.path.basename(previous_output)}"
+        backup_path = os.path.join(old_dir, backup_filename)
+        os.replace(previous_output, backup_path)
+        thread_safe_add_log(shared_data['logs'], f"🗂️ Previous results of this assessment backed up to: .old/{backup_filename}", agent_name="DeepEvalAgent")
+        return backup_path
+    except OSError as e:
+        thread_safe_add_log(shared_data['logs'], f"⚠️ File cleanup warning: {str(e)}", agent_name="DeepEvalAgent")
+        return None
 
 def rename_deepeval_output_with_timestamp(run_timestamp, shared_data):
     """
-    Rename .latest_test_run.json with JMeter timestamp for correlation.
+    Rename the assessment's .latest_test_run.json with JMeter timestamp for correlation.
     """
     try:
-        original_file = deepeval_results_file
-        timestamped_file = os.path.join(deepeval_results_path, f"{run_timestamp}_.latest_test_run.json")
+        paths = shared_data['assessment_paths']
+        original_file = paths['latest_test_run_file']
+        timestamped_file = paths['deepeval_output_file']
         
         if os.path.exists(original_file):
-            shutil.move(original_file, timestamped_file)
-            thread_safe_add_log(shared_data['logs'], f"📁 Results file renamed to: {run_timestamp}_.latest_test_run.json", agent_name="DeepEvalAgent")
+            os.replace(original_file, timestamped_file)
+            thread_safe_add_log(shared_data['logs'], f"📁 Results file renamed to: {timestamped_file}", agent_name="DeepEvalAgent")
             return timestamped_file
         else:
             thread_safe_add_log(shared_data['logs'], "⚠️ Warning: .latest_test_run.json not found for renaming", agent_name="DeepEvalAgent")
@@ -176,37 +737,13 @@ def rename_deepeval_output_with_timestamp(run_timestamp, shared_data):
         thread_safe_add_log(shared_data['logs'], f"⚠️ File renaming error: {str(e)}", agent_name="DeepEvalAgent")
         return None
 
-def parse_latest_test_run_file(deepeval_output_file, shared_data):
-    """
-    Parse the timestamped DeepEval output file.
-    """
-    timestamped_file = deepeval_output_file
-    
-    if not os.path.exists(timestamped_file):
-        # Fallback to original filename if timestamp version doesn't exist
-        original_file = deepeval_results_file
-        if os.path.exists(original_file):
-            timestamped_file = original_file
-            thread_safe_add_log(shared_data['logs'], f"Found DeepEval original results file: {timestamped_file}", agent_name="DeepEvalAgent")
-        else:
-            thread_safe_add_log(shared_data['logs'], f"DeepEval results file not found: {timestamped_file}", agent_name="DeepEvalAgent")
-
-    try:
-        with open(timestamped_file, 'r') as file:
-            thread_safe_add_log(shared_data['logs'], f"📖 Parsing DeepEval results from: {timestamped_file}", agent_name="DeepEvalAgent")
-            return json.load(file)
-    except json.JSONDecodeError as e:
-        thread_safe_add_log(shared_data['logs'], f"❌ Failed to parse JSON from {timestamped_file}: {e}", agent_name="DeepEvalAgent")
-        return None
-
-def create_comprehensive_analysis(deepeval_results, shared_data):
+def create_comprehensive_analysis(store, metric_store, aggregates, run_data, shared_data):
     """
-    Create comprehensive analysis structure for the 5 UI tabs.
+    Create comprehensive analysis structure for the UI tabs.
+    Everything is derived from the aggregates collected while streaming the results into the columnar
+    stores; the analysis holds only handles on the stores, and the case tabs read pages of them from disk.
+    A case passes when it passes every selected metric; each metric is also reported on its own.
     """
-    # Safely extract testRunData
-    run_data = deepeval_results.get("testRunData", {})
-    test_cases = run_data.get("testCases", [])
-    
     # --- Summary Metrics ---
     # Calculate overall pass/fail rates and scores
     pass_count = run_data.get("testPassed", 0)
@@ -215,17 +752,6 @@ def create_comprehensive_analysis(deepeval_results, shared_data):
     overall_pass_rate = (pass_count / total_questions * 100) if total_questions else 0
     overall_fail_rate = (fail_count / total_questions * 100) if total_questions else 0
     
-    # --- Score Aggregation ---
-    # Extract scores from test cases
-    scores = []
-    for case in test_cases:
-        for metric in case.get("metricsData", []):
-            score = metric.get("score")
-            if isinstance(score, (int, float)):
-                scores.append(score)
-
-    average_score = sum(scores) / len(scores) if scores else 0
-    
     analysis = {
         # Tab 1: DeepEval Summary
         "summary": {
@@ -234,23 +760,29 @@ def create_comprehensive_analysis(deepeval_results, shared_data):
             "fail_count": fail_count,
             "overall_pass_rate": overall_pass_rate,
             "overall_fail_rate": overall_fail_rate,
-            "average_score": average_score,
+            "average_score": aggregates.score_mean,
             "total_cost": run_data.get("evaluationCost", 0),
             "total_duration": run_data.get("runDuration", 0),
-            "run_timestamp": shared_data.get("run_timestamp", "N/A")
+            "run_timestamp": shared_data.get("run_timestamp", "N/A"),
+            "local_graded": run_data.get("gradingSummary", {}).get("local", 0),
+            "cache_graded": run_data.get("gradingSummary", {}).get("cache", 0),
+            "judge_graded": run_data.get("gradingSummary", {}).get("judge", total_questions),
+            "dedup_graded": run_data.get("gradingSummary", {}).get("dedup", 0),
+            # Sampled assessments: population pass rate estimate with its confidence interval
+            "sampling": estimate_pass_rate(store.read_columns(["success", "sample_weight"]), run_data["samplingPlan"]) if run_data.get("samplingPlan") else None,
+            # Pass rate, score and cost of each selected metric
+            "metrics": aggregates.metric_summary()
         },
         
-        # Tab 2: Detailed Results Table
-        "detailed_results": create_detailed_results_table(test_cases),
+        # Tabs 2 and 5: Results table and individual test cases (pages read from the on-disk store)
+        "results_store": store,
+        "metric_results_store": metric_store,
         
         # Tab 3: Score Distribution Chart
-        "score_distribution": create_score_distribution_data(scores),
+        "score_distribution": create_score_distribution_data(aggregates),
         
         # Tab 4: Quality Assessment Insights
-        "quality_insights": create_quality_insights(test_cases, run_data),
-        
-        # Tab 5: Individual Test Cases
-        "individual_cases": create_individual_cases_data(test_cases),
+        "quality_insights": create_quality_insights(aggregates, run_data),
         
         # Metadata for overall tracking
         "metadata": {
@@ -265,113 +797,45 @@ def create_comprehensive_analysis(deepeval_results, shared_data):
     
     return analysis
 
-def create_detailed_results_table(test_cases):
-    """Create data structure for detailed results table (Tab 2)."""
-    results = []
-    for i, case in enumerate(test_cases, 1):
-        metrics_data = case.get('metricsData', [])
-        score = metrics_data[0].get('score', 0) if metrics_data else 0
-        reason = metrics_data[0].get('reason', 'No reason provided') if metrics_data else 'No reason provided'
-        input_prompt = case.get('input', '')
-        
-        results.append({
-            'question_number': i,
-            'input_prompt': input_prompt[:100] + '...' if len(input_prompt) > 100 else input_prompt,
-            'expected_output': case.get('expectedOutput', ''),
-            'actual_output': case.get('actualOutput', ''),
-            'score': score,
-            'success': case.get('success', False),
-            'reasoning': reason[:200] + '...' if len(reason) > 200 else reason
-        })
-    return results
-
-def create_score_distribution_data(scores):
-    """Create data structure for score distribution chart (Tab 3)."""
-    if not scores:
+def create_score_distribution_data(aggregates):
+    """Create data structure for score distribution chart (Tab 3) over the case scores (mean of each case's metric scores)."""
+    if not aggregates.score_count:
         return {'bins': [], 'counts': [], 'statistics': {}}
     
-    # Create score bins
-    bins = [0, 0.2, 0.4, 0.6, 0.8, 1.0]
-    counts = [0] * (len(bins) - 1)
-    
-    for score in scores:
-        for i in range(len(bins) - 1):
-            if bins[i] <= score < bins[i + 1] or (i == len(bins) - 2 and score == 1.0):
-                counts[i] += 1
-                break
-    
     return {
-        'bins': bins,
-        'counts': counts,
+        'bins': SCORE_BINS,
+        'counts': aggregates.histogram.tolist(),
         'statistics': {
-            'mean': sum(scores) / len(scores),
-            'min': min(scores),
-            'max': max(scores),
-            'std': calculate_std(scores)
+            'mean': aggregates.score_mean,
+            'min': aggregates.score_min,
+            'max': aggregates.score_max,
+            'std': aggregates.score_std
         }
     }
 
-def create_quality_insights(test_cases, run_data):
+def create_quality_insights(aggregates, run_data):
     """Create insights for quality assessment (Tab 4)."""
     total_duration = run_data.get("runDuration", 0)
     total_cost = run_data.get("evaluationCost", 0)
 
     insights = {
-        'performance_by_score': {
-            'excellent': sum(1 for case in test_cases if get_case_score(case) >= 0.9),
-            'good': sum(1 for case in test_cases if 0.7 <= get_case_score(case) < 0.9),
-            'fair': sum(1 for case in test_cases if 0.5 <= get_case_score(case) < 0.7),
-            'poor': sum(1 for case in test_cases if get_case_score(case) < 0.5)
-        },
-        'common_failure_patterns': analyze_failure_patterns(test_cases),
+        'performance_by_score': dict(aggregates.bands),
+        'common_failure_patterns': analyze_failure_patterns(aggregates),
         'execution_metrics': {
             'total_cost': total_cost,
-            'average_duration_per_case': total_duration / len(test_cases) if test_cases else 0,
+            'average_duration_per_case': total_duration / aggregates.cases if aggregates.cases else 0,
             'total_duration': total_duration
         }
     }
     return insights
 
-def create_individual_cases_data(test_cases):
-    """Create detailed data for individual test cases (Tab 5)."""
-    cases = []
-    for i, case in enumerate(test_cases, 1):
-        metrics_data = case.get('metricsData', [])
-        cases.append({
-            'case_number': i,
-            'input': case.get('input', ''),
-            'expected_output': case.get('expectedOutput', ''),
-            'actual_output': case.get('actualOutput', ''),
-            'success': case.get('success', False),
-            'score': metrics_data[0].get('score', 0) if metrics_data else 0,
-            'reasoning': metrics_data[0].get('reason', 'No reason provided') if metrics_data else 'No reason provided',
-            'duration': case.get('runDuration', 0),
-            'cost': case.get('evaluationCost', 0)
-        })
-    return cases
-
 # ========================= Helper Functions =========================
 
-def get_case_score(case):
-    """Extract score from a test case."""
-    metrics_data = case.get('metricsData', [])
-    return metrics_data[0].get('score', 0) if metrics_data else 0
-
-def analyze_failure_patterns(test_cases):
+def analyze_failure_patterns(aggregates):
     """Analyze common patterns in failed test cases."""
-    failed_cases = [case for case in test_cases if not case.get('success', False)]
-    
     patterns = {
-        'total_failures': len(failed_cases),
+        'total_failures': aggregates.failures,
         'common_issues': ['Exact match requirement not met', 'Case sensitivity mismatch', 'Formatting differences'],
-        'failure_rate': len(failed_cases) / len(test_cases) * 100 if test_cases else 0
+        'failure_rate': aggregates.failures / aggregates.cases * 100 if aggregates.cases else 0
     }
     return patterns
-
-def calculate_std(values):
-    """Calculate standard deviation."""
-    if not values:
-        return 0
-    mean = sum(values) / len(values)
-    variance = sum((x - mean) ** 2 for x in values) / len(values)
-    return variance ** 0.5
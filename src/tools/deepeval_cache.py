@@ -0,0 +1,106 @@
+# Module to cache DeepEval judge results on disk, keyed by test case content and metric configuration
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable
+
+from src.utils.config import load_config
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+deepeval_results_path = deepeval_config.get("deepeval_results_path", ".deepeval")
+
+JUDGE_CACHE_ENABLED = deepeval_config.get("judge_cache", True)                   # Reuse judge results for identical test cases
+JUDGE_CACHE_MAX_ENTRIES = deepeval_config.get("judge_cache_max_entries", 50000)  # Least recently used entries beyond this are evicted
+JUDGE_CACHE_FILE = os.path.join(deepeval_results_path, "judge_cache.sqlite3")
+
+class JudgeCache:
+    """
+    Content-addressed SQLite cache of judge results.
+    The key is a SHA-256 of the test case fields and the metric configuration (name, criteria,
+    strict mode, threshold, judge model), so any change to the metric or judge misses the cache.
+    Only results without errors are stored; entries are evicted least recently used first.
+    """
+    def __init__(self, path: str = JUDGE_CACHE_FILE, max_entries: int = JUDGE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS judge_results ("
+                " key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_judge_results_last_used ON judge_results (last_used)")
+
+    @staticmethod
+    def make_key(test_case, metric_config: Dict[str, Any]) -> str:
+        """Hash of the test case fields and the metric configuration."""
+        payload = json.dumps({
+            "input": test_case.input,
+            "actual_output": test_case.actual_output,
+            "expected_output": test_case.expected_output,
+            "metric": metric_config,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {key: result} for the cached keys and refresh their last-used time."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._connect() as conn:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(f"SELECT key, result FROM judge_results WHERE key IN ({placeholders})", chunk).fetchall()
+                found.update({key: json.loads(result) for key, result in rows})
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE judge_results SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store one successful judge result."""
+        if result.get("error"):
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO judge_results (key, result, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+
+    def evict(self) -> int:
+        """Delete the least recently used entries above max_entries. Returns the number deleted."""
+        with self._connect() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM judge_results").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            conn.execute(
+                "DELETE FROM judge_results WHERE key IN (SELECT key FROM judge_results ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        return excess
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM judge_results").fetchone()[0]
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
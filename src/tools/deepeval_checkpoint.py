@@ -0,0 +1,82 @@
+# Module to checkpoint DeepEval results per test case so interrupted assessments can resume
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Any, List, Tuple
+
+from src.utils.config import load_config
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+CHECKPOINTS_ENABLED = deepeval_config.get("checkpoints", True)   # Append each graded case to the assessment's checkpoint.jsonl
+
+def case_fingerprint(test_case) -> str:
+    """Short hash of the test case fields; a checkpoint entry only applies to the same case."""
+    payload = json.dumps([test_case.input, test_case.actual_output, test_case.expected_output])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class CheckpointStore:
+    """
+    Append-only JSONL file with one graded case per line: {"index", "fingerprint", "result"}.
+    Only results without errors are written, so judge errors and stopped cases are retried on resume.
+    Appends are serialized with a lock because judge results arrive from worker threads.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None  # {index: entry} of the file as found, read once on the first load
+
+    def load(self, test_cases: List[Any], offset: int = 0) -> Dict[int, Dict[str, Any]]:
+        """
+        Return {position: result} of the checkpointed cases that still match 'test_cases', whose first case
+        has index 'offset' in the assessment. Batched callers load consecutive slices; each entry is
+        handed out once, so memory shrinks as the assessment advances.
+        """
+        if self._entries is None:
+            self._entries = self._read_entries()
+        done = {}
+        for position, test_case in enumerate(test_cases):
+            entry = self._entries.pop(offset + position, None)
+            if entry and entry.get("fingerprint") == case_fingerprint(test_case):
+                done[position] = entry["result"]
+        return done
+
+    def _read_entries(self) -> Dict[int, Dict[str, Any]]:
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line of an interrupted write
+                if isinstance(entry.get("index"), int):
+                    entries[entry["index"]] = entry
+        return entries
+
+    def append(self, index: int, test_case, result: Dict[str, Any]):
+        """Persist one graded case (ignored when the result is an error)."""
+        self.append_many([(index, test_case, result)])
+
+    def append_many(self, entries: List[Tuple[int, Any, Dict[str, Any]]]):
+        """Persist (index, test_case, result) entries with a single write; error results are skipped."""
+        lines = [
+            json.dumps({"index": index, "fingerprint": case_fingerprint(test_case), "result": result}) + "\n"
+            for index, test_case, result in entries if not result.get("error")
+        ]
+        if not lines:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.writelines(lines)
+
+    def remove(self):
+        """Delete the checkpoint once the assessment has completed without errors."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,160 @@
+# Module to run DeepEval judge calls concurrently with adaptive (AIMD) rate limiting
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Callable, Optional
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+MAX_CONCURRENCY = deepeval_config.get("max_concurrency", 16)            # Upper bound on in-flight judge calls
+MIN_CONCURRENCY = deepeval_config.get("min_concurrency", 1)             # Lower bound after back-off
+INITIAL_CONCURRENCY = deepeval_config.get("initial_concurrency", 4)     # In-flight judge calls at start
+MAX_RETRIES = deepeval_config.get("max_retries", 5)                     # Retries per test case on rate-limit/timeout errors
+RETRY_BASE_DELAY = deepeval_config.get("retry_base_delay", 1.0)         # Seconds; doubled on each retry (full jitter)
+RETRY_MAX_DELAY = deepeval_config.get("retry_max_delay", 30.0)          # Cap on the retry delay (seconds)
+
+# Error text that identifies throttling or transient judge failures across SDKs (OpenAI, httpx, Ollama)
+RETRYABLE_MARKERS = ("429", "rate limit", "ratelimit", "too many requests", "timeout", "timed out",
+                     "overloaded", "503", "502", "temporarily unavailable", "connection reset")
+
+class AIMDLimiter:
+    """
+    Bounds the number of in-flight judge calls with an additive-increase / multiplicative-decrease limit.
+    The limit grows by one after a full window of successes and halves on a rate-limit or timeout.
+    Throttle signals from calls started before the last decrease are ignored, so one burst of 429s
+    halves the limit once instead of collapsing it to the minimum.
+    """
+    def __init__(self, initial: int = INITIAL_CONCURRENCY, minimum: int = MIN_CONCURRENCY, maximum: int = MAX_CONCURRENCY):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.in_flight = 0
+        self.generation = 0     # Incremented on every decrease
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> int:
+        """Block until a slot is free; returns the generation the call started in."""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+            return self.generation
+
+    def release(self, generation: int, throttled: bool = False) -> bool:
+        """Free a slot and adapt the limit. Returns True when a throttle signal decreased the limit."""
+        decreased = False
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                if generation == self.generation:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self.generation += 1
+                    self._successes = 0
+                    decreased = True
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+        return decreased
+
+def is_retryable_error(error: Exception) -> bool:
+    """True for rate-limit, timeout and transient server/connection errors."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status in (408, 429, 500, 502, 503, 504):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in RETRYABLE_MARKERS)
+
+def retry_delay(attempt: int) -> float:
+    """Exponential back-off with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+class JudgeExecutor:
+    """
+    Runs one judge task per item on a worker pool bounded by an AIMDLimiter.
+    Retryable errors back off with jitter and shrink the limit; other errors fail the item.
+    Progress is published to shared_data['progress'] (0-100) and shared_data['current_test_case'].
+    """
+    def __init__(self, shared_data: Dict[str, Any], limiter: Optional[AIMDLimiter] = None,
+                 max_retries: int = MAX_RETRIES, agent_name: str = "DeepEvalAgent"):
+        self.shared_data = shared_data
+        self.limiter = limiter or AIMDLimiter()
+        self.max_retries = max_retries
+        self.agent_name = agent_name
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._total = 0
+        self._publish = True
+
+    def run(self, items: List[Any], task: Callable[[Any], Dict[str, Any]], on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+            publish_progress: bool = True) -> List[Dict[str, Any]]:
+        """
+        Apply 'task' to every item and return the results in input order.
+        A failed item yields {"error": "<message>"}. 'on_result(index, result)' is called as items finish.
+        Callers that track progress across several runs (streaming) pass publish_progress=False.
+        """
+        self._publish = publish_progress
+        self._total = len(items)
+        self._completed = 0
+        self._publish_progress()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+        with ThreadPoolExecutor(max_workers=self.limiter.maximum, thread_name_prefix="judge") as pool:
+            futures = {pool.submit(self._run_one, item, task): index for index, item in enumerate(items)}
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                with self._lock:
+                    self._completed += 1
+                self._publish_progress()
+                if on_result is not None:
+                    on_result(index, results[index])
+
+        if self._publish:
+            thread_safe_add_log(self.shared_data['logs'], f"⚖️ Judging finished: {self._total} cases, {self.retries} retries, final concurrency {self.limiter.limit}", agent_name=self.agent_name)
+        return results
+
+    def _run_one(self, item: Any, task: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            if self.shared_data.get('stop_requested'):
+                return {"error": "stopped"}
+            generation = self.limiter.acquire()
+            try:
+                result = task(item)
+            except Exception as e:
+                retryable = is_retryable_error(e)
+                decreased = self.limiter.release(generation, throttled=retryable)
+                if not retryable or attempt == self.max_retries:
+                    return {"error": f"{type(e).__name__}: {e}"}
+                with self._lock:
+                    self.retries += 1
+                if decreased:
+                    thread_safe_add_log(self.shared_data['logs'], f"⏳ Judge calls throttled ({type(e).__name__}); concurrency reduced to {self.limiter.limit}", agent_name=self.agent_name)
+                time.sleep(retry_delay(attempt))
+                continue
+            self.limiter.release(generation)
+            return result
+        return {"error": "retries exhausted"}
+
+    def _publish_progress(self):
+        """Write progress into the thread data read by the UI."""
+        if not self._publish:
+            return
+        self.shared_data['current_test_case'] = self._completed
+        self.shared_data['progress'] = int(self._completed / self._total * 100) if self._total else 100
+        # Log roughly every 10% so large runs stay readable
+        step = max(1, self._total // 10)
+        if self._completed and (self._completed % step == 0 or self._completed == self._total):
+            thread_safe_add_log(self.shared_data['logs'], f"⚖️ Judged {self._completed}/{self._total} cases ({self.shared_data['progress']}%), concurrency {self.limiter.limit}, in flight {self.limiter.in_flight}", agent_name=self.agent_name)
@@ -0,0 +1,159 @@
+# Module to compute cheap lexical quality metrics locally, in batch, without an LLM judge
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List
+
+from src.utils.config import load_config
+from src.tools.deepeval_metrics import METRIC_REGISTRY
+from src.tools.deepeval_local_grading import MC_CHOICES
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+LEXICAL_NGRAM_SIZE = deepeval_config.get("lexical_ngram_size", 3)   # Character n-gram length of the TF-IDF similarity metrics
+LEXICAL_MODEL_NAME = "local-lexical"                                  # Reported as the evaluation model of lexical metrics
+
+# ========================= Lexical Metric Functions =========================
+
+def compute_lexical_metrics(metric_keys: List[str], test_cases) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Score a batch of test cases on the selected lexical metrics.
+    Every metric is one vectorized pass over the whole batch (pandas string ops, NumPy reductions,
+    TF-IDF kept as sparse (row, n-gram, weight) triples), so thousands of cases take milliseconds.
+
+    Returns:
+        dict: {metric_key: [one metric result per test case, in order]}
+    """
+    actual = pd.Series([case.actual_output for case in test_cases], dtype="string").fillna("")
+    expected = pd.Series([case.expected_output for case in test_cases], dtype="string").fillna("")
+    scorers = {
+        "exact_match": lambda: exact_match(actual, expected),
+        "token_f1": lambda: token_f1(actual, expected),
+        "answer_similarity": lambda: tfidf_cosine(actual, expected),
+        "explanation_similarity": lambda: tfidf_cosine(reasoning_texts(test_cases), correct_explanations(test_cases, expected)),
+        "format_compliance": lambda: format_compliance(actual, reasoning_texts(test_cases)),
+    }
+    return {metric_key: build_lexical_results(metric_key, scorers[metric_key]()) for metric_key in metric_keys}
+
+def build_lexical_results(metric_key: str, scores: np.ndarray) -> List[Dict[str, Any]]:
+    """Wrap scores into case results shaped like judge results (NaN = no reference text, fails)."""
+    definition = METRIC_REGISTRY[metric_key]
+    threshold = definition["threshold"]
+    results = []
+    for score in scores:
+        missing = bool(np.isnan(score))
+        results.append({
+            "metricsData": [{
+                "name": f"{definition['name']} (Local)",
+                "threshold": threshold,
+                "success": not missing and bool(score >= threshold),
+                "score": None if missing else float(score),
+                "reason": "No reference text to compare with" if missing else f"{definition['description']}: {score:.2f} (threshold {threshold:.2f})",
+                "strictMode": False,
+                "evaluationModel": LEXICAL_MODEL_NAME,
+                "evaluationCost": 0,
+                "error": None,
+            }],
+            "runDuration": 0,
+            "gradingMethod": "local",
+        })
+    return results
+
+def normalize_text(texts: pd.Series) -> pd.Series:
+    """Lower-case, drop punctuation and collapse whitespace."""
+    return texts.str.lower().str.replace(r"[^\w\s]", " ", regex=True).str.split().str.join(" ").fillna("")
+
+def exact_match(actual: pd.Series, expected: pd.Series) -> np.ndarray:
+    return (normalize_text(actual) == normalize_text(expected)).to_numpy(dtype=float)
+
+def token_f1(actual: pd.Series, expected: pd.Series) -> np.ndarray:
+    """SQuAD-style token F1: overlap counts are min(count in response, count in answer) per token."""
+    actual_counts = token_counts(normalize_text(actual))
+    expected_counts = token_counts(normalize_text(expected))
+    overlap = pd.concat([actual_counts, expected_counts], axis=1, join="inner").min(axis=1).groupby(level=0).sum()
+    n = len(actual)
+    common = overlap.reindex(range(n), fill_value=0).to_numpy(dtype=float)
+    actual_total = actual_counts.groupby(level=0).sum().reindex(range(n), fill_value=0).to_numpy(dtype=float)
+    expected_total = expected_counts.groupby(level=0).sum().reindex(range(n), fill_value=0).to_numpy(dtype=float)
+    precision = np.divide(common, actual_total, out=np.zeros(n), where=actual_total > 0)
+    recall = np.divide(common, expected_total, out=np.zeros(n), where=expected_total > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(n), where=(precision + recall) > 0)
+    # Two empty texts match
+    return np.where((actual_total == 0) & (expected_total == 0), 1.0, f1)
+
+def token_counts(texts: pd.Series) -> pd.Series:
+    """Token counts indexed by (row, token)."""
+    tokens = texts.str.split().explode().dropna()
+    return tokens.groupby([tokens.index, tokens.to_numpy()]).size()
+
+def char_ngrams(texts: pd.Series, n: int = LEXICAL_NGRAM_SIZE):
+    """
+    Hashed character n-grams of each normalized, space-padded text, extracted without a Python loop
+    over texts: all texts are concatenated into one array of code points and every n-gram is a rolling
+    uint64 hash of n consecutive code points (collisions are negligible at 64 bits). Empty texts have none.
+
+    Returns:
+        tuple: (row of each n-gram, n-gram hashes) as NumPy arrays
+    """
+    padded = " " + normalize_text(texts) + " "
+    lengths = padded.str.len().to_numpy(dtype=np.int64)
+    counts = np.where(lengths > 2, np.maximum(lengths - n + 1, 0), 0)  # "  " = empty text
+    codes = np.frombuffer("".join(padded.tolist()).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    rows = np.repeat(np.arange(len(padded), dtype=np.int64), counts)
+    text_starts = np.cumsum(lengths) - lengths
+    gram_starts = np.cumsum(counts) - counts
+    positions = np.arange(counts.sum(), dtype=np.int64) - np.repeat(gram_starts - text_starts, counts)
+    hashes = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(n):
+        hashes = hashes * np.uint64(1_000_003) + codes[positions + offset]
+    return rows, hashes
+
+def tfidf_cosine(left: pd.Series, right: pd.Series, n: int = LEXICAL_NGRAM_SIZE) -> np.ndarray:
+    """
+    Row-wise cosine of the character n-gram TF-IDF vectors of left[i] and right[i].
+    Both sides form one corpus for the (smoothed) IDF. Each side is a sparse matrix in coordinate form:
+    sorted int64 keys row * vocabulary + n-gram id with their TF-IDF weights; the row dot products are
+    the weights of the keys both sides share, summed per row. NaN where the right text is empty.
+    """
+    rows = len(left)
+    (left_rows, left_hashes), (right_rows, right_hashes) = char_ngrams(left, n), char_ngrams(right, n)
+    vocabulary, ids = np.unique(np.concatenate([left_hashes, right_hashes]), return_inverse=True)
+    size = max(len(vocabulary), 1)
+
+    def term_frequencies(gram_rows, gram_ids):
+        keys, counts = np.unique(gram_rows * size + gram_ids, return_counts=True)
+        return keys, counts.astype(float)
+
+    left_keys, left_tf = term_frequencies(left_rows, ids[:len(left_hashes)])
+    right_keys, right_tf = term_frequencies(right_rows, ids[len(left_hashes):])
+    documents = np.bincount(left_keys % size, minlength=size) + np.bincount(right_keys % size, minlength=size)
+    idf = np.log((1 + 2 * rows) / (1 + documents)) + 1
+    left_w, right_w = left_tf * idf[left_keys % size], right_tf * idf[right_keys % size]
+
+    _, left_at, right_at = np.intersect1d(left_keys, right_keys, assume_unique=True, return_indices=True)
+    dot = np.bincount(left_keys[left_at] // size, weights=left_w[left_at] * right_w[right_at], minlength=rows)
+    left_norm = np.sqrt(np.bincount(left_keys // size, weights=left_w ** 2, minlength=rows))
+    right_norm = np.sqrt(np.bincount(right_keys // size, weights=right_w ** 2, minlength=rows))
+    cosine = np.divide(dot, left_norm * right_norm, out=np.zeros(rows), where=(left_norm * right_norm) > 0)
+    return np.where(right_norm > 0, np.clip(cosine, 0, 1), np.nan)
+
+def format_compliance(actual: pd.Series, reasoning: pd.Series) -> np.ndarray:
+    """1 when the answer is exactly one valid option letter and the model gave its reasoning."""
+    letter = actual.str.strip().str.upper().str.fullmatch(f"[{re.escape(MC_CHOICES)}]").fillna(False)
+    return (letter & (reasoning.str.strip().str.len() > 0)).to_numpy(dtype=float)
+
+def reasoning_texts(test_cases) -> pd.Series:
+    """The model's reasoning of each response (kept in additional_metadata by parse_test_case_line)."""
+    return pd.Series([(getattr(case, "additional_metadata", None) or {}).get("reasoning") or "" for case in test_cases], dtype="string")
+
+def correct_explanations(test_cases, expected: pd.Series) -> pd.Series:
+    """Dataset explanation of the correct option, taken from the response's context ("Explanation C: ...")."""
+    explanations = []
+    for case, answer in zip(test_cases, expected.str.strip().str.upper()):
+        prefix = f"EXPLANATION {answer}:"
+        match = next((item for item in getattr(case, "context", None) or [] if str(item).upper().startswith(prefix)), "")
+        explanations.append(str(match)[len(prefix):].strip())
+    return pd.Series(explanations, dtype="string")
@@ -0,0 +1,103 @@
+# Module to grade multiple-choice answers locally before falling back to the G-Eval judge
+import re
+import pandas as pd
+from typing import List, Dict, Any, Tuple
+
+from src.utils.config import load_config
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+LOCAL_GRADING_ENABLED = deepeval_config.get("local_grading", True)   # Grade unambiguous multiple-choice answers without a judge call
+MC_CHOICES = str(deepeval_config.get("mc_choices", "ABCD")).upper()   # Valid option letters of the dataset
+LOCAL_GRADER_NAME = "local-mc-grader"                                 # Reported as the evaluation model of locally graded cases
+
+# Answer patterns, most specific first. Each has one capture group holding the option letter.
+# Responses are already stripped and upper-cased by parse_test_case_line.
+_LETTERS = re.escape(MC_CHOICES)
+ANSWER_PATTERNS = [
+    ("letter", rf"^\(?([{_LETTERS}])\)?[.:]?$"),                                           # B | (B) | B. | B)
+    ("boxed", rf"^\$?\\BOXED\{{([{_LETTERS}])\}}\$?$"),                                      # $\boxed{B}$
+    ("answer_field", rf"^\{{?\s*\"?ANSWER\"?\s*[:=]\s*\"?([{_LETTERS}])\"?\s*\}}?$"),        # "answer": "B"
+    ("answer_phrase", rf"^(?:THE\s+)?(?:CORRECT\s+)?ANSWER\s*(?:IS)?\s*[:\-]?\s*(?:OPTION\s+)?\(?([{_LETTERS}])\)?[.:]?$"),  # The answer is B
+    ("option_phrase", rf"^OPTION\s+\(?([{_LETTERS}])\)?[.:]?$"),                            # Option B
+]
+NO_ANSWER_VALUES = ("", "UNKNOWN", "MISSING_RESPONSE", "NONE", "N/A")  # Responses where the model gave no answer at all
+
+# ========================= Local Grading Functions =========================
+
+def split_by_grading_path(test_cases) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+    """
+    Grade the test cases that can be decided without an LLM judge.
+
+    Returns:
+        tuple: ({index: case result} for locally graded cases, [indexes] that still need the judge)
+    """
+    if not test_cases:
+        return {}, []
+    if not LOCAL_GRADING_ENABLED:
+        return {}, list(range(len(test_cases)))
+
+    grades = extract_mc_answers(
+        pd.Series([case.actual_output for case in test_cases], dtype="string"),
+        pd.Series([case.expected_output for case in test_cases], dtype="string"),
+    )
+
+    local_results = {}
+    for index, row in grades[grades["decided"]].iterrows():
+        local_results[index] = build_local_result(row)
+    judge_indexes = grades.index[~grades["decided"]].tolist()
+    return local_results, judge_indexes
+
+def extract_mc_answers(actual: pd.Series, expected: pd.Series) -> pd.DataFrame:
+    """
+    Extract the chosen option letter from every response with vectorized regexes.
+
+    A case is 'decided' when the expected output is a single option letter and the response either
+    matches one answer pattern or contains no answer at all. Everything else is left to the judge.
+    """
+    actual = actual.fillna("").str.strip().str.upper()
+    expected = expected.fillna("").str.strip().str.upper()
+    grades = pd.DataFrame({"actual": actual, "expected": expected})
+
+    grades["choice"] = pd.Series(pd.NA, index=actual.index, dtype="string")
+    grades["pattern"] = pd.Series(pd.NA, index=actual.index, dtype="string")
+    for name, pattern in ANSWER_PATTERNS:
+        found = actual.str.extract(pattern, expand=False)
+        new = grades["choice"].isna() & found.notna()
+        grades.loc[new, "choice"] = found[new]
+        grades.loc[new, "pattern"] = name
+
+    no_answer = actual.isin(NO_ANSWER_VALUES)
+    grades.loc[no_answer, "pattern"] = "no_answer"
+
+    is_mc = expected.str.fullmatch(f"[{_LETTERS}]").fillna(False)
+    grades["decided"] = is_mc & (grades["choice"].notna() | no_answer)
+    grades["success"] = grades["decided"] & (grades["choice"] == expected).fillna(False)
+    return grades
+
+def build_local_result(row) -> Dict[str, Any]:
+    """Build the metricsData entry of a locally graded case (same shape as a judge result)."""
+    if row["pattern"] == "no_answer":
+        reason = f"No answer option found in the response; expected '{row['expected']}'."
+    elif row["success"]:
+        reason = f"Chosen option '{row['choice']}' ({row['pattern']}) matches the expected answer."
+    else:
+        reason = f"Chosen option '{row['choice']}' ({row['pattern']}) does not match the expected answer '{row['expected']}'."
+
+    return {
+        "metricsData": [{
+            "name": "Correctness (Local)",
+            "threshold": 1.0,
+            "success": bool(row["success"]),
+            "score": 1.0 if row["success"] else 0.0,
+            "reason": reason,
+            "strictMode": True,
+            "evaluationModel": LOCAL_GRADER_NAME,
+            "evaluationCost": 0,
+            "error": None,
+        }],
+        "runDuration": 0,
+        "gradingMethod": "local",
+    }
@@ -0,0 +1,89 @@
+# Module with the registry of quality metrics that can be selected for a DeepEval assessment
+from typing import Dict, Any, List, Tuple
+from deepeval.test_case import LLMTestCaseParams
+
+# ========================= Metric Registry =========================
+
+# Metrics keyed by the names offered in 'selected_metrics'.
+# kind "geval": judged by the LLM judge. 'evaluation_params' are the test case fields the judge sees;
+#   'local_grading' marks the metric whose unambiguous multiple-choice answers are graded without the
+#   judge (deepeval_local_grading).
+# kind "lexical": computed locally in batch (deepeval_lexical_metrics); the case passes at score >= 'threshold'.
+METRIC_REGISTRY: Dict[str, Dict[str, Any]] = {
+    "correctness": {
+        "name": "Correctness",
+        "kind": "geval",
+        "criteria": "Determine if actual output matches expected output exactly.",
+        "evaluation_params": [LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
+        "local_grading": True,
+    },
+    "relevance": {
+        "name": "Relevance",
+        "kind": "geval",
+        "criteria": "Determine whether the actual output answers the question asked in the input, without unrelated content.",
+        "evaluation_params": [LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT],
+    },
+    "coherence": {
+        "name": "Coherence",
+        "kind": "geval",
+        "criteria": "Determine whether the actual output is clear, well-formed and consistent, without contradicting itself.",
+        "evaluation_params": [LLMTestCaseParams.ACTUAL_OUTPUT],
+    },
+    "robustness": {
+        "name": "Robustness",
+        "kind": "geval",
+        "criteria": "Determine whether the actual output commits to the expected answer in an unambiguous form, without hedging between several options or adding conflicting answers.",
+        "evaluation_params": [LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT, LLMTestCaseParams.EXPECTED_OUTPUT],
+    },
+    "exact_match": {
+        "name": "Exact Match",
+        "kind": "lexical",
+        "description": "Normalized response equals the correct answer (case, punctuation and whitespace ignored)",
+        "threshold": 1.0,
+    },
+    "token_f1": {
+        "name": "Token F1",
+        "kind": "lexical",
+        "description": "F1 of the word tokens shared by the response and the correct answer",
+        "threshold": 0.5,
+    },
+    "answer_similarity": {
+        "name": "Answer Similarity",
+        "kind": "lexical",
+        "description": "Character n-gram TF-IDF cosine of the response and the correct answer",
+        "threshold": 0.5,
+    },
+    "explanation_similarity": {
+        "name": "Explanation Similarity",
+        "kind": "lexical",
+        "description": "Character n-gram TF-IDF cosine of the model's reasoning and the dataset explanation of the correct option",
+        "threshold": 0.3,
+    },
+    "format_compliance": {
+        "name": "Format Compliance",
+        "kind": "lexical",
+        "description": "The answer is a single valid option letter and the reasoning is not empty",
+        "threshold": 1.0,
+    },
+}
+
+def resolve_metrics(selected_metrics: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split the selected metric keys into (registered metrics in selection order, unknown metrics).
+    Duplicates are dropped; assessments fall back to correctness when nothing registered is selected.
+    """
+    supported, unsupported = [], []
+    for key in selected_metrics or []:
+        target = supported if key in METRIC_REGISTRY else unsupported
+        if key not in target:
+            target.append(key)
+    return supported, unsupported
+
+def split_by_kind(metric_keys: List[str]) -> Tuple[List[str], List[str]]:
+    """Split metric keys into (judge metrics, local lexical metrics), keeping their order."""
+    judge = [key for key in metric_keys if METRIC_REGISTRY[key]["kind"] == "geval"]
+    return judge, [key for key in metric_keys if key not in judge]
+
+def metric_fields(metric_key: str) -> List[str]:
+    """LLMTestCase attribute names the judge sees for a metric (e.g. ["input", "actual_output"])."""
+    return [param.value for param in METRIC_REGISTRY[metric_key]["evaluation_params"]]
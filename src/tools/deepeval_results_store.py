@@ -0,0 +1,359 @@
+# Module to stream large DeepEval result files into a compact on-disk columnar store
+import os
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Any, Iterator, List
+
+from src.utils.config import load_config
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+STORE_ROW_GROUP_SIZE = deepeval_config.get("results_store_row_group", 5000)   # Cases per Parquet row group (unit of paged reads)
+PARSER_CHUNK_SIZE = 1 << 20                                                     # Bytes read per step by the streaming parser
+SCORE_BINS = [0, 0.2, 0.4, 0.6, 0.8, 1.0]                                       # Score chart bins; the last bin includes 1.0
+
+# Column types of the results store, one row per test case
+RESULTS_SCHEMA = pa.schema([
+    ("case_number", pa.int32()),
+    ("input", pa.string()),
+    ("expected_output", pa.string()),
+    ("actual_output", pa.string()),
+    ("success", pa.bool_()),
+    ("score", pa.float64()),       # Mean of the case's metric scores
+    ("reasoning", pa.string()),
+    ("graded_by", pa.dictionary(pa.int8(), pa.string())),
+    ("duration", pa.float64()),
+    ("cost", pa.float64()),
+    ("question_number", pa.string()),
+    ("sample_timestamp", pa.float64()),
+    ("sample_weight", pa.float64()),
+])
+
+# Column types of the per-metric results store, one row per test case and metric
+METRIC_RESULTS_SCHEMA = pa.schema([
+    ("case_number", pa.int32()),
+    ("metric", pa.dictionary(pa.int8(), pa.string())),
+    ("success", pa.bool_()),
+    ("score", pa.float64()),
+    ("reason", pa.string()),
+    ("evaluation_model", pa.dictionary(pa.int8(), pa.string())),
+    ("cost", pa.float64()),
+    ("error", pa.string()),
+])
+
+# ========================= Streaming JSON Parser =========================
+
+class _JsonStream:
+    """Minimal pull parser: walks objects/arrays structurally and decodes leaf values with raw_decode."""
+    def __init__(self, file, chunk_size: int = PARSER_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        data = self.file.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expected '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete value, reading more of the file until it fits in the buffer."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:  # A number at the buffer end may continue in the next chunk
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def object_keys(self) -> Iterator[str]:
+        """Iterate the keys of the object at the cursor; the caller consumes each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def array_items(self) -> Iterator[Any]:
+        """Decode the items of the array at the cursor one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+def iter_test_cases(path: str, run_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the entries of testRunData.testCases of a .latest_test_run.json one at a time.
+    The other testRunData fields (testPassed, runDuration, gradingSummary, ...) are stored in 'run_data';
+    fields written after testCases are only available once the iterator is exhausted.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        stream = _JsonStream(file)
+        for key in stream.object_keys():
+            if key != "testRunData":
+                stream.value()
+                continue
+            for field in stream.object_keys():
+                if field == "testCases":
+                    yield from stream.array_items()
+                else:
+                    run_data[field] = stream.value()
+
+# ========================= Columnar Results Store =========================
+
+def build_results_frame(test_cases: List[Dict[str, Any]], first_case_number: int = 1) -> pd.DataFrame:
+    """
+    Build one typed row per test case. 'score' is the mean of the scores of all its metrics (like 'success'
+    covers all of them) and 'reasoning' joins their reasons, prefixed by the metric name when there are several.
+    Columns follow RESULTS_SCHEMA; question_number, sample_timestamp and sample_weight come from additionalMetadata.
+    """
+    metrics_data = [case.get('metricsData') or [] for case in test_cases]
+    metadata = [case.get('additionalMetadata') or {} for case in test_cases]
+
+    def numeric(values, default=np.nan):
+        return pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").fillna(default).astype("float64")
+
+    return pd.DataFrame({
+        'case_number': pd.Series(range(first_case_number, first_case_number + len(test_cases)), dtype="int32"),
+        'input': pd.Series([case.get('input', '') for case in test_cases], dtype="string"),
+        'expected_output': pd.Series([case.get('expectedOutput', '') for case in test_cases], dtype="string"),
+        'actual_output': pd.Series([case.get('actualOutput', '') for case in test_cases], dtype="string"),
+        'success': pd.Series([bool(case.get('success', False)) for case in test_cases], dtype="bool"),
+        'score': numeric([_mean_score(metrics) for metrics in metrics_data]),
+        'reasoning': pd.Series([_combined_reason(metrics) for metrics in metrics_data], dtype="string"),
+        'graded_by': pd.Series([case.get('gradingMethod', 'judge') for case in test_cases], dtype="category"),
+        'duration': numeric([case.get('runDuration', 0) for case in test_cases], 0),
+        'cost': numeric([case.get('evaluationCost', 0) for case in test_cases], 0),
+        'question_number': pd.Series([None if meta.get('question_number') is None else str(meta['question_number']) for meta in metadata], dtype="string"),
+        'sample_timestamp': numeric([meta.get('sample_timestamp') for meta in metadata]),
+        'sample_weight': numeric([meta.get('sample_weight') for meta in metadata], 1.0),
+    })
+
+def _mean_score(metrics: List[Dict[str, Any]]):
+    scores = [float(metric['score']) for metric in metrics if isinstance(metric.get('score'), (int, float))]
+    return sum(scores) / len(scores) if scores else None
+
+def _combined_reason(metrics: List[Dict[str, Any]]) -> str:
+    if len(metrics) <= 1:
+        return (metrics[0].get('reason') if metrics else None) or 'No reason provided'
+    return " | ".join(f"{metric.get('name') or 'Unknown'}: {metric.get('reason') or 'No reason provided'}" for metric in metrics)
+
+def build_metric_frame(test_cases: List[Dict[str, Any]], first_case_number: int = 1) -> pd.DataFrame:
+    """
+    Build one typed row per test case and metric (METRIC_RESULTS_SCHEMA). The metric column drops the
+    grading suffix of the metricsData name ("Correctness [GEval]", "Correctness (Local)" -> "Correctness"),
+    so locally graded, cached and judged verdicts of a metric are reported together.
+    """
+    rows = [
+        (case_number, metric)
+        for case_number, case in enumerate(test_cases, first_case_number)
+        for metric in case.get('metricsData') or []
+    ]
+    metrics = [metric for _, metric in rows]
+    return pd.DataFrame({
+        'case_number': pd.Series([case_number for case_number, _ in rows], dtype="int32"),
+        'metric': pd.Series([metric.get('name') or 'Unknown' for metric in metrics], dtype="string").str.replace(r"\s*[\[(].*$", "", regex=True).astype("category"),
+        'success': pd.Series([bool(metric.get('success', False)) for metric in metrics], dtype="bool"),
+        'score': pd.to_numeric(pd.Series([metric.get('score') for metric in metrics], dtype="object"), errors="coerce").astype("float64"),
+        'reason': pd.Series([metric.get('reason') for metric in metrics], dtype="string"),
+        'evaluation_model': pd.Series([metric.get('evaluationModel') for metric in metrics], dtype="object").astype("category"),
+        'cost': pd.to_numeric(pd.Series([metric.get('evaluationCost') for metric in metrics], dtype="object"), errors="coerce").fillna(0).astype("float64"),
+        'error': pd.Series([metric.get('error') for metric in metrics], dtype="string"),
+    })
+
+class ResultsAggregates:
+    """Running aggregates over the results frame chunks, so the analysis never needs all cases in memory."""
+    def __init__(self):
+        self.cases = 0
+        self.failures = 0
+        self.score_count = 0
+        self.score_sum = 0.0
+        self.score_sum_sq = 0.0
+        self.score_min = np.inf
+        self.score_max = -np.inf
+        self.histogram = np.zeros(len(SCORE_BINS) - 1, dtype=np.int64)
+        self.bands = {'excellent': 0, 'good': 0, 'fair': 0, 'poor': 0}
+        self.metrics = pd.DataFrame(columns=['cases', 'passed', 'errors', 'score_count', 'score_sum', 'score_sum_sq', 'cost'], dtype="float64")
+
+    def add(self, frame: pd.DataFrame):
+        self.cases += len(frame)
+        self.failures += int((~frame['success']).sum())
+        scores = frame['score'].dropna().to_numpy()
+        if len(scores):
+            self.score_count += len(scores)
+            self.score_sum += float(scores.sum())
+            self.score_sum_sq += float(np.square(scores).sum())
+            self.score_min = min(self.score_min, float(scores.min()))
+            self.score_max = max(self.score_max, float(scores.max()))
+            self.histogram += np.histogram(scores, bins=SCORE_BINS)[0]
+        banded = frame['score'].fillna(0)
+        self.bands['excellent'] += int((banded >= 0.9).sum())
+        self.bands['good'] += int(banded.between(0.7, 0.9, inclusive="left").sum())
+        self.bands['fair'] += int(banded.between(0.5, 0.7, inclusive="left").sum())
+        self.bands['poor'] += int((banded < 0.5).sum())
+
+    def add_metrics(self, metric_frame: pd.DataFrame):
+        """Accumulate per-metric counts and score sums of a per-metric results chunk."""
+        if metric_frame.empty:
+            return
+        scores = metric_frame['score']
+        chunk = pd.DataFrame({
+            'metric': metric_frame['metric'].astype(str),
+            'cases': 1.0,
+            'passed': metric_frame['success'].astype(float),
+            'errors': metric_frame['error'].notna().astype(float),
+            'score_count': scores.notna().astype(float),
+            'score_sum': scores.fillna(0),
+            'score_sum_sq': scores.fillna(0) ** 2,
+            'cost': metric_frame['cost'],
+        }).groupby('metric', sort=False).sum()
+        self.metrics = chunk if self.metrics.empty else self.metrics.add(chunk, fill_value=0)
+
+    def metric_summary(self) -> List[Dict[str, Any]]:
+        """One record per metric: cases, passed, errors, pass_rate (%), mean_score, score_std, cost."""
+        summary = []
+        for metric, row in self.metrics.iterrows():
+            mean = row['score_sum'] / row['score_count'] if row['score_count'] else 0.0
+            variance = row['score_sum_sq'] / row['score_count'] - mean ** 2 if row['score_count'] else 0.0
+            summary.append({
+                'metric': metric,
+                'cases': int(row['cases']),
+                'passed': int(row['passed']),
+                'errors': int(row['errors']),
+                'pass_rate': float(row['passed'] / row['cases'] * 100) if row['cases'] else 0.0,
+                'mean_score': float(mean),
+                'score_std': float(np.sqrt(max(variance, 0.0))),
+                'cost': float(row['cost']),
+            })
+        return summary
+
+    @property
+    def score_mean(self) -> float:
+        return self.score_sum / self.score_count if self.score_count else 0
+
+    @property
+    def score_std(self) -> float:
+        """Population standard deviation of the scores."""
+        if not self.score_count:
+            return 0
+        return float(np.sqrt(max(self.score_sum_sq / self.score_count - self.score_mean ** 2, 0.0)))
+
+class ResultsStore:
+    """
+    Handle on a Parquet file holding one row per test case (RESULTS_SCHEMA), or one row per test case
+    and metric (METRIC_RESULTS_SCHEMA). Only the path and row count are kept, so it is cheap to hold in
+    session state; pages and column subsets are read from disk on demand, touching only the row groups they need.
+    """
+    def __init__(self, path: str, schema: pa.Schema = RESULTS_SCHEMA):
+        self.path = path
+        self.schema = schema
+        self.num_rows = pq.ParquetFile(path).metadata.num_rows if os.path.exists(path) else 0
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def read_rows(self, start: int, stop: int) -> pd.DataFrame:
+        """Rows [start, stop) as a DataFrame, reading only the overlapping row groups."""
+        parquet_file = pq.ParquetFile(self.path)
+        groups, first_row, offset = [], None, 0
+        for index in range(parquet_file.num_row_groups):
+            rows = parquet_file.metadata.row_group(index).num_rows
+            if offset < stop and offset + rows > start:
+                groups.append(index)
+                first_row = offset if first_row is None else first_row
+            offset += rows
+        if not groups:
+            return pd.DataFrame(columns=self.schema.names)
+        frame = parquet_file.read_row_groups(groups).to_pandas()
+        return frame.iloc[start - first_row:stop - first_row].reset_index(drop=True)
+
+    def read_columns(self, columns: List[str]) -> pd.DataFrame:
+        """Selected columns of all rows (cheap for the numeric/boolean columns)."""
+        return pq.read_table(self.path, columns=columns).to_pandas()
+
+    def read_cases(self, first: int, last: int) -> pd.DataFrame:
+        """Rows of case numbers first..last; row groups outside the range are skipped by their statistics."""
+        if not self.num_rows:
+            return pd.DataFrame(columns=self.schema.names)
+        return pq.read_table(self.path, filters=[("case_number", ">=", first), ("case_number", "<=", last)]).to_pandas()
+
+def write_results_store(deepeval_output_file: str, store_file: str, metric_store_file: str,
+                        row_group_size: int = STORE_ROW_GROUP_SIZE) -> tuple:
+    """
+    Stream the test cases of 'deepeval_output_file' into a Parquet store with one row per case and a
+    per-metric store with one row per case and metric, one row group per chunk in both.
+
+    Returns:
+        tuple: (ResultsStore, per-metric ResultsStore, ResultsAggregates, run_data without testCases)
+    """
+    run_data = {}
+    aggregates = ResultsAggregates()
+    os.makedirs(os.path.dirname(store_file) or ".", exist_ok=True)
+    temp_file, metric_temp_file = store_file + ".tmp", metric_store_file + ".tmp"
+    chunk = []
+
+    with pq.ParquetWriter(temp_file, RESULTS_SCHEMA) as writer, pq.ParquetWriter(metric_temp_file, METRIC_RESULTS_SCHEMA) as metric_writer:
+        def flush():
+            frame = build_results_frame(chunk, first_case_number=aggregates.cases + 1)
+            metric_frame = build_metric_frame(chunk, first_case_number=aggregates.cases + 1)
+            aggregates.add(frame)
+            aggregates.add_metrics(metric_frame)
+            writer.write_table(pa.Table.from_pandas(frame, schema=RESULTS_SCHEMA, preserve_index=False))
+            metric_writer.write_table(pa.Table.from_pandas(metric_frame, schema=METRIC_RESULTS_SCHEMA, preserve_index=False))
+            chunk.clear()
+
+        for case in iter_test_cases(deepeval_output_file, run_data):
+            chunk.append(case)
+            if len(chunk) >= row_group_size:
+                flush()
+        if chunk:
+            flush()
+
+    os.replace(temp_file, store_file)
+    os.replace(metric_temp_file, metric_store_file)
+    return ResultsStore(store_file), ResultsStore(metric_store_file, METRIC_RESULTS_SCHEMA), aggregates, run_data
@@ -0,0 +1,119 @@
+# Module to assess a stratified random sample of the LLM responses of very large runs
+import math
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+from typing import Dict, Any, Tuple
+
+from src.utils.config import load_config
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+SAMPLING_MARGIN = deepeval_config.get("sampling_margin", 0.03)              # Target half-width of the pass rate CI (0.03 = ±3 pp)
+SAMPLING_CONFIDENCE = deepeval_config.get("sampling_confidence", 0.95)      # Confidence level of the pass rate CI
+SAMPLING_WINDOW_SECONDS = deepeval_config.get("sampling_window_seconds", 60)  # Time window width of the strata
+SAMPLING_SEED = deepeval_config.get("sampling_seed", 42)                     # Same seed -> same sampling order, so refinements reuse judged cases
+
+# ========================= Sampling Functions =========================
+
+def required_sample_size(population: int, margin: float = SAMPLING_MARGIN, confidence: float = SAMPLING_CONFIDENCE) -> int:
+    """
+    Cases needed for a pass rate CI of ±margin at the worst case p = 0.5, with finite population correction.
+    Grows with the precision (1 / margin²), not with the run length: ±3 pp at 95% needs ~1,050 cases for 50k responses.
+    """
+    if population <= 0:
+        return 0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    n0 = z ** 2 * 0.25 / margin ** 2
+    return min(population, math.ceil(n0 / (1 + (n0 - 1) / population)))
+
+def stratum_keys(metadata: pd.DataFrame) -> pd.Series:
+    """Stratum of each response: question_number x time window of the sample timestamp."""
+    questions = metadata["question_number"].astype("object").astype(str)
+    timestamps = pd.to_numeric(metadata["sample_timestamp"], errors="coerce")
+    windows = ((timestamps - timestamps.min()) // (SAMPLING_WINDOW_SECONDS * 1000)).fillna(-1).astype(int)
+    return questions + "@" + windows.astype(str)
+
+def sampling_order(strata: pd.Series, seed: int = SAMPLING_SEED) -> np.ndarray:
+    """
+    Order in which cases enter the sample. Cases are shuffled within each stratum and each gets the key
+    (rank + offset) / stratum size, with one random offset per stratum; sorting by that key interleaves
+    the strata so that every prefix of the order is a proportionally allocated stratified sample.
+    Prefixes are nested, so a larger sample always contains the smaller one.
+    """
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({"stratum": strata.to_numpy(), "priority": rng.random(len(strata))})
+    frame["rank"] = frame.groupby("stratum")["priority"].rank(method="first") - 1
+    frame["size"] = frame.groupby("stratum")["stratum"].transform("size")
+    offsets = frame["stratum"].map(dict(zip(frame["stratum"].unique(), rng.random(frame["stratum"].nunique()))))
+    frame["key"] = (frame["rank"] + offsets) / frame["size"]
+    return frame.sort_values(["key", "priority"], kind="mergesort").index.to_numpy()
+
+def plan_stratified_sample(metadata: pd.DataFrame, margin: float = SAMPLING_MARGIN,
+                           confidence: float = SAMPLING_CONFIDENCE) -> Tuple[Dict[int, Dict[str, Any]], Dict[str, Any]]:
+    """
+    Select the sample needed for ±margin from the responses' metadata alone (line_number, question_number,
+    sample_timestamp; one row per valid response line), so the responses themselves can be streamed afterwards.
+
+    Returns:
+        tuple: ({line_number: metadata to attach (stratum, stratum weight N_h / n_h)}, sampling plan stored with the test run)
+    """
+    metadata = metadata.reset_index(drop=True)
+    population = len(metadata)
+    sample_size = required_sample_size(population, margin, confidence)
+    strata = stratum_keys(metadata) if population else pd.Series([], dtype="object")
+    chosen = sampling_order(strata)[:sample_size]
+
+    stratum_sizes = strata.value_counts()
+    sampled_sizes = strata.iloc[chosen].value_counts()
+    selection = {}
+    for index in chosen:
+        stratum = strata.iloc[index]
+        selection[int(metadata["line_number"].iloc[index])] = {
+            "stratum": stratum,
+            "sample_weight": float(stratum_sizes[stratum] / sampled_sizes[stratum]),
+        }
+
+    plan = {
+        "population": population,
+        "sampleSize": len(selection),
+        "strata": int(stratum_sizes.size),
+        "sampledStrata": int(sampled_sizes.size),
+        "targetMargin": margin,
+        "confidence": confidence,
+        "seed": SAMPLING_SEED,
+    }
+    return selection, plan
+
+def estimate_pass_rate(results: pd.DataFrame, plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Weighted pass rate of the judged sample with a Wilson interval on the Kish effective sample size,
+    corrected for the finite population. 'results' holds the success and sample_weight columns of the results store.
+    """
+    n = len(results)
+    if not n:
+        return {}
+    weights = results["sample_weight"].fillna(1.0).to_numpy(dtype=float)
+    passed = results["success"].to_numpy(dtype=float)
+
+    p = float(np.sum(weights * passed) / np.sum(weights))
+    n_eff = float(np.sum(weights) ** 2 / np.sum(weights ** 2))
+    population = max(plan.get("population", n), n)
+    fpc = (population - n) / (population - 1) if population > 1 else 0.0
+
+    z = NormalDist().inv_cdf(0.5 + plan.get("confidence", SAMPLING_CONFIDENCE) / 2)
+    z2 = z ** 2 * fpc
+    denominator = 1 + z2 / n_eff
+    center = (p + z2 / (2 * n_eff)) / denominator
+    half_width = math.sqrt(z2 * (p * (1 - p) / n_eff + z2 / (4 * n_eff ** 2))) / denominator
+    return {
+        **plan,
+        "judged": n,
+        "effective_sample_size": n_eff,
+        "pass_rate": p * 100,
+        "ci_low": max(0.0, center - half_width) * 100,
+        "ci_high": min(1.0, center + half_width) * 100,
+        "margin": half_width * 100,
+    }
@@ -0,0 +1,248 @@
+# Module to evaluate LLM responses with DeepEval while the JMeter load test is still running
+import time
+import json
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+from src.utils.file_tail import FileTailer
+from src.utils.profiler import profile_node, stage_timer, record_rows
+from src.tools.deepeval_executor import JudgeExecutor, AIMDLimiter
+from src.tools.deepeval_assessment import (
+    parse_test_case_line,
+    grade_test_cases,
+    TestRunWriter,
+    rename_deepeval_output_with_timestamp,
+    make_assessment_id,
+    get_assessment_paths,
+    backup_previous_output,
+    claim_assessment,
+    release_assessment,
+)
+from src.tools.deepeval_checkpoint import CheckpointStore, CHECKPOINTS_ENABLED
+
+# Load configurations
+config = load_config()
+deepeval_config = config.get("deepeval", {})
+
+STREAM_BATCH_SIZE = deepeval_config.get("streaming_batch_size", 20)            # Responses judged per micro-batch
+STREAM_BATCH_MAX_WAIT = deepeval_config.get("streaming_batch_max_wait", 30)    # Seconds before a partial batch is judged anyway
+STREAM_POLL_INTERVAL = deepeval_config.get("streaming_poll_interval", 2)       # Seconds between reads of the responses file
+STREAM_MAX_CONCURRENCY = deepeval_config.get("streaming_max_concurrency", 2)   # In-flight judge calls during the load test
+STREAM_BATCH_PAUSE = deepeval_config.get("streaming_batch_pause", 1.0)         # Seconds between micro-batches (keeps the judge off a shared Ollama host)
+
+class StreamingJudge:
+    """
+    Tails the _llm_responses.json file(s) of a running load test and judges complete records in
+    micro-batches on a background thread. Judge concurrency is capped low and batches are paced
+    so judging does not compete with the system under test; when the test ends only the last
+    batch remains. Progress and logs go to the DeepEval thread data.
+    Once the run timestamp is known (start_run) each judged batch is appended to the assessment's
+    .latest_test_run.json and checkpoint, so only the totals and the pending responses stay in memory.
+    """
+    def __init__(self, shared_data: Dict[str, Any], batch_size: int = STREAM_BATCH_SIZE,
+                 max_concurrency: int = STREAM_MAX_CONCURRENCY):
+        self.shared_data = shared_data
+        self.batch_size = max(1, batch_size)
+        self.executor = JudgeExecutor(shared_data, limiter=AIMDLimiter(initial=1, maximum=max_concurrency))
+        self.invalid_lines = 0
+        self.judge_errors = 0
+        self.judge_seconds = 0.0
+        self.error: Optional[str] = None     # Why the assessment could not start (see start_run)
+        self._paths_claimed: Optional[Dict[str, str]] = None
+        self._writer: Optional[TestRunWriter] = None
+        self._checkpoint: Optional[CheckpointStore] = None
+        self._pending = []
+        self._pending_since: Optional[float] = None
+        self._paths = deque()
+        self._tailer: Optional[FileTailer] = None
+        self._lock = threading.Lock()
+        self._finish_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start_run(self, run_timestamp: str):
+        """
+        Claim the assessment of 'run_timestamp' and open its result files. Called when the load test
+        has its run timestamp, before the first responses file is followed.
+        """
+        if self._writer is not None or self.error:
+            return
+        shared_data = self.shared_data
+        shared_data['run_timestamp'] = run_timestamp
+        shared_data['logs'].set_run(run_timestamp)
+        assessment_id = shared_data.get('assessment_id') or make_assessment_id(shared_data.get('selected_metrics', []))
+        paths = get_assessment_paths(run_timestamp, assessment_id)
+        shared_data['assessment_paths'] = paths
+        if not claim_assessment(paths['assessment_dir']):
+            self.error = f"Assessment '{assessment_id}' of run {run_timestamp} is already running."
+            shared_data['stop_requested'] = True
+            thread_safe_add_log(shared_data['logs'], f"⚠️ {self.error}", agent_name="DeepEvalAgent")
+            return
+        self._paths_claimed = paths
+        backup_previous_output(shared_data)
+        self._writer = TestRunWriter(paths['latest_test_run_file'])
+        self._checkpoint = CheckpointStore(paths['checkpoint_file']) if CHECKPOINTS_ENABLED else None
+
+    def follow(self, path: str):
+        """Tail 'path' next. Called before each JMeter process starts (once per load profile stage)."""
+        with self._lock:
+            self._paths.append(path)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            thread_safe_add_log(self.shared_data['logs'], f"📡 Streaming DeepEval started: micro-batches of {self.batch_size}, up to {self.executor.limiter.maximum} concurrent judge calls.", agent_name="DeepEvalAgent")
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        Read the rest of the responses, judge the last batch and move .latest_test_run.json into place.
+        Returns its testRunData totals, or None when no response was judged.
+        """
+        self._finish_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        elif self._writer is not None:
+            self._run()
+        try:
+            if self._writer is None or not self._writer.cases:
+                return None
+            run_data = self._writer.close(self.judge_seconds)
+            if self._checkpoint and not self.judge_errors:
+                self._checkpoint.remove()
+            return run_data
+        finally:
+            self._release()
+
+    def drain(self):
+        """
+        Read the followed responses files to the end now. Called once JMeter has finished and before
+        the files may be deleted (load profile stages), so their last lines are judged by finish().
+        """
+        self._read(final=True)
+
+    def cancel(self):
+        """Stop judging without waiting for the pending responses."""
+        self.shared_data['stop_requested'] = True
+        self._finish_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._release()
+
+    def _release(self):
+        """Discard an unclosed .latest_test_run.json and release the assessment (the checkpoint stays for a resume)."""
+        if self._writer is not None:
+            self._writer.__exit__(None, None, None)
+        if self._paths_claimed is not None:
+            release_assessment(self._paths_claimed['assessment_dir'])
+            self._paths_claimed = None
+
+    # --- Background loop ---------------------------------------------------
+    def _run(self):
+        while True:
+            finishing = self._finish_event.is_set()
+            try:
+                self._read(final=finishing)
+                while self._pending and not self.shared_data.get('stop_requested') and (finishing or self._batch_ready()):
+                    self._judge_batch()
+                    if not finishing:
+                        time.sleep(STREAM_BATCH_PAUSE)
+            except Exception as e:
+                thread_safe_add_log(self.shared_data['logs'], f"⚠️ Streaming DeepEval error: {e}", agent_name="DeepEvalAgent")
+            if finishing or self.shared_data.get('stop_requested'):
+                return
+            self._finish_event.wait(STREAM_POLL_INTERVAL)
+
+    def _read(self, final: bool):
+        """Ingest new complete lines; move on to the next file once a newer one is followed."""
+        with self._lock:  # Also taken by drain() from the load test thread
+            while self._paths:
+                if self._tailer is not None:
+                    self._ingest(self._tailer.read_final_lines())  # The previous stage has finished writing
+                self._tailer = FileTailer(self._paths.popleft())
+            if self._tailer is not None:
+                self._ingest(self._tailer.read_final_lines() if final else self._tailer.read_new_lines())
+
+    def _ingest(self, lines: List[str]):
+        for line in lines:
+            try:
+                self._pending.append(parse_test_case_line(line))
+            except json.JSONDecodeError:
+                self.invalid_lines += 1
+        if self._pending and self._pending_since is None:
+            self._pending_since = time.time()
+
+    def _batch_ready(self) -> bool:
+        return len(self._pending) >= self.batch_size or time.time() - self._pending_since >= STREAM_BATCH_MAX_WAIT
+
+    def _judge_batch(self):
+        with self._lock:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self._pending_since = time.time() if self._pending else None
+
+        writer = self._writer
+        start_time = time.perf_counter()
+        try:
+            results = grade_test_cases(batch, self.shared_data, executor=self.executor, publish_progress=False,
+                                       checkpoint=self._checkpoint, index_offset=writer.cases)
+        except Exception as e:
+            # Keep the cases so the report still accounts for them (as judge errors)
+            results = [{"error": f"{type(e).__name__}: {e}", "gradingMethod": "judge"} for _ in batch]
+        self.judge_seconds += time.perf_counter() - start_time
+
+        writer.write(batch, results)
+        self.judge_errors += sum(1 for result in results if result.get("error"))
+        received = writer.cases + len(self._pending)
+        self.shared_data['current_test_case'] = writer.cases
+        self.shared_data['progress'] = int(writer.cases / received * 100) if received else 100
+        thread_safe_add_log(self.shared_data['logs'], f"📡 Judged micro-batch of {len(batch)}: {writer.cases} cases so far, {writer.passed} passed.", agent_name="DeepEvalAgent")
+
+# ========================= Framework Node Functions =========================
+
+@profile_node("streaming_deepeval_assessment")
+def finalize_streaming_assessment_node(shared_data, state_snapshot):
+    """
+    Judge the last micro-batch of a streaming assessment and move its results into place like
+    run_deepeval_assessment_node does, so analyze_deepeval_results_node can follow.
+
+    Args:
+        shared_data: DeepEval thread data holding the 'streaming_judge' and 'run_timestamp'
+        state_snapshot: Copy of session state at execution time
+
+    Returns:
+        dict: Results structure with success status, file paths, and metadata
+    """
+    judge = shared_data['streaming_judge']
+    run_timestamp = shared_data['run_timestamp']
+    if judge.error:
+        judge.cancel()
+        return {'success': False, 'error': judge.error}
+
+    try:
+        with stage_timer("last_batch"):
+            run_data = judge.finish()
+        record_rows(run_data['testCount'] if run_data else 0)
+        if judge.invalid_lines:
+            thread_safe_add_log(shared_data['logs'], f"⚠️ Skipped {judge.invalid_lines} invalid response lines.", agent_name="DeepEvalAgent")
+        if not run_data:
+            return {'success': False, 'error': "No LLM responses were recorded during the load test."}
+
+        with stage_timer("rename_output"):
+            deepeval_output_file = rename_deepeval_output_with_timestamp(run_timestamp, shared_data)
+        shared_data['progress'] = 100
+        thread_safe_add_log(shared_data['logs'], f"✅ Streaming DeepEval assessment completed: {run_data['testCount']} cases.", agent_name="DeepEvalAgent")
+        if judge.judge_errors and CHECKPOINTS_ENABLED:
+            thread_safe_add_log(shared_data['logs'], f"♻️ Checkpoint kept: run the assessment again to retry the {judge.judge_errors} cases with judge errors.", agent_name="DeepEvalAgent")
+
+        return {
+            'success': True,
+            'test_cases_count': run_data['testCount'],
+            'deepeval_output_file': deepeval_output_file,
+            'assessment_dir': shared_data['assessment_paths']['assessment_dir'],
+            'run_timestamp': run_timestamp,
+            'selected_metrics': shared_data.get('selected_metrics', []),
+        }
+    except Exception as e:
+        thread_safe_add_log(shared_data['logs'], f"❌ Streaming DeepEval assessment failed: {str(e)}", agent_name="DeepEvalAgent")
+        judge.cancel()
+        return {'success': False, 'error': str(e)}
@@ -10,12 +10,16 @@ from datetime import datetime
 from src.utils.config import load_config
 from src.utils.event_logs import add_jmeter_log, thread_safe_add_log
 from src.tools.llm_kpi_calculator import read_llm_metrics_csv, compute_llm_kpis_from_metrics
+from src.tools.jmeter_supervisor import JMeterProcessSupervisor
+from src.tools.jmeter_guardrails import GuardrailMonitor, GUARDRAILS_ENABLED
+from src.utils.profiler import profile_node, stage_timer, record_rows, record_substage
 
 # Load configurations
 config = load_config()
 
 #--- JMeter Test Nodes ---
 # This node runs a load test on the selected JMX file.
+@profile_node("run_jmeter_test")
 def run_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Run a JMeter load test: Example - 1 thread, 1 loop, 5 minutes duration.
@@ -24,15 +28,9 @@ def run_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any]) ->
     # The run timestamp is used to create unique file names for each test run.
     # This ensures that results from different runs do not overwrite each other.
     run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    start_run_logs(shared_data, run_timestamp)
 
-    # Define the JMeter command to run the load test which supports both Windows and Mac/Linux.
-    cli = config['jmeter']['jmeter_bin_path']
-    is_windows = platform.system().lower().startswith("win")
-    start_script = "jmeter.bat" if is_windows else "jmeter"
-    start_cmd = os.path.join(cli, start_script)
-
-    # Define the JMeter results path and JMX path
-    jmeter_results_path = config['jmeter']['jmeter_results_path']
+    # Validate the JMX path
     jmx_path = state.get("jmx_path")
     if not jmx_path or not os.path.exists(jmx_path):
         thread_safe_add_log(shared_data['logs'], "❌ No valid JMX file found. Please select JMX first.", agent_name="AgentError")
@@ -40,51 +38,116 @@ def run_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any]) ->
 
     # Get the JMeter settings from the session state
     vusers = state.get("vusers", 1)
-    ramp_up = state.get("ramp_up", 60)              # Default to 60 seconds if not set
-    iterations = state.get("iterations", 1)         # Default to 1 iteration if not set
     duration = state.get("duration", 300)           # Default to 5 minutes if not set
     use_rag = state.get("use_rag", False)           # Whether to use RAG mode
     prompt_num = state.get("prompt_num", 5)         # Number of prompts to use from input JSON file
     temperature = state.get("temperature", 0.2)     # Default temperature for LLM
 
-    jmeter_jtl = os.path.join(jmeter_results_path, f"{run_timestamp}_jmeter_test.jtl")
-    jmeter_log = os.path.join(jmeter_results_path, f"{run_timestamp}_jmeter_test.log")
-
-    # Build the JMeter command to run the load test
-    cmd = [
-        start_cmd,
-        '-n',  # Non-GUI mode
-        '-t', jmx_path,  # JMX test plan
-        '-l', jmeter_jtl,  # JTL results file
-        '-j', jmeter_log,  # JMeter log file
-        '-Jvusers={}'.format(vusers),           # Number of threads (virtual users)
-        '-Jramp_up={}'.format(ramp_up),         # Ramp-up time in seconds
-        '-Jiterations={}'.format(iterations),   # Number of iterations
-        '-Jduration={}'.format(duration),       # Ramp-up time in seconds
-        '-Juse_rag={}'.format(use_rag),         # Use RAG mode
-        '-Jprompt_num={}'.format(prompt_num),   # Number of prompts to use
-        '-Jtemperature={}'.format(temperature), # Temperature for LLM
-        '-Jrun_timestamp={}'.format(run_timestamp)  # Run timestamp for unique file names
-    ]
+    cmd = build_jmeter_command(jmx_path, run_timestamp, state)
+    run_files = get_run_file_paths(run_timestamp)
 
+    shared_data['abort_reason'] = None
     try:
         thread_safe_add_log(shared_data['logs'], f"🛠️ Preparing to run JMeter test with {vusers} users for {duration} seconds", agent_name="JMeterAgent")
         thread_safe_add_log(shared_data['logs'], f"🛠️ LLM parameters: {prompt_num} prompts, {temperature} temperature, RAG mode: {use_rag}", agent_name="JMeterAgent")
         thread_safe_add_log(shared_data['logs'], f"🏃‍♂️ Running JMeter: {' '.join(cmd)}", agent_name="JMeterAgent")
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as e:
-        thread_safe_add_log(shared_data['logs'], f"❌ Load test failed: {e}", agent_name="AgentError")
+        with stage_timer("jmeter_process"):
+            return_code, supervisor = execute_jmeter(cmd, run_files, shared_data)
+        record_substage("jmeter_startup", supervisor.startup_seconds())
+    except OSError as e:
+        thread_safe_add_log(shared_data['logs'], f"❌ Load test failed to start: {e}", agent_name="AgentError")
+        return {}
+
+    if return_code != 0 and not supervisor.stop_requested:
+        thread_safe_add_log(shared_data['logs'], f"❌ Load test failed: JMeter exited with code {return_code}", agent_name="AgentError")
         return {}
 
+    return {**run_files, "run_timestamp": run_timestamp}
+
+def start_run_logs(shared_data: Dict[str, Any], run_timestamp: str):
+    """Send the run's logs to the run log of run_timestamp and start the run of a streaming judge fed by it."""
+    shared_data['logs'].set_run(run_timestamp)
+    judge = shared_data.get('streaming_judge')
+    if judge is not None:
+        judge.start_run(run_timestamp)
+
+def get_analysis_dir(run_timestamp: str) -> str:
+    """Analysis store directory of a run (see analysis_store)."""
+    return os.path.join(config['jmeter']['jmeter_results_path'], f"{run_timestamp}_analysis")
+
+def get_run_file_paths(run_timestamp: str) -> Dict[str, str]:
+    """Return the output file paths JMeter writes for a run timestamp."""
+    jmeter_results_path = config['jmeter']['jmeter_results_path']
     return {
-        "jmeter_jtl_path": jmeter_jtl,
-        "jmeter_log_path": jmeter_log,
+        "jmeter_jtl_path": os.path.join(jmeter_results_path, f"{run_timestamp}_jmeter_test.jtl"),
+        "jmeter_log_path": os.path.join(jmeter_results_path, f"{run_timestamp}_jmeter_test.log"),
         "llm_kpis_path": os.path.join(jmeter_results_path, f"{run_timestamp}_llm_kpis.csv"),
         "llm_metrics_path": os.path.join(jmeter_results_path, f"{run_timestamp}_llm_metrics.csv"),
         "llm_responses_path": os.path.join(jmeter_results_path, f"{run_timestamp}_llm_responses.json"),
-        "run_timestamp": run_timestamp,
     }
 
+def build_jmeter_command(jmx_path: str, run_timestamp: str, settings: Dict[str, Any], autoflush: bool = False) -> list:
+    """
+    Build the non-GUI JMeter command for a run, supporting both Windows and Mac/Linux.
+    'settings' holds the JMeter/LLM properties (vusers, ramp_up, iterations, duration, use_rag, prompt_num, temperature, model).
+    """
+    cli = config['jmeter']['jmeter_bin_path']
+    is_windows = platform.system().lower().startswith("win")
+    start_script = "jmeter.bat" if is_windows else "jmeter"
+    start_cmd = os.path.join(cli, start_script)
+    run_files = get_run_file_paths(run_timestamp)
+
+    cmd = [
+        start_cmd,
+        '-n',  # Non-GUI mode
+        '-t', jmx_path,  # JMX test plan
+        '-l', run_files['jmeter_jtl_path'],  # JTL results file
+        '-j', run_files['jmeter_log_path'],  # JMeter log file
+        '-Jvusers={}'.format(settings.get("vusers", 1)),            # Number of threads (virtual users)
+        '-Jramp_up={}'.format(settings.get("ramp_up", 60)),         # Ramp-up time in seconds
+        '-Jiterations={}'.format(settings.get("iterations", 1)),    # Number of iterations (-1 loops until stopped)
+        '-Jduration={}'.format(settings.get("duration", 300)),      # Test duration in seconds
+        '-Juse_rag={}'.format(settings.get("use_rag", False)),      # Use RAG mode
+        '-Jprompt_num={}'.format(settings.get("prompt_num", 5)),    # Number of prompts to use
+        '-Jtemperature={}'.format(settings.get("temperature", 0.2)),  # Temperature for LLM
+        '-Jrun_timestamp={}'.format(run_timestamp)  # Run timestamp for unique file names
+    ]
+    if settings.get("model"):
+        cmd.append('-Jllm_model={}'.format(settings["model"]))  # LLM model (defaults to the JMX value)
+    if autoflush or GUARDRAILS_ENABLED:
+        # Flush JTL rows as they are written so live readers (guardrails, stage merges) see every sample
+        cmd.append('-Jjmeter.save.saveservice.autoflush=true')
+    return cmd
+
+def execute_jmeter(cmd: list, run_files: Dict[str, str], shared_data: Dict[str, Any], max_seconds: float = None):
+    """
+    Run a JMeter command under the process supervisor and wait for it to finish.
+    The supervisor is published in shared_data so the stop handler can reach the running process.
+    When 'max_seconds' is set, JMeter is shut down gracefully once it has run that long.
+    A streaming DeepEval judge in shared_data['streaming_judge'] is pointed at this run's responses file.
+    Returns (return_code, supervisor). Raises OSError if JMeter cannot be started.
+    """
+    supervisor = JMeterProcessSupervisor(cmd, shared_data)
+    shared_data['jmeter_process'] = supervisor
+    monitor = None
+    if shared_data.get('streaming_judge') is not None:
+        shared_data['streaming_judge'].follow(run_files['llm_responses_path'])
+    try:
+        supervisor.start()
+        if GUARDRAILS_ENABLED:
+            monitor = GuardrailMonitor(supervisor, run_files['jmeter_jtl_path'], run_files['llm_metrics_path'], shared_data).start()
+        return_code = supervisor.wait(timeout=max_seconds)
+        if return_code is None:
+            # Time limit reached: let in-flight samples finish, then wait for the escalation to release JMeter
+            supervisor.stop(reason=f"time limit of {max_seconds:.0f}s reached", graceful=True, block=True)
+            return_code = supervisor.wait()
+    finally:
+        if monitor is not None:
+            monitor.stop()
+        shared_data['jmeter_process'] = None
+    return return_code, supervisor
+
+@profile_node("analyze_jmeter_test")
 def analyze_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyze the results of the load test.
@@ -96,7 +159,9 @@ def analyze_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any])
         return {}
 
     # Load JTL as DataFrame
-    df = pd.read_csv(jtl_path)
+    with stage_timer("jtl_parse"):
+        df = pd.read_csv(jtl_path)
+    record_rows(len(df))
     if df.empty:
         thread_safe_add_log(shared_data['logs'], "❌ JTL file is empty.", agent_name="AgentError")
         return {}
@@ -117,15 +182,16 @@ def analyze_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any])
 
     # Aggregate response times per label
     def pct90(x): return np.percentile(x, 90)
-    agg = df.groupby('label').agg(
-        samples=('elapsed', 'count'),
-        errors=('success', lambda x: (~x if x.dtype == bool else x != 'true').sum()),
-        avg=('elapsed', 'mean'),
-        min=('elapsed', 'min'),
-        max=('elapsed', 'max'),
-        pct90=('elapsed', pct90)
-    ).reset_index()
-    agg['error_rate'] = (agg['errors'] / agg['samples']) * 100
+    with stage_timer("aggregate"):
+        agg = df.groupby('label').agg(
+            samples=('elapsed', 'count'),
+            errors=('success', lambda x: (~x if x.dtype == bool else x != 'true').sum()),
+            avg=('elapsed', 'mean'),
+            min=('elapsed', 'min'),
+            max=('elapsed', 'max'),
+            pct90=('elapsed', pct90)
+        ).reset_index()
+        agg['error_rate'] = (agg['errors'] / agg['samples']) * 100
 
     # Calculate test duration in minutes and determine dynamic interval
     test_duration_minutes = duration.total_seconds() / 60
@@ -134,18 +200,19 @@ def analyze_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any])
     # Log the interval being used for transparency
     thread_safe_add_log(shared_data['logs'], f"📊 Using {dynamic_interval} sampling interval for {test_duration_minutes:.1f} minute test", agent_name="JMeterAgent")
 
-    # Prepare data for 90th percentile line chart (aggregate over time)
-    time_group = df.set_index('timeStamp').resample(dynamic_interval)  # Resample based on dynamic interval
+    with stage_timer("resample"):
+        # Prepare data for 90th percentile line chart (aggregate over time)
+        time_group = df.set_index('timeStamp').resample(dynamic_interval)  # Resample based on dynamic interval
 
-    # Calculate 90th percentile over time with forward fill for continuity
-    pct90_over_time = time_group['elapsed'].apply(lambda x: np.percentile(x, 90) if len(x) else np.nan)
-    pct90_over_time = pct90_over_time.ffill()  # Forward fill missing values
+        # Calculate 90th percentile over time with forward fill for continuity
+        pct90_over_time = time_group['elapsed'].apply(lambda x: np.percentile(x, 90) if len(x) else np.nan)
+        pct90_over_time = pct90_over_time.ffill()  # Forward fill missing values
 
-    # Calculate virtual users over time with forward fill for alignment
-    # Use grpThreads (group threads) or allThreads (all threads) for accurate concurrency
-    # grpThreads represents the active threads in the thread group at request time
-    vusers_over_time = time_group['grpThreads'].min()  # Use min to get concurrency per interval
-    vusers_over_time = vusers_over_time.ffill()  # Forward fill missing values
+        # Calculate virtual users over time with forward fill for alignment
+        # Use grpThreads (group threads) or allThreads (all threads) for accurate concurrency
+        # grpThreads represents the active threads in the thread group at request time
+        vusers_over_time = time_group['grpThreads'].min()  # Use min to get concurrency per interval
+        vusers_over_time = vusers_over_time.ffill()  # Forward fill missing values
 
     # Human-readable times
     start_time_str = start_time.strftime('%Y-%m-%d %H:%M:%S')
@@ -183,7 +250,8 @@ def analyze_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any])
         "vusers_over_time": vusers_over_time,
         "overlay_df": df_overlay,
         "sampling_interval": dynamic_interval,
-        "test_duration_minutes": test_duration_minutes
+        "test_duration_minutes": test_duration_minutes,
+        "abort_reason": shared_data.get('abort_reason')   # Set when a guardrail aborted the test
     }
     thread_safe_add_log(shared_data['logs'], f"✅ Load test analysis complete: {summary['status']} ({passed}/{total_samples} passed)", agent_name="JMeterAgent")
     return summary
@@ -191,27 +259,36 @@ def analyze_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any])
 def stop_jmeter_test_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Stop the currently running JMeter test.
-    This is a placeholder function as stopping JMeter tests programmatically is complex.
+    Signals the supervised JMeter process (shutdown port -> SIGTERM -> SIGKILL) and returns
+    immediately; the escalation completes in the background. Falls back to JMeter's stop
+    script when no supervised process is available.
     """
+    supervisor = shared_data.get('jmeter_process')
+    if supervisor is not None and supervisor.is_running():
+        if supervisor.stop(reason="user request"):
+            thread_safe_add_log(shared_data['logs'], f"🛑 Stop signal sent to JMeter process (PID {supervisor.pid}).", agent_name="JMeterAgent")
+        else:
+            thread_safe_add_log(shared_data['logs'], "🛑 JMeter stop already in progress.", agent_name="JMeterAgent")
+        return {"jmeter_stop_pid": supervisor.pid}
+
     cli = config['jmeter']['jmeter_bin_path']
     is_windows = platform.system().lower().startswith("win")
     stop_script = "stoptest.cmd" if is_windows else "stoptest.sh"
     stop_cmd = os.path.join(cli, stop_script)
 
-    thread_safe_add_log(shared_data['logs'], f"Attempting to stop JMeter test with command: {stop_cmd}", agent_name="JMeterAgent")
+    thread_safe_add_log(shared_data['logs'], f"No supervised JMeter process found. Attempting to stop JMeter test with command: {stop_cmd}", agent_name="JMeterAgent")
 
     try:
-        subprocess.run(stop_cmd, shell=True, check=True)
+        subprocess.run(stop_cmd, shell=True, check=True, timeout=30)
         thread_safe_add_log(shared_data['logs'], "🛑 JMeter stop command sent successfully.", agent_name="JMeterAgent")
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
         thread_safe_add_log(shared_data['logs'], f"❗Failed to stop JMeter: {e}", agent_name="AgentError")
 
-    # In practice, you would need to implement a way to stop the JMeter process gracefully.
-    # This could involve sending a shutdown command or killing the process.
     thread_safe_add_log(shared_data['logs'], "🛑 Stopping JMeter test!", agent_name="JMeterAgent")
     return {}
 
 #--- LLM Metrics Nodes ---
+@profile_node("analyze_llm_metrics")
 def analyze_llm_metrics_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyze LLM metrics from the metrics CSV file using helper functions.
@@ -223,13 +300,16 @@ def analyze_llm_metrics_node(shared_data: Dict[str, Any], state: Dict[str, Any])
         return {}
 
     # Load and validate metrics DataFrame
-    metrics_df = read_llm_metrics_csv(llm_metrics_path, shared_data, agent_name="LLMKPIAgent")
+    with stage_timer("metrics_parse"):
+        metrics_df = read_llm_metrics_csv(llm_metrics_path, shared_data, agent_name="LLMKPIAgent")
+    record_rows(len(metrics_df))
     if metrics_df.empty:
         thread_safe_add_log(shared_data['logs'], "❌ LLM metrics file is empty or missing required columns.", agent_name="AgentError")
         return {}
 
     # Calculate KPIs for each row: TTFT, TPS, TPOT
-    kpi_df = compute_llm_kpis_from_metrics(metrics_df)
+    with stage_timer("kpi_compute"):
+        kpi_df = compute_llm_kpis_from_metrics(metrics_df)
 
     # Convert timestamps
     kpi_df['timestamp'] = pd.to_datetime(kpi_df['timestamp'], unit='ms')
@@ -270,16 +350,17 @@ def analyze_llm_metrics_node(shared_data: Dict[str, Any], state: Dict[str, Any])
     # Log the interval being used for transparency
     thread_safe_add_log(shared_data['logs'], f"📊 Using {dynamic_interval} sampling interval for LLM metrics ({test_duration_minutes:.1f} minute test)", agent_name="LLMKPIAgent")
 
-    # Apply same dynamic interval processing
-    llm_time_group = kpi_df.set_index('timestamp').resample(dynamic_interval)
-    
-    # Process each token metric with forward fill
-    ttft_over_time = llm_time_group['TTFT'].mean().ffill()
-    tpot_over_time = llm_time_group['TPOT'].mean().ffill()
-    tps_over_time = llm_time_group['TPS'].mean().ffill()
-    
-    # Virtual users from LLM data (should match JTL data)
-    llm_vusers_over_time = llm_time_group['allThreads'].min().ffill()
+    with stage_timer("resample"):
+        # Apply same dynamic interval processing
+        llm_time_group = kpi_df.set_index('timestamp').resample(dynamic_interval)
+
+        # Process each token metric with forward fill
+        ttft_over_time = llm_time_group['TTFT'].mean().ffill()
+        tpot_over_time = llm_time_group['TPOT'].mean().ffill()
+        tps_over_time = llm_time_group['TPS'].mean().ffill()
+
+        # Virtual users from LLM data (should match JTL data)
+        llm_vusers_over_time = llm_time_group['allThreads'].min().ffill()
     
     # Create overlay dataframes for each metric
     ttft_overlay_df = pd.DataFrame({
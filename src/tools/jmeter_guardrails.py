@@ -0,0 +1,185 @@
+# Module to evaluate live SLO guardrails while a JMeter load test is running
+import csv
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+from src.utils.file_tail import FileTailer
+from src.tools.llm_kpi_calculator import calculate_ttft
+
+# Load configurations
+config = load_config()
+guardrails_config = config.get("guardrails", {})
+
+GUARDRAILS_ENABLED = guardrails_config.get("enabled", False)
+CHECK_INTERVAL = guardrails_config.get("check_interval", 5)            # Seconds between rule evaluations
+WINDOW_SECONDS = guardrails_config.get("window_seconds", 60)           # Rolling window for rate/percentile rules
+MIN_SAMPLES = guardrails_config.get("min_samples", 10)                 # Samples required in the window before rate/percentile rules apply
+MAX_ERROR_RATE_PCT = guardrails_config.get("max_error_rate_pct", 0)    # 0 disables the rule
+MAX_P90_MS = guardrails_config.get("max_p90_ms", 0)                    # 0 disables the rule
+MAX_TTFT_P90_MS = guardrails_config.get("max_ttft_p90_ms", 0)          # 0 disables the rule
+NO_SAMPLES_TIMEOUT = guardrails_config.get("no_samples_timeout", 0)    # 0 disables the rule
+STALL_TIMEOUT = guardrails_config.get("stall_timeout", 0)              # 0 disables the rule
+STARTUP_GRACE = guardrails_config.get("startup_grace", 60)             # Seconds before no-samples/stall rules apply
+
+class GuardrailMonitor:
+    """
+    Tails the JTL and _llm_metrics.csv files of a running test, evaluates the configured
+    abort rules over a rolling window and stops the supervised JMeter process when one triggers.
+    The triggered rule is recorded in shared_data['abort_reason'].
+    """
+    def __init__(self, supervisor, jtl_path: str, llm_metrics_path: str, shared_data: Dict[str, Any]):
+        self.supervisor = supervisor
+        self.shared_data = shared_data
+        self.abort_reason: Optional[str] = None
+        self._jtl = FileTailer(jtl_path)
+        self._metrics = FileTailer(llm_metrics_path)
+        self._jtl_columns: Optional[Dict[str, int]] = None
+        self._metrics_columns: Optional[Dict[str, int]] = None
+        self._samples = deque()   # (timestamp_ms, elapsed_ms, success)
+        self._ttfts = deque()     # (timestamp_ms, ttft_ms)
+        self._last_arrival = time.time()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        thread_safe_add_log(self.shared_data['logs'], f"🛡️ Guardrails active: {', '.join(describe_rules())}", agent_name="GuardrailAgent")
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=CHECK_INTERVAL + 1)
+
+    # --- Monitoring loop ---------------------------------------------------
+    def _run(self):
+        while not self._stop_event.wait(CHECK_INTERVAL):
+            if not self.supervisor.is_running():
+                return
+            try:
+                self._ingest()
+                reason = self.evaluate(time.time())
+            except Exception as e:
+                thread_safe_add_log(self.shared_data['logs'], f"⚠️ Guardrail evaluation error: {e}", agent_name="GuardrailAgent")
+                continue
+            if reason:
+                self._abort(reason)
+                return
+
+    def _abort(self, reason: str):
+        self.abort_reason = reason
+        self.shared_data['abort_reason'] = reason
+        thread_safe_add_log(self.shared_data['logs'], f"🚨 Guardrail triggered: {reason}. Aborting load test.", agent_name="GuardrailAgent")
+        self.supervisor.stop(reason=f"guardrail: {reason}")
+
+    # --- Ingestion ---------------------------------------------------------
+    def _ingest(self):
+        """Read newly appended JTL and LLM metrics rows into the rolling windows."""
+        new_rows = 0
+        for row in self._parse_csv_lines(self._jtl.read_new_lines(), is_jtl=True):
+            columns = self._jtl_columns
+            try:
+                timestamp = int(row[columns['timeStamp']])
+                elapsed = float(row[columns['elapsed']])
+            except (KeyError, IndexError, ValueError):
+                continue
+            success = row[columns['success']].strip().lower() == 'true' if 'success' in columns else True
+            self._samples.append((timestamp, elapsed, success))
+            new_rows += 1
+
+        for row in self._parse_csv_lines(self._metrics.read_new_lines(), is_jtl=False):
+            columns = self._metrics_columns
+            try:
+                timestamp = int(float(row[columns['timestamp']]))
+                ttft = calculate_ttft(float(row[columns['load_duration_ms']]), float(row[columns['prompt_eval_duration_ms']]))
+            except (KeyError, IndexError, ValueError):
+                continue
+            self._ttfts.append((timestamp, ttft))
+            new_rows += 1
+
+        if new_rows:
+            self._last_arrival = time.time()
+
+    def _parse_csv_lines(self, lines: List[str], is_jtl: bool) -> List[List[str]]:
+        """Parse CSV lines, capturing the header row (first line of each file) as a column index."""
+        rows = []
+        for row in csv.reader(lines):
+            if not row:
+                continue
+            header_key = 'timeStamp' if is_jtl else 'timestamp'
+            if row[0] == header_key:
+                columns = {name: index for index, name in enumerate(row)}
+                if is_jtl:
+                    self._jtl_columns = columns
+                else:
+                    self._metrics_columns = columns
+                continue
+            if (self._jtl_columns if is_jtl else self._metrics_columns) is None:
+                continue
+            rows.append(row)
+        return rows
+
+    # --- Rule evaluation ---------------------------------------------------
+    def evaluate(self, now: float) -> Optional[str]:
+        """Return the reason of the first triggered rule, or None."""
+        _trim_window(self._samples)
+        _trim_window(self._ttfts)
+        running_for = now - (self.supervisor.started_at or now)
+
+        if MAX_ERROR_RATE_PCT and len(self._samples) >= MIN_SAMPLES:
+            errors = sum(1 for _, _, success in self._samples if not success)
+            error_rate = errors / len(self._samples) * 100
+            if error_rate > MAX_ERROR_RATE_PCT:
+                return f"error rate {error_rate:.1f}% > {MAX_ERROR_RATE_PCT}% over the last {WINDOW_SECONDS}s ({errors}/{len(self._samples)} samples)"
+
+        if MAX_P90_MS and len(self._samples) >= MIN_SAMPLES:
+            p90 = np.percentile([elapsed for _, elapsed, _ in self._samples], 90)
+            if p90 > MAX_P90_MS:
+                return f"p90 response time {p90:.0f} ms > {MAX_P90_MS} ms over the last {WINDOW_SECONDS}s"
+
+        if MAX_TTFT_P90_MS and len(self._ttfts) >= MIN_SAMPLES:
+            ttft_p90 = np.percentile([ttft for _, ttft in self._ttfts], 90)
+            if ttft_p90 > MAX_TTFT_P90_MS:
+                return f"p90 TTFT {ttft_p90:.0f} ms > {MAX_TTFT_P90_MS} ms over the last {WINDOW_SECONDS}s"
+
+        if running_for >= STARTUP_GRACE:
+            silence = now - self._last_arrival
+            if NO_SAMPLES_TIMEOUT and silence > NO_SAMPLES_TIMEOUT:
+                return f"no new samples for {silence:.0f}s (limit {NO_SAMPLES_TIMEOUT}s)"
+
+            stalled_for = self.supervisor.seconds_since_output()
+            if STALL_TIMEOUT and stalled_for > STALL_TIMEOUT:
+                return f"JMeter process stalled: no output for {stalled_for:.0f}s (limit {STALL_TIMEOUT}s)"
+
+        return None
+
+# ========================= Helper Functions =========================
+
+def _trim_window(window: deque):
+    """Drop entries older than WINDOW_SECONDS relative to the newest sample timestamp."""
+    if not window:
+        return
+    cutoff = window[-1][0] - WINDOW_SECONDS * 1000
+    while window and window[0][0] < cutoff:
+        window.popleft()
+
+def describe_rules() -> List[str]:
+    """Human-readable list of the enabled guardrail rules."""
+    rules = []
+    if MAX_ERROR_RATE_PCT:
+        rules.append(f"error rate > {MAX_ERROR_RATE_PCT}%/{WINDOW_SECONDS}s")
+    if MAX_P90_MS:
+        rules.append(f"p90 > {MAX_P90_MS} ms/{WINDOW_SECONDS}s")
+    if MAX_TTFT_P90_MS:
+        rules.append(f"p90 TTFT > {MAX_TTFT_P90_MS} ms/{WINDOW_SECONDS}s")
+    if NO_SAMPLES_TIMEOUT:
+        rules.append(f"no samples for {NO_SAMPLES_TIMEOUT}s")
+    if STALL_TIMEOUT:
+        rules.append(f"stalled for {STALL_TIMEOUT}s")
+    return rules or ["no rules configured"]
@@ -0,0 +1,193 @@
+# Module to supervise the JMeter process lifecycle
+import os
+import re
+import time
+import signal
+import socket
+import platform
+import threading
+import subprocess
+from typing import List, Dict, Any, Optional
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+
+# Load configurations
+config = load_config()
+jmeter_config = config.get("jmeter", {})
+
+STOP_GRACE_TIMEOUT = jmeter_config.get("stop_grace_timeout", 10)   # Seconds to wait after the shutdown port message
+STOP_TERM_TIMEOUT = jmeter_config.get("stop_term_timeout", 5)      # Seconds to wait after SIGTERM before SIGKILL
+IS_WINDOWS = platform.system().lower().startswith("win")
+
+# JMeter prints the UDP port it listens on for Shutdown/StopTestNow messages
+SHUTDOWN_PORT_PATTERN = re.compile(r"message on port (\d+)")
+# JMeter prints this once the engine has started and samples begin
+TEST_STARTED_PATTERN = re.compile(r"Starting standalone test|Starting the test")
+
+class JMeterProcessSupervisor:
+    """
+    Supervises a non-GUI JMeter process.
+    Starts JMeter in its own process group, streams its stdout (summariser lines, etc.)
+    into the shared logs as they arrive, and stops it with an escalating
+    shutdown port -> SIGTERM -> SIGKILL sequence so the caller is always released.
+    """
+    def __init__(self, cmd: List[str], shared_data: Dict[str, Any], agent_name: str = "JMeter"):
+        self.cmd = cmd
+        self.shared_data = shared_data
+        self.agent_name = agent_name
+        self.process: Optional[subprocess.Popen] = None
+        self.shutdown_port: Optional[int] = None
+        self.started_at: Optional[float] = None
+        self.test_started_at: Optional[float] = None
+        self.last_output_at: Optional[float] = None
+        self.stop_requested = False
+        self.stop_reason: Optional[str] = None
+        self.stop_method: Optional[str] = None
+        self._reader: Optional[threading.Thread] = None
+        self._stopper: Optional[threading.Thread] = None
+        self._stop_lock = threading.Lock()
+
+    # --- Lifecycle ---------------------------------------------------------
+    def start(self):
+        """Start JMeter in a new process group and begin streaming its output."""
+        kwargs = {
+            "stdout": subprocess.PIPE,
+            "stderr": subprocess.STDOUT,
+            "stdin": subprocess.DEVNULL,
+            "text": True,
+            "bufsize": 1,  # Line buffered
+            "encoding": "utf-8",
+            "errors": "replace",
+        }
+        if IS_WINDOWS:
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True  # setsid(): JMeter and its JVM get their own process group
+
+        self.started_at = time.time()
+        self.last_output_at = self.started_at
+        self.process = subprocess.Popen(self.cmd, **kwargs)
+        self._log(f"🚀 JMeter process started (PID {self.process.pid})", agent_name="JMeterAgent")
+
+        self._reader = threading.Thread(target=self._read_output, daemon=True)
+        self._reader.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Wait for JMeter to exit. Returns the exit code, or None if the timeout expired."""
+        try:
+            return_code = self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+        if self._reader is not None:
+            self._reader.join(timeout=2)  # Drain any remaining output
+        return return_code
+
+    def stop(self, reason: str = "user request", graceful: bool = False, block: bool = False) -> bool:
+        """
+        Stop JMeter. 'graceful' sends Shutdown (let in-flight samples finish) instead of StopTestNow.
+        Escalation runs in the background unless 'block' is set, so callers return immediately.
+        Returns False if the process is not running or a stop is already in progress.
+        """
+        with self._stop_lock:
+            if not self.is_running() or self._stopper is not None:
+                return False
+            self.stop_requested = True
+            self.stop_reason = reason
+            self._stopper = threading.Thread(target=self._escalate_stop, args=(graceful,), daemon=True)
+            self._stopper.start()
+        if block:
+            self._stopper.join()
+        return True
+
+    # --- Status ------------------------------------------------------------
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def seconds_since_output(self) -> float:
+        """Seconds since JMeter last wrote to stdout (used to detect a stalled process)."""
+        return time.time() - (self.last_output_at or time.time())
+
+    def startup_seconds(self) -> Optional[float]:
+        """Seconds from process start until JMeter reported the test as started."""
+        if self.started_at is None or self.test_started_at is None:
+            return None
+        return self.test_started_at - self.started_at
+
+    # --- Internals ---------------------------------------------------------
+    def _read_output(self):
+        """Stream JMeter stdout lines into the shared logs as they arrive."""
+        for line in self.process.stdout:
+            line = line.rstrip()
+            if not line:
+                continue
+            self.last_output_at = time.time()
+            port_match = SHUTDOWN_PORT_PATTERN.search(line)
+            if port_match:
+                self.shutdown_port = int(port_match.group(1))
+            if self.test_started_at is None and TEST_STARTED_PATTERN.search(line):
+                self.test_started_at = self.last_output_at
+            self._log(line)
+        self.process.stdout.close()
+
+    def _escalate_stop(self, graceful: bool):
+        """Shutdown port message -> SIGTERM -> SIGKILL, each with a timeout."""
+        command = "Shutdown" if graceful else "StopTestNow"
+        self._log(f"🛑 Stopping JMeter (PID {self.pid}): {self.stop_reason}", agent_name="JMeterAgent")
+
+        if self._send_shutdown_message(command) and self._wait_exit(STOP_GRACE_TIMEOUT):
+            self.stop_method = f"shutdown port ({command})"
+        elif self._signal_group(kill=False) and self._wait_exit(STOP_TERM_TIMEOUT):
+            self.stop_method = "SIGTERM"
+        else:
+            self._signal_group(kill=True)
+            self._wait_exit(STOP_TERM_TIMEOUT)
+            self.stop_method = "SIGKILL"
+        self._log(f"🛑 JMeter stopped via {self.stop_method}.", agent_name="JMeterAgent")
+
+    def _send_shutdown_message(self, command: str) -> bool:
+        """Send a Shutdown/StopTestNow datagram to JMeter's shutdown port (what stoptest.sh does)."""
+        if not self.shutdown_port:
+            self._log("⚠️ JMeter shutdown port unknown; skipping graceful stop.", agent_name="JMeterAgent")
+            return False
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.sendto(command.encode("ascii"), ("127.0.0.1", self.shutdown_port))
+            self._log(f"📨 Sent {command} to JMeter shutdown port {self.shutdown_port}", agent_name="JMeterAgent")
+            return True
+        except OSError as e:
+            self._log(f"⚠️ Failed to contact JMeter shutdown port: {e}", agent_name="JMeterAgent")
+            return False
+
+    def _signal_group(self, kill: bool) -> bool:
+        """Signal the whole JMeter process group (launcher script and JVM)."""
+        if not self.is_running():
+            return True
+        try:
+            if IS_WINDOWS:
+                if kill:
+                    subprocess.run(["taskkill", "/T", "/F", "/PID", str(self.pid)], capture_output=True)
+                else:
+                    self.process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                os.killpg(os.getpgid(self.pid), signal.SIGKILL if kill else signal.SIGTERM)
+            return True
+        except (OSError, ProcessLookupError) as e:
+            self._log(f"⚠️ Failed to signal JMeter process group: {e}", agent_name="JMeterAgent")
+            return False
+
+    def _wait_exit(self, timeout: float) -> bool:
+        try:
+            self.process.wait(timeout=timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+
+    def _log(self, message: str, agent_name: Optional[str] = None):
+        if 'logs' in self.shared_data:
+            thread_safe_add_log(self.shared_data['logs'], message, agent_name=agent_name or self.agent_name)
@@ -0,0 +1,258 @@
+# Module for the UI side of the job manager: submit jobs, follow their progress and logs, stop them
+import os
+import sys
+import json
+import time
+import hashlib
+import subprocess
+from enum import Enum
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+
+from src.utils.config import load_config
+from src.utils.test_state import TestState, DeepEvalTestState
+
+# Load configurations
+config = load_config()
+job_manager_config = config.get("job_manager", {})
+logging_config = config.get("logging", {})
+
+JOB_MANAGER_ENABLED = job_manager_config.get("enabled", True)          # Run jobs in the job manager process (False = UI threads)
+JOB_MANAGER_HOST = job_manager_config.get("host", "127.0.0.1")         # Local address of the job manager API
+JOB_MANAGER_PORT = job_manager_config.get("port", 8765)
+JOB_MANAGER_AUTOSTART = job_manager_config.get("autostart", True)      # Start the job manager on the first submit if it is not running
+JOB_MANAGER_TIMEOUT = job_manager_config.get("request_timeout", 2.0)   # Seconds per API request
+JOB_MANAGER_RESTART = job_manager_config.get("restart_on_change", True) # Restart an idle job manager started with other code or config
+JOB_MANAGER_START_WAIT = 10                                            # Seconds to wait for an autostarted job manager
+JOB_MANAGER_URL = f"http://{JOB_MANAGER_HOST}:{JOB_MANAGER_PORT}"
+JOB_MANAGER_LOG = os.path.join(logging_config.get("log_path", "tmp/logs"), "job_manager.log")
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+CONFIG_FILES = ("config.yaml", "config.mac.yaml", "config.windows.yaml")   # Candidates of load_config
+
+# Status enum of each job kind (statuses travel as enum names)
+JOB_KINDS = {"jmeter": TestState, "sweep": TestState, "deepeval": DeepEvalTestState}
+# Thread data entries that only make sense in the process that owns them
+JOB_LOCAL_KEYS = ("logs", "jmeter_process", "streaming_judge", "job")
+# Thread data entries the job manager publishes back to the viewers
+JOB_PUBLISHED_KEYS = (
+    "status", "results", "analysis", "run_timestamp", "error_message", "progress", "current_test_case",
+    "jmeter_jtl_path", "jmeter_log_path", "llm_kpis_path", "llm_metrics_path", "llm_responses_path",
+    "manifest",
+)
+JOB_ACTIVE_PHASES = ("queued", "running")
+
+_fingerprint = None   # (file signature, hash) of the last code_fingerprint() call in this process
+
+# ========================= Job Handle =========================
+
+class JobHandle:
+    """
+    A job of the job manager followed by one session, kept in its thread data ('job') and in place
+    of the background thread (is_alive), so the live viewers work the same for both.
+    """
+    def __init__(self, job_id: str, kind: str, phase: str = "queued"):
+        self.job_id = job_id
+        self.kind = kind
+        self.phase = phase      # "queued", "running", "finished" or "interrupted" (as of the last sync)
+        self.log_seq = 0        # Last job log record mirrored into the session's channel
+        self.applied = {}       # Published values already applied, so values the UI cleared are not re-applied
+
+    def is_alive(self) -> bool:
+        return self.phase in JOB_ACTIVE_PHASES
+
+# ========================= Job Manager Client =========================
+
+def submit_job(kind: str, state: Dict[str, Any], shared_data: Dict[str, Any], linked_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Queue a job in the job manager (started first if needed). 'linked_data' is the DeepEval thread data
+    of a streaming assessment that runs alongside a load test.
+
+    Returns:
+        dict: {"job": job summary, "linked_job": summary or None, "stale": True when the job manager runs
+        older code or config (see ensure_job_manager)}, or None when the job manager is disabled or
+        unreachable (the caller then runs the job on a UI thread)
+    """
+    if not JOB_MANAGER_ENABLED or not ensure_job_manager():
+        return None
+    stale = is_job_manager_stale()
+    payload = {
+        "kind": kind,
+        "state": state,
+        "shared": encode_job_data(shared_data),
+        "linked": encode_job_data(linked_data) if linked_data is not None else None,
+    }
+    try:
+        response = requests.post(f"{JOB_MANAGER_URL}/jobs", data=json.dumps(payload, default=str), timeout=JOB_MANAGER_TIMEOUT)
+        response.raise_for_status()
+        return {**response.json(), "stale": stale}
+    except requests.RequestException:
+        return None
+
+def stop_job(job_id: str) -> bool:
+    """Ask the job manager to stop a queued or running job."""
+    try:
+        response = requests.post(f"{JOB_MANAGER_URL}/jobs/{job_id}/stop", timeout=JOB_MANAGER_TIMEOUT)
+        return response.ok
+    except requests.RequestException:
+        return False
+
+def list_jobs() -> List[Dict[str, Any]]:
+    """Summaries of the jobs known to the job manager, newest first ([] when it is not running)."""
+    if not JOB_MANAGER_ENABLED:
+        return []
+    try:
+        response = requests.get(f"{JOB_MANAGER_URL}/jobs", timeout=JOB_MANAGER_TIMEOUT)
+        response.raise_for_status()
+        return response.json()["jobs"]
+    except (requests.RequestException, ValueError, KeyError):
+        return []
+
+def attach_job(shared_data: Dict[str, Any], summary: Dict[str, Any]) -> JobHandle:
+    """Follow a job from this session's thread data; returns the handle to keep in place of the thread."""
+    handle = JobHandle(summary["job_id"], summary["kind"], summary.get("phase", "queued"))
+    shared_data['job'] = handle
+    return handle
+
+def sync_job(shared_data: Dict[str, Any]):
+    """
+    Pull what the followed job published since the last sync into the session's thread data:
+    new log records are mirrored into its channel and changed values are applied, after which
+    the page syncs them into session state exactly as for a UI thread. No-op without a job.
+    """
+    handle = shared_data.get('job')
+    if handle is None or (not handle.is_alive() and handle.applied):
+        return  # Nothing to follow, or the final state of the job is already applied
+    try:
+        response = requests.get(f"{JOB_MANAGER_URL}/jobs/{handle.job_id}", params={"since": handle.log_seq}, timeout=JOB_MANAGER_TIMEOUT)
+        response.raise_for_status()
+        update = response.json()
+    except (requests.RequestException, ValueError):
+        return  # Job manager busy or restarting: try again on the next refresh
+
+    records = update.get("logs", [])
+    if records and handle.log_seq and records[0][0] > handle.log_seq + 1:
+        skipped = records[0][0] - handle.log_seq - 1
+        shared_data['logs'].mirror([(records[0][1], "JobManager", f"... {skipped} job log lines dropped (viewer fell behind) ...")])
+    shared_data['logs'].mirror([(created, agent_name, message) for _, created, agent_name, message in records])
+    handle.log_seq = update.get("last_seq", handle.log_seq)
+
+    for key, value in update.get("data", {}).items():
+        if key not in handle.applied or handle.applied[key] != value:
+            handle.applied[key] = value
+            shared_data[key] = decode_status(handle.kind, value) if key == "status" else value
+    handle.phase = update["job"]["phase"]
+
+# ========================= Job Manager Process =========================
+
+def ensure_job_manager(autostart: bool = JOB_MANAGER_AUTOSTART) -> bool:
+    """
+    True when the job manager answers; starts it (detached from the UI process) if allowed.
+    A job manager keeps the code and config it was started with: when they changed on disk since
+    (see code_fingerprint) and it has no queued or running jobs, it is restarted first. A busy one
+    is used as is and reported stale (is_job_manager_stale) until a later submit finds it idle.
+    """
+    health = _health()
+    if health and autostart and JOB_MANAGER_RESTART and health.get("fingerprint") != code_fingerprint() and not _has_active_jobs():
+        if _request_shutdown():
+            health = None
+    if health:
+        return True
+    if not autostart:
+        return False
+    start_job_manager()
+    deadline = time.time() + JOB_MANAGER_START_WAIT
+    while time.time() < deadline:
+        time.sleep(0.25)
+        if _ping():
+            return True
+    return False
+
+def start_job_manager() -> subprocess.Popen:
+    """Start the job manager in its own session so it outlives the Streamlit server."""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = f"{REPO_ROOT}{os.pathsep}{env.get('PYTHONPATH', '')}"
+    os.makedirs(os.path.dirname(JOB_MANAGER_LOG) or ".", exist_ok=True)
+    with open(JOB_MANAGER_LOG, "a", encoding="utf-8") as log_file:
+        return subprocess.Popen([sys.executable, "-m", "src.tools.job_manager"], cwd=REPO_ROOT, env=env,
+                                stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True)
+
+def is_job_manager_stale() -> bool:
+    """True when the running job manager was started with other code or config than is on disk now."""
+    health = _health()
+    return bool(health) and health.get("fingerprint") != code_fingerprint()
+
+def code_fingerprint() -> str:
+    """
+    Short hash of the configuration and the Python sources under src/, as on disk now. The files are
+    only read again when one of them was added, removed or modified (by mtime and size) since the last call.
+    """
+    global _fingerprint
+    sources = _source_files()
+    signature = tuple((path, stat.st_mtime_ns, stat.st_size) for path, stat in sources)
+    if _fingerprint is not None and _fingerprint[0] == signature:
+        return _fingerprint[1]
+    digest = hashlib.sha1(json.dumps(load_config(), sort_keys=True, default=str).encode("utf-8"))
+    for path, _ in sources:
+        if path.endswith(".py"):
+            digest.update(os.path.relpath(path, REPO_ROOT).encode("utf-8"))
+            with open(path, "rb") as file:
+                digest.update(file.read())
+    _fingerprint = (signature, digest.hexdigest()[:12])
+    return _fingerprint[1]
+
+# ========================= Helper Functions =========================
+
+def encode_job_data(shared_data: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready copy of thread data without the process-local entries; statuses become enum names."""
+    return {key: encode_status(value) for key, value in shared_data.items() if key not in JOB_LOCAL_KEYS}
+
+def encode_status(status):
+    """Enum name of a status (other values are returned unchanged)."""
+    return status.name if isinstance(status, Enum) else status
+
+def decode_status(kind: str, name):
+    """Status enum of a job kind from its name (None stays None)."""
+    if name is None or isinstance(name, Enum):
+        return name
+    return JOB_KINDS[kind][name]
+
+def _source_files() -> List[Tuple[str, os.stat_result]]:
+    """(path, stat) of the config files load_config may read and of the .py files under src/, in a stable order."""
+    paths = [os.path.join(REPO_ROOT, name) for name in CONFIG_FILES]
+    for root, dirs, files in os.walk(os.path.join(REPO_ROOT, "src")):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".py"))
+    sources = []
+    for path in paths:
+        try:
+            sources.append((path, os.stat(path)))
+        except OSError:
+            continue   # Absent platform config, or a file removed while walking
+    return sources
+
+def _ping() -> bool:
+    return _health() is not None
+
+def _health() -> Optional[Dict[str, Any]]:
+    """The job manager's /health reply ({"ok", "pid", "fingerprint"}), or None when it does not answer."""
+    try:
+        response = requests.get(f"{JOB_MANAGER_URL}/health", timeout=JOB_MANAGER_TIMEOUT)
+        return response.json() if response.ok else None
+    except (requests.RequestException, ValueError):
+        return None
+
+def _has_active_jobs() -> bool:
+    return any(summary.get("phase") in JOB_ACTIVE_PHASES for summary in list_jobs())
+
+def _request_shutdown() -> bool:
+    """Ask the job manager to exit and wait until it stops answering; False if it is still up."""
+    try:
+        requests.post(f"{JOB_MANAGER_URL}/shutdown", timeout=JOB_MANAGER_TIMEOUT)
+    except requests.RequestException:
+        pass
+    deadline = time.time() + JOB_MANAGER_START_WAIT
+    while time.time() < deadline:
+        if not _ping():
+            return True
+        time.sleep(0.25)
+    return False
@@ -0,0 +1,368 @@
+# Job manager: a local process that runs load tests, sweeps and DeepEval assessments outside the
+# Streamlit server, behind a small HTTP API (job_client) with a persistent queue.
+#
+#   python -m src.tools.job_manager
+#
+# Jobs keep running when the browser is reloaded or the UI server restarts, every session can follow
+# them, and their work no longer shares the UI process (and its GIL) with page rendering.
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, Any, List, Optional
+
+from src.utils.config import load_config
+from src.utils.event_logs import LogChannel, thread_safe_add_log
+from src.tools.job_client import (
+    JOB_MANAGER_HOST,
+    JOB_MANAGER_PORT,
+    JOB_KINDS,
+    JOB_PUBLISHED_KEYS,
+    JOB_ACTIVE_PHASES,
+    encode_job_data,
+    encode_status,
+    decode_status,
+    code_fingerprint,
+)
+from src.tools.job_runners import run_jmeter_job, run_sweep_job, run_deepeval_job
+from src.tools.jmeter_executor import stop_jmeter_test_node
+from src.tools.deepeval_streaming import StreamingJudge
+
+# Load configurations
+config = load_config()
+job_manager_config = config.get("job_manager", {})
+
+JOB_WORKERS = job_manager_config.get("max_workers", 4)                  # Jobs running at the same time, all kinds together
+JOB_LIMITS = {                                                          # Jobs running at the same time per resource class
+    "load_test": job_manager_config.get("max_load_tests", 1),           # JMeter runs and sweeps (they load the same target)
+    "assessment": job_manager_config.get("max_assessments", 2),         # DeepEval assessments (they share the judge model)
+}
+JOBS_PATH = job_manager_config.get("jobs_path", "tmp/jobs")            # One JSON record per job (the persistent queue)
+JOB_HISTORY = job_manager_config.get("job_history", 50)               # Finished jobs kept listed (and their logs in memory)
+
+JOB_CLASSES = {"jmeter": "load_test", "sweep": "load_test", "deepeval": "assessment"}
+JOB_RUNNERS = {"jmeter": run_jmeter_job, "sweep": run_sweep_job, "deepeval": run_deepeval_job}
+JOB_AGENTS = {"jmeter": "JMeterAgent", "sweep": "SweepAgent", "deepeval": "DeepEvalAgent"}
+
+# ========================= Jobs =========================
+
+class Job:
+    """
+    One queued or running job: the UI state snapshot it was submitted with and the thread data
+    (shared_data) its runner works on, exactly as a UI background thread would.
+    """
+    def __init__(self, job_id: str, kind: str, state: Dict[str, Any], shared: Dict[str, Any], submitted_at: float = None):
+        self.job_id = job_id
+        self.kind = kind
+        self.state = state
+        self.shared = shared                        # Submitted thread data (kept to re-run a queued job after a restart)
+        self.shared_data = {**shared, 'logs': LogChannel(kind), 'status': decode_status(kind, shared.get('status'))}
+        self.shared_data['logs'].set_run(shared.get('run_timestamp', "") if kind == "deepeval" else "")
+        self.phase = "queued"                       # queued -> running -> finished (interrupted if the manager stopped meanwhile)
+        self.submitted_at = submitted_at or time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.parent_job_id = None                   # Load test a streaming assessment rides along with
+        self.linked_job_id = None                   # Streaming assessment riding along with this load test
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "phase": self.phase,
+            "status": encode_status(self.shared_data.get('status')),
+            "run_timestamp": self.shared_data.get('run_timestamp', ""),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "parent_job_id": self.parent_job_id,
+            "linked_job_id": self.linked_job_id,
+        }
+
+    def published(self) -> Dict[str, Any]:
+        """Thread data entries the viewers sync, JSON-ready."""
+        return json.loads(json.dumps(encode_job_data({key: self.shared_data.get(key) for key in JOB_PUBLISHED_KEYS}), default=str))
+
+    def record(self) -> Dict[str, Any]:
+        return {**self.summary(), "state": self.state, "shared": self.shared, "published": self.published()}
+
+# ========================= Job Manager =========================
+
+class JobManager:
+    """
+    Persistent FIFO queue plus a worker pool. A queued job starts as soon as a worker is free and
+    its resource class is under its limit; a job waiting for a busy class does not hold back the
+    jobs of other classes. Each job is recorded in JOBS_PATH when it is queued, starts and finishes.
+    """
+    def __init__(self, jobs_path: str = JOBS_PATH, max_workers: int = JOB_WORKERS, limits: Dict[str, int] = None):
+        self.jobs_path = jobs_path
+        self.max_workers = max(1, max_workers)
+        self.limits = limits or JOB_LIMITS
+        self._jobs: Dict[str, Job] = {}
+        self._queue: List[str] = []
+        self._running = {job_class: 0 for job_class in self.limits}
+        self._lock = threading.RLock()
+        self._closing = False
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        os.makedirs(jobs_path, exist_ok=True)
+
+    # --- Queue -------------------------------------------------------------
+    def submit(self, kind: str, state: Dict[str, Any], shared: Dict[str, Any], linked: Optional[Dict[str, Any]] = None) -> Job:
+        """Queue a job; 'linked' is the DeepEval thread data of a streaming assessment of a JMeter job."""
+        if kind not in JOB_RUNNERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            job = Job(self._new_job_id(kind), kind, state, shared)
+            self._jobs[job.job_id] = job
+            if kind == "jmeter" and linked is not None:
+                self._link_streaming(job, Job(self._new_job_id("deepeval"), "deepeval", state, linked))
+            self._enqueue(job)
+            return job
+
+    def stop(self, job_id: str) -> bool:
+        """Stop a job: a queued one is dropped, a running one is signalled the same way the UI stop buttons do."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.phase not in JOB_ACTIVE_PHASES:
+                return False
+            if job_id in self._queue:
+                self._queue.remove(job_id)
+                job.shared_data['status'] = JOB_KINDS[job.kind].STOPPED
+                thread_safe_add_log(job.shared_data['logs'], "🛑 Job removed from the queue.", agent_name=JOB_AGENTS[job.kind])
+                self._finish(job)
+                linked = self._jobs.get(job.linked_job_id)
+                if linked is not None:
+                    linked.shared_data['status'] = JOB_KINDS[linked.kind].STOPPED
+                    self._finish(linked)
+                return True
+
+        shared_data = job.shared_data
+        shared_data['stop_requested'] = True
+        if job.kind == "jmeter":
+            shared_data['status'] = JOB_KINDS[job.kind].STOPPED
+            stop_jmeter_test_node(shared_data, {})
+        elif job.kind == "sweep" and shared_data.get('jmeter_process') is not None:
+            stop_jmeter_test_node(shared_data, {})  # Between runs (cooldown) the sweep exits on the stop flag
+        return True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """All listed jobs, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+
+    def shutdown(self):
+        """Stop the running jobs and start no others; queued jobs stay queued for the next start."""
+        with self._lock:
+            self._closing = True
+        for job in self.jobs():
+            if job.phase == "running" and not job.parent_job_id:
+                self.stop(job.job_id)
+
+    # --- Persistence -------------------------------------------------------
+    def restore(self):
+        """
+        Reload the job records after a restart: queued jobs are queued again, jobs that were running
+        are marked interrupted (their partial outputs stay on disk), finished jobs are listed.
+        """
+        records = []
+        for name in os.listdir(self.jobs_path):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.jobs_path, name), "r", encoding="utf-8") as file:
+                        records.append(json.load(file))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        records.sort(key=lambda record: record["submitted_at"])
+        finished = [record for record in records if record["phase"] not in JOB_ACTIVE_PHASES]
+
+        with self._lock:
+            for record in finished[-JOB_HISTORY:] + [record for record in records if record["phase"] in JOB_ACTIVE_PHASES]:
+                job = Job(record["job_id"], record["kind"], record["state"], record["shared"], record["submitted_at"])
+                job.shared_data.update(record["published"])
+                job.shared_data['status'] = decode_status(job.kind, record["published"].get("status"))
+                job.phase, job.started_at, job.finished_at = record["phase"], record["started_at"], record["finished_at"]
+                job.parent_job_id, job.linked_job_id = record.get("parent_job_id"), record.get("linked_job_id")
+                self._jobs[job.job_id] = job
+                if job.phase == "running":
+                    job.phase = "interrupted"
+                    job.shared_data['status'] = JOB_KINDS[job.kind].FAILED
+                    job.shared_data['error_message'] = "The job manager stopped while the job was running."
+                    thread_safe_add_log(job.shared_data['logs'], "❌ The job manager stopped while this job was running; its partial outputs are kept.", agent_name="AgentError")
+                    self._finish(job, phase="interrupted")
+
+            for job in [job for job in self._jobs.values() if job.phase == "queued" and not job.parent_job_id]:
+                linked = self._jobs.get(job.linked_job_id)
+                if linked is not None:
+                    self._link_streaming(job, linked)
+                self._enqueue(job)
+
+    def _save(self, job: Job):
+        path = os.path.join(self.jobs_path, f"{job.job_id}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(job.record(), file, default=str)
+        os.replace(f"{path}.tmp", path)
+
+    # --- Scheduling --------------------------------------------------------
+    def _enqueue(self, job: Job):
+        self._queue.append(job.job_id)
+        self._save(job)
+        self._dispatch()
+        if job.phase == "queued":
+            waiting = sum(1 for job_id in self._queue if self._jobs[job_id].submitted_at < job.submitted_at)
+            thread_safe_add_log(job.shared_data['logs'], f"⏳ Job {job.job_id} queued ({self._running[JOB_CLASSES[job.kind]]} {JOB_CLASSES[job.kind].replace('_', ' ')} job(s) running, {waiting} queued ahead).", agent_name=JOB_AGENTS[job.kind])
+
+    def _dispatch(self):
+        """Start the queued jobs that fit, oldest first."""
+        with self._lock:
+            if self._closing:
+                return
+            for job_id in list(self._queue):
+                if sum(self._running.values()) >= self.max_workers:
+                    return
+                job = self._jobs[job_id]
+                job_class = JOB_CLASSES[job.kind]
+                if self._running[job_class] >= self.limits[job_class]:
+                    continue
+                self._queue.remove(job_id)
+                self._running[job_class] += 1
+                for started in filter(None, (job, self._jobs.get(job.linked_job_id))):
+                    started.phase = "running"
+                    started.started_at = time.time()
+                    self._save(started)
+                self._pool.submit(self._run, job)
+
+    def _run(self, job: Job):
+        try:
+            JOB_RUNNERS[job.kind](job.shared_data, job.state)
+        except Exception as e:
+            thread_safe_add_log(job.shared_data['logs'], f"❌ Job {job.job_id} failed: {str(e)}", agent_name="AgentError")
+            job.shared_data['status'] = JOB_KINDS[job.kind].FAILED
+        finally:
+            with self._lock:
+                self._running[JOB_CLASSES[job.kind]] -= 1
+                self._finish(job)
+                if job.linked_job_id in self._jobs:
+                    self._finish(self._jobs[job.linked_job_id])
+                self._dispatch()
+
+    def _finish(self, job: Job, phase: str = "finished"):
+        job.phase = phase
+        job.finished_at = job.finished_at or time.time()
+        self._save(job)
+        finished = [other for other in self.jobs() if other.phase not in JOB_ACTIVE_PHASES]
+        for old in finished[JOB_HISTORY:]:
+            self._jobs.pop(old.job_id, None)   # Record stays on disk; only the listing and logs are dropped
+
+    def _link_streaming(self, job: Job, linked: Job):
+        """Attach a streaming DeepEval judge, fed by the JMeter job's responses, to the linked assessment job."""
+        linked.parent_job_id = job.job_id
+        job.linked_job_id = linked.job_id
+        linked.shared_data['start_time'] = datetime.now()
+        job.shared_data['streaming_judge'] = StreamingJudge(linked.shared_data)
+        self._jobs[linked.job_id] = linked
+        self._save(linked)
+
+    def _new_job_id(self, kind: str) -> str:
+        job_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{kind}"
+        suffix = 1
+        while f"{job_id}_{suffix}" in self._jobs or os.path.exists(os.path.join(self.jobs_path, f"{job_id}_{suffix}.json")):
+            suffix += 1
+        return f"{job_id}_{suffix}"
+
+# ========================= HTTP API =========================
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the job manager (local use only):
+        GET  /health                    -> {"ok": true, "pid": pid, "fingerprint": code_fingerprint() at startup}
+        GET  /jobs                      -> {"jobs": [summary, ...]} newest first
+        GET  /jobs/<id>?since=<seq>     -> {"job": summary, "data": published thread data, "logs": [[seq, created, agent, message], ...], "last_seq": n}
+        POST /jobs                      -> {"kind", "state", "shared", "linked"} -> {"job": summary, "linked_job": summary or null}
+        POST /jobs/<id>/stop            -> {"ok": true|false}
+        POST /shutdown                  -> {"ok": true}, then exits like on Ctrl+C (the UI restarts a stale, idle job manager)
+    """
+    manager: JobManager = None
+    fingerprint: str = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts == ["health"]:
+            return self._reply(200, {"ok": True, "pid": os.getpid(), "fingerprint": self.fingerprint})
+        if parts == ["jobs"]:
+            return self._reply(200, {"jobs": [job.summary() for job in self.manager.jobs()]})
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.manager.get(parts[1])
+            if job is None:
+                return self._reply(404, {"error": f"Unknown job: {parts[1]}"})
+            since = int(parse_qs(url.query).get("since", ["0"])[0])
+            channel = job.shared_data['logs']
+            return self._reply(200, {
+                "job": job.summary(),
+                "data": job.published(),
+                "logs": channel.since(since),
+                "last_seq": channel.last_seq,
+            })
+        self._reply(404, {"error": f"Unknown path: {url.path}"})
+
+    def do_POST(self):
+        parts = urlparse(self.path).path.strip("/").split("/")
+        if parts == ["jobs"]:
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                job = self.manager.submit(payload["kind"], payload.get("state") or {}, payload.get("shared") or {}, payload.get("linked"))
+            except (ValueError, KeyError) as e:
+                return self._reply(400, {"error": str(e)})
+            linked = self.manager.get(job.linked_job_id) if job.linked_job_id else None
+            return self._reply(200, {"job": job.summary(), "linked_job": linked.summary() if linked else None})
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "stop":
+            return self._reply(200, {"ok": self.manager.stop(parts[1])})
+        if parts == ["shutdown"]:
+            self._reply(200, {"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()  # serve_forever returns in serve()
+            return
+        self._reply(404, {"error": f"Unknown path: {'/'.join(parts)}"})
+
+    def _reply(self, code: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Viewers poll every second; request lines would drown the job manager log
+
+def serve(host: str = JOB_MANAGER_HOST, port: int = JOB_MANAGER_PORT):
+    """Run the job manager until interrupted; running jobs are then stopped and their outputs kept."""
+    manager = JobManager()
+    JobRequestHandler.manager = manager
+    JobRequestHandler.fingerprint = code_fingerprint()   # Code and config this process runs with
+    try:
+        server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    except OSError as e:
+        print(f"❌ Job manager cannot listen on {host}:{port} (already running?): {e}")
+        return 1
+    server.daemon_threads = True
+    manager.restore()
+    print(f"🚀 Job manager listening on http://{host}:{port} ({manager.max_workers} workers, limits {manager.limits}, jobs in {manager.jobs_path})")
+    try:
+        server.serve_forever()   # Until Ctrl+C or POST /shutdown
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("🛑 Job manager stopping; waiting for the running jobs to stop (queued jobs stay queued)...")
+        manager.shutdown()
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(serve())
@@ -0,0 +1,262 @@
+# Module with the bodies of the background jobs (load tests, sweeps, DeepEval assessments).
+# They only talk to their shared_data dict, so the same job runs on a job manager worker or,
+# with the job manager disabled, on a background thread of the UI process.
+from datetime import datetime
+
+from src.utils.event_logs import thread_safe_add_log
+from src.tools.jmeter_executor import (
+    run_jmeter_test_node,
+    analyze_jmeter_test_node,
+    analyze_llm_metrics_node,
+    get_analysis_dir
+)
+from src.tools.load_profile import (
+    run_load_profile_node,
+    analyze_load_profile_node
+)
+from src.tools.sweep_runner import run_sweep_node
+from src.tools.deepeval_assessment import (
+    run_deepeval_assessment_node,
+    analyze_deepeval_results_node,
+    make_analysis_id
+)
+from src.tools.deepeval_streaming import finalize_streaming_assessment_node
+from src.tools.quality_under_load import analyze_quality_under_load_node
+from src.tools.analysis_store import save_analysis
+from src.utils.test_state import TestState, DeepEvalTestState
+from src.utils.profiler import save_pipeline_timings
+
+# ========================= JMeter Jobs =========================
+def run_jmeter_job(shared_data, state_snapshot):
+    """Run a JMeter load test (or load profile) and its analysis, publishing status and results in shared_data."""
+    try:
+        # Update status to running in shared data
+        shared_data['status'] = TestState.RUNNING
+        shared_data['stop_requested'] = False  # Add stop flag
+        shared_data['run_timestamp'] = ""      # Reset so timings never attach to a previous run
+        shared_data['logs'].set_run("")        # Logs before the run timestamp exists go to the session log
+        shared_data['pipeline_timings'] = []
+        
+        # A multi-stage load profile replaces the single vusers/ramp-up/duration run
+        if state_snapshot.get("load_profile_enabled"):
+            result = run_load_profile_node(shared_data, state_snapshot)
+        else:
+            result = run_jmeter_test_node(shared_data, state_snapshot)
+
+        # Check if stop was requested before processing results
+        if shared_data.get('stop_requested', False):
+            thread_safe_add_log(shared_data['logs'], "🛑 JMeter test was stopped by user request.", agent_name="JMeterAgent")
+            thread_safe_add_log(shared_data['logs'], "🔍 Skipping analysis - test was stopped.", agent_name="JMeterAgent")
+            shared_data['status'] = TestState.STOPPED
+            return  # Exit early, don't process results
+        # If we reach here, it means the test ran successfully
+        if result:
+            if shared_data.get('abort_reason'):
+                # A guardrail stopped the test: keep going so the partial results are analyzed
+                thread_safe_add_log(shared_data['logs'], f"🚨 JMeter load test aborted by guardrail: {shared_data['abort_reason']}", agent_name="JMeterAgent")
+                thread_safe_add_log(shared_data['logs'], "🔍 Analyzing partial results...", agent_name="JMeterAgent")
+                shared_data['status'] = TestState.ABORTED
+            else:
+                thread_safe_add_log(shared_data['logs'], "✅ JMeter load test executed successfully.", agent_name="JMeterAgent")
+                shared_data['status'] = TestState.COMPLETED
+            shared_data['results'] = result
+            shared_data['jmeter_jtl_path'] = result['jmeter_jtl_path']
+            shared_data['jmeter_log_path'] = result['jmeter_log_path']
+            shared_data['llm_kpis_path'] = result.get('llm_kpis_path', "")
+            shared_data['llm_metrics_path'] = result.get('llm_metrics_path', "")
+            shared_data['llm_responses_path'] = result.get('llm_responses_path', "")
+            shared_data['run_timestamp'] = result.get('run_timestamp', 'NOT_FOUND')
+            shared_data['load_profile_path'] = result.get('load_profile_path', "")
+            thread_safe_add_log(shared_data['logs'], f"📊🔥 Load test results saved to {result['jmeter_jtl_path']}", agent_name="JMeterAgent")
+            thread_safe_add_log(shared_data['logs'], f"📊🔥 Load test log saved to {result['jmeter_log_path']}", agent_name="JMeterAgent")
+            thread_safe_add_log(shared_data['logs'], f"📊🔥 LLM Metrics saved to {result['llm_metrics_path']}", agent_name="JMeterAgent")
+            thread_safe_add_log(shared_data['logs'], f"📊🔥 LLM Responses saved to {result['llm_responses_path']}", agent_name="JMeterAgent")
+
+            # Analyze results in background thread. Only analyze if not stopped
+            if not shared_data.get('stop_requested', False):
+                # --- JMeter Analysis ---
+                thread_safe_add_log(shared_data['logs'], "🔍 Analyzing JMeter load test results...", agent_name="JMeterAgent")
+                jmeter_analysis_result = analyze_jmeter_test_node(shared_data, state_snapshot)
+                if not jmeter_analysis_result:
+                    thread_safe_add_log(shared_data['logs'], "⚠️ No JMeter analysis results found. Check JTL file.", agent_name="AgentError")
+                    shared_data['status'] = TestState.FAILED
+                    return
+
+                thread_safe_add_log(shared_data['logs'], "✅ JMeter load test analysis completed successfully.", agent_name="JMeterAgent")
+
+                # --- LLM Metrics Analysis ---
+                thread_safe_add_log(shared_data['logs'], "🔍 Analyzing LLM token metrics...", agent_name="JMeterAgent")
+                llm_analysis_result = analyze_llm_metrics_node(shared_data, state_snapshot)
+
+                if not llm_analysis_result:
+                    thread_safe_add_log(shared_data['logs'], "⚠️ No LLM metrics found. Test will continue with JMeter results only.", agent_name="JMeterAgent")
+                    # Don't fail the test - LLM metrics are optional
+                    analysis = jmeter_analysis_result
+                else:
+                    thread_safe_add_log(shared_data['logs'], "✅ LLM metrics analysis completed successfully.", agent_name="JMeterAgent")
+                    # Combine both analysis results
+                    analysis = {**jmeter_analysis_result, **llm_analysis_result}
+
+                # --- Load Profile Analysis ---
+                if shared_data.get('load_profile_path'):
+                    thread_safe_add_log(shared_data['logs'], "🔍 Analyzing load profile stages...", agent_name="JMeterAgent")
+                    load_profile_result = analyze_load_profile_node(shared_data, state_snapshot)
+                    if load_profile_result:
+                        analysis = {**analysis, **load_profile_result}
+                    else:
+                        thread_safe_add_log(shared_data['logs'], "⚠️ No per-stage results found for the load profile.", agent_name="JMeterAgent")
+
+                # The analysis is kept once on disk (and in the shared cache); sessions only get the run id
+                save_analysis(get_analysis_dir(shared_data['run_timestamp']), analysis)
+                shared_data['analysis'] = shared_data['run_timestamp']
+
+            else:
+                thread_safe_add_log(shared_data['logs'], "🔍 Skipping analysis - test was stopped.", agent_name="JMeterAgent")
+
+        else:
+            thread_safe_add_log(shared_data['logs'], "❌ JMeter load test failed to execute.", agent_name="AgentError")
+            shared_data['status'] = TestState.FAILED
+            shared_data['results'] = None
+    except Exception as e:
+        thread_safe_add_log(shared_data['logs'], f"❌ JMeter load test execution failed: {str(e)}", agent_name="AgentError")
+        shared_data['status'] = TestState.FAILED
+        shared_data['results'] = None
+    finally:
+        # Judge the last streamed responses (or cancel the streaming judge) before saving timings
+        finish_streaming_deepeval(shared_data, state_snapshot)
+        # Persist per-stage timings next to the run artifacts
+        save_pipeline_timings(shared_data)
+
+def finish_streaming_deepeval(shared_data, state_snapshot):
+    """Complete the streaming DeepEval assessment attached to a JMeter run, if any."""
+    judge = shared_data.get('streaming_judge')
+    if judge is None:
+        return
+    shared_data['streaming_judge'] = None
+    deepeval_data = judge.shared_data
+    try:
+        if shared_data.get('stop_requested', False) or not shared_data.get('results'):
+            judge.cancel()
+            thread_safe_add_log(deepeval_data['logs'], "🛑 Streaming DeepEval stopped with the load test.", agent_name="DeepEvalAgent")
+            deepeval_data['status'] = DeepEvalTestState.STOPPED
+            return
+
+        deepeval_data['run_timestamp'] = shared_data['run_timestamp']
+        deepeval_data['logs'].set_run(shared_data['run_timestamp'])
+        thread_safe_add_log(deepeval_data['logs'], "🏁 Load test finished; judging the last micro-batch...", agent_name="DeepEvalAgent")
+        result = finalize_streaming_assessment_node(deepeval_data, state_snapshot)
+        if not result.get('success'):
+            deepeval_data['status'] = DeepEvalTestState.FAILED
+            deepeval_data['error_message'] = result.get('error', 'Unknown error')
+            return
+
+        deepeval_data['results'] = result
+        deepeval_data['deepeval_output_file'] = result.get('deepeval_output_file', '')
+        analysis = analyze_deepeval_results_node(deepeval_data, state_snapshot)
+        if not analysis or analysis.get('error'):
+            thread_safe_add_log(deepeval_data['logs'], "⚠️ No DeepEval analysis results found. Check results file.", agent_name="AgentError")
+            deepeval_data['status'] = DeepEvalTestState.FAILED
+            return
+
+        attach_quality_under_load(deepeval_data, state_snapshot, analysis)
+        thread_safe_add_log(deepeval_data['logs'], "🏁 Streaming DeepEval assessment completed successfully.", agent_name="DeepEvalAgent")
+        deepeval_data['analysis'] = publish_deepeval_analysis(deepeval_data, analysis)
+        deepeval_data['status'] = DeepEvalTestState.COMPLETED
+    except Exception as e:
+        thread_safe_add_log(deepeval_data['logs'], f"💥 Streaming DeepEval error: {str(e)}", agent_name="DeepEvalAgent")
+        deepeval_data['status'] = DeepEvalTestState.FAILED
+        deepeval_data['error_message'] = str(e)
+    finally:
+        deepeval_data['streaming_judge'] = None
+        save_pipeline_timings(deepeval_data)
+
+# ========================= Sweep Jobs =========================
+def run_sweep_job(shared_data, state_snapshot):
+    """Run the queued jobs of a parameter sweep, publishing status and the final manifest in shared_data."""
+    try:
+        shared_data['status'] = TestState.RUNNING
+        shared_data['stop_requested'] = False
+
+        manifest = run_sweep_node(shared_data, state_snapshot)
+        shared_data['manifest'] = manifest or None
+
+        if shared_data.get('stop_requested', False):
+            thread_safe_add_log(shared_data['logs'], "🛑 Sweep stopped by user request. Resume it to run the remaining jobs.", agent_name="SweepAgent")
+            shared_data['status'] = TestState.STOPPED
+        elif not manifest:
+            shared_data['status'] = TestState.FAILED
+        else:
+            shared_data['status'] = TestState.COMPLETED
+    except Exception as e:
+        thread_safe_add_log(shared_data['logs'], f"❌ Sweep execution failed: {str(e)}", agent_name="AgentError")
+        shared_data['status'] = TestState.FAILED
+
+# ========================= DeepEval Jobs =========================
+def attach_quality_under_load(shared_data, state_snapshot, analysis):
+    """Add the quality-under-load breakdowns to the analysis; a failure here never fails the assessment."""
+    try:
+        correlation = analyze_quality_under_load_node(shared_data, state_snapshot)
+        if correlation:
+            analysis.update(correlation)
+    except Exception as e:
+        thread_safe_add_log(shared_data['logs'], f"⚠️ Quality under load analysis failed: {str(e)}", agent_name="DeepEvalAgent")
+
+def publish_deepeval_analysis(shared_data, analysis):
+    """Save the analysis once in the assessment directory; sessions only get its analysis id."""
+    save_analysis(shared_data['assessment_paths']['analysis_dir'], analysis)
+    return make_analysis_id(shared_data['run_timestamp'], shared_data['assessment_id'])
+
+def run_deepeval_job(shared_data, state_snapshot):
+    """Run a DeepEval quality assessment and its analysis, publishing status, progress and results in shared_data."""
+    try:
+        # 1. Start analysis
+        shared_data['status'] = DeepEvalTestState.RUNNING
+        shared_data['start_time'] = datetime.now()
+        shared_data['pipeline_timings'] = []
+        shared_data['progress'] = 0
+        shared_data['current_test_case'] = 0
+        thread_safe_add_log(shared_data['logs'], "🔄 Running DeepEval assessment node...", agent_name="DeepEvalAgent")
+        result = run_deepeval_assessment_node(shared_data, state_snapshot)
+
+        if result.get('success'):
+            shared_data['status'] = DeepEvalTestState.COMPLETED
+            shared_data['results'] = result
+            shared_data['deepeval_output_file'] = result.get('deepeval_output_file', '')
+            thread_safe_add_log(shared_data['logs'], "✅ DeepEval assessment node completed.", agent_name="DeepEvalAgent")
+
+            # 2. Process analysis results
+            thread_safe_add_log(shared_data['logs'], "🔍 Analyzing DeepEval results...", agent_name="DeepEvalAgent")
+            analysis = analyze_deepeval_results_node(shared_data, state_snapshot)
+            if not analysis or analysis.get('error'):
+                thread_safe_add_log(shared_data['logs'], "⚠️ No DeepEval analysis results found. Check results file.", agent_name="AgentError")
+                shared_data['status'] = DeepEvalTestState.FAILED
+                shared_data['analysis'] = None
+                shared_data['error_message'] = (analysis or {}).get('error') or "No analysis results found."
+                return
+
+            # 3. Correlate quality with the load conditions of each request
+            attach_quality_under_load(shared_data, state_snapshot, analysis)
+
+            # 4. Finalize
+            thread_safe_add_log(shared_data['logs'], "🏁 DeepEval assessment completed successfully.", agent_name="DeepEvalAgent")
+            shared_data['analysis'] = publish_deepeval_analysis(shared_data, analysis)
+            shared_data['status'] = DeepEvalTestState.COMPLETED
+
+        else:
+            error = result.get('error', 'Unknown error')
+            thread_safe_add_log(shared_data['logs'], f"❌ DeepEval assessment failed: {error}", agent_name="DeepEvalAgent")
+            # Update shared_data instead of session state directly
+            shared_data['status'] = DeepEvalTestState.FAILED
+            shared_data['error_message'] = error
+            shared_data['results'] = None
+            return
+
+    except Exception as e:
+        # Unexpected error handling
+        thread_safe_add_log(shared_data['logs'], f"💥 DeepEval thread error: {str(e)}", agent_name="DeepEvalAgent")
+        shared_data['status'] = DeepEvalTestState.FAILED
+        shared_data['error_message'] = str(e)
+        shared_data['results'] = None
+    finally:
+        # Persist per-stage timings next to the run artifacts
+        save_pipeline_timings(shared_data)
@@ -0,0 +1,371 @@
+# Module to run multi-stage load profiles (step, spike, soak) as a single load test
+import os
+import csv
+import json
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import pandas as pd
+import numpy as np
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+from src.utils.cooldown import wait_cooldown
+from src.tools.jmeter_executor import build_jmeter_command, execute_jmeter, get_run_file_paths, start_run_logs
+from src.tools.llm_kpi_calculator import read_llm_metrics_csv, compute_llm_kpis_from_metrics
+from src.utils.profiler import profile_node, stage_timer, record_rows
+
+# Load configurations
+config = load_config()
+load_profile_config = config.get("load_profile", {})
+jmeter_results_path = config.get("jmeter", {}).get("jmeter_results_path", "jmeter/test_results")
+
+STAGE_RAMP_UP = load_profile_config.get("stage_ramp_up", 10)           # Default ramp-up for preset stages (seconds)
+STEP_USERS = load_profile_config.get("step_users", [1, 4, 8, 16, 32])  # User ladder for the step preset
+STEP_HOLD = load_profile_config.get("step_hold", 120)                  # Hold time per step (seconds)
+SPIKE_USERS = load_profile_config.get("spike_users", 32)               # Peak users for the spike preset
+SPIKE_HOLD = load_profile_config.get("spike_hold", 60)                 # Hold time at the spike peak (seconds)
+SOAK_USERS = load_profile_config.get("soak_users", 8)                  # Users for the soak preset
+SOAK_HOLD = load_profile_config.get("soak_hold", 1800)                 # Soak duration (seconds)
+STAGE_COOLDOWN = load_profile_config.get("stage_cooldown", 0)          # Pause between stages (seconds)
+KEEP_STAGE_FILES = load_profile_config.get("keep_stage_files", False)  # Keep the per-stage output files after merging
+
+STAGE_FIELDS = ["name", "vusers", "ramp_up", "hold"]
+PRESETS = ["Step", "Spike", "Soak", "Step + Spike + Soak"]
+
+# ========================= Profile Definition =========================
+
+def build_preset_profile(preset: str) -> List[Dict[str, Any]]:
+    """Return the stages of a preset load profile using the configured defaults."""
+    step = [
+        {"name": f"step {users}u", "vusers": users, "ramp_up": STAGE_RAMP_UP, "hold": STEP_HOLD}
+        for users in STEP_USERS
+    ]
+    base_users = STEP_USERS[0] if STEP_USERS else 1
+    spike = [
+        {"name": "baseline", "vusers": base_users, "ramp_up": STAGE_RAMP_UP, "hold": STEP_HOLD},
+        {"name": "spike", "vusers": SPIKE_USERS, "ramp_up": 1, "hold": SPIKE_HOLD},
+        {"name": "recovery", "vusers": base_users, "ramp_up": STAGE_RAMP_UP, "hold": STEP_HOLD},
+    ]
+    soak = [{"name": "soak", "vusers": SOAK_USERS, "ramp_up": STAGE_RAMP_UP, "hold": SOAK_HOLD}]
+
+    if preset == "Step":
+        return step
+    if preset == "Spike":
+        return spike
+    if preset == "Soak":
+        return soak
+    if preset == "Step + Spike + Soak":
+        return step + spike[1:] + soak
+    raise ValueError(f"Unknown load profile preset: {preset}")
+
+def normalize_load_profile(stages: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Validate the stages entered in the UI and return them as clean dicts.
+    Rows without a user count are dropped; invalid values raise ValueError.
+    """
+    normalized = []
+    for row in stages or []:
+        vusers = _as_int(row.get("vusers"))
+        if vusers is None:
+            continue
+        ramp_up = _as_int(row.get("ramp_up")) or 0
+        hold = _as_int(row.get("hold")) or 0
+        if vusers < 1:
+            raise ValueError(f"Stage {len(normalized) + 1}: virtual users must be at least 1")
+        if ramp_up < 0 or hold < 1:
+            raise ValueError(f"Stage {len(normalized) + 1}: ramp-up must be >= 0 and hold >= 1 second")
+        name = str(row.get("name") or "").strip() or f"stage {len(normalized) + 1}"
+        # Names are written into CSV rows and file manifests, so keep them to a safe character set
+        name = "".join(ch if ch.isalnum() or ch in " -_+." else "_" for ch in name)
+        normalized.append({"name": name, "vusers": vusers, "ramp_up": ramp_up, "hold": hold})
+    return normalized
+
+def describe_load_profile(stages: List[Dict[str, Any]]) -> str:
+    """One-line summary of a load profile, e.g. '5 stages, 1→4→8→16→32 users, 11m 40s'."""
+    if not stages:
+        return "no stages"
+    total_seconds = sum(stage["ramp_up"] + stage["hold"] for stage in stages)
+    minutes, seconds = divmod(int(total_seconds), 60)
+    users = "→".join(str(stage["vusers"]) for stage in stages)
+    return f"{len(stages)} stages, {users} users, {minutes}m {seconds}s"
+
+# ========================= Load Profile Nodes =========================
+
+@profile_node("run_load_profile")
+def run_load_profile_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run each stage of the load profile as a JMeter invocation against the same target.
+    Every stage loops until its ramp-up + hold time has elapsed and is then shut down gracefully.
+    The stage outputs are merged into the run's JTL, LLM metrics and LLM responses files
+    with stage columns, so the regular analysis covers the whole profile.
+    """
+    run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    start_run_logs(shared_data, run_timestamp)
+
+    jmx_path = state.get("jmx_path")
+    if not jmx_path or not os.path.exists(jmx_path):
+        thread_safe_add_log(shared_data['logs'], "❌ No valid JMX file found. Please select JMX first.", agent_name="AgentError")
+        return {}
+    try:
+        stages = normalize_load_profile(state.get("load_profile"))
+    except (TypeError, ValueError) as e:
+        thread_safe_add_log(shared_data['logs'], f"❌ Invalid load profile: {e}", agent_name="AgentError")
+        return {}
+    if not stages:
+        thread_safe_add_log(shared_data['logs'], "❌ Load profile has no stages. Add at least one stage.", agent_name="AgentError")
+        return {}
+
+    shared_data['abort_reason'] = None
+    thread_safe_add_log(shared_data['logs'], f"🪜 Running load profile: {describe_load_profile(stages)}", agent_name="LoadProfileAgent")
+
+    stage_runs = []
+    for index, stage in enumerate(stages, start=1):
+        if shared_data.get('stop_requested') or shared_data.get('abort_reason'):
+            break
+
+        stage_timestamp = f"{run_timestamp}_s{index:02d}"
+        stage_seconds = stage["ramp_up"] + stage["hold"]
+        settings = {**state, "vusers": stage["vusers"], "ramp_up": stage["ramp_up"], "iterations": -1, "duration": stage_seconds}
+        cmd = build_jmeter_command(jmx_path, stage_timestamp, settings, autoflush=True)
+        stage_files = get_run_file_paths(stage_timestamp)
+
+        thread_safe_add_log(shared_data['logs'], f"🪜 Stage {index}/{len(stages)} '{stage['name']}': {stage['vusers']} users, {stage['ramp_up']}s ramp-up, {stage['hold']}s hold", agent_name="LoadProfileAgent")
+        started_at = time.time()
+        try:
+            with stage_timer(f"stage_{index:02d}"):
+                return_code, supervisor = execute_jmeter(cmd, stage_files, shared_data, max_seconds=stage_seconds)
+        except OSError as e:
+            thread_safe_add_log(shared_data['logs'], f"❌ Stage {index} failed to start: {e}", agent_name="AgentError")
+            break
+
+        if return_code != 0 and not supervisor.stop_requested:
+            thread_safe_add_log(shared_data['logs'], f"❌ Stage {index} failed: JMeter exited with code {return_code}", agent_name="AgentError")
+            break
+
+        stage_runs.append({
+            **stage,
+            "stage": index,
+            "run_timestamp": stage_timestamp,
+            "started_at": started_at,
+            "ended_at": time.time(),
+            "stop_reason": supervisor.stop_reason,
+            "files": stage_files,
+        })
+
+        if STAGE_COOLDOWN and index < len(stages):
+            wait_cooldown(shared_data, STAGE_COOLDOWN, "stage", "LoadProfileAgent")
+
+    if not stage_runs:
+        return {}
+    if len(stage_runs) < len(stages):
+        thread_safe_add_log(shared_data['logs'], f"⚠️ Load profile ended after {len(stage_runs)} of {len(stages)} stages.", agent_name="LoadProfileAgent")
+
+    # A streaming judge reads the stage responses files to the end before they are merged and removed
+    judge = shared_data.get('streaming_judge')
+    if judge is not None:
+        judge.drain()
+
+    run_files = get_run_file_paths(run_timestamp)
+    with stage_timer("merge_stages"):
+        rows = merge_stage_outputs(stage_runs, run_files)
+    record_rows(rows)
+
+    profile_file = get_load_profile_file(run_timestamp)
+    with open(profile_file, 'w') as file:
+        json.dump({
+            "run_timestamp": run_timestamp,
+            "planned_stages": len(stages),
+            "stages": [{key: value for key, value in stage_run.items() if key != "files"} for stage_run in stage_runs],
+        }, file, indent=2)
+    thread_safe_add_log(shared_data['logs'], f"🪜 Load profile complete: {len(stage_runs)} stages, {rows:,} samples merged. Stage windows saved to {profile_file}", agent_name="LoadProfileAgent")
+
+    return {**run_files, "run_timestamp": run_timestamp, "load_profile_path": profile_file}
+
+@profile_node("analyze_load_profile")
+def analyze_load_profile_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build per-stage KPI tables and a scalability curve (KPIs by concurrency level)
+    from the merged, stage-tagged JTL and LLM metrics files.
+    """
+    jtl_path = shared_data.get('jmeter_jtl_path', None)
+    profile = load_load_profile(shared_data.get('run_timestamp'))
+    if not profile or not jtl_path or not os.path.exists(jtl_path):
+        thread_safe_add_log(shared_data['logs'], "❌ No load profile results found for this run.", agent_name="AgentError")
+        return {}
+
+    with stage_timer("jtl_parse"):
+        df = pd.read_csv(jtl_path)
+    record_rows(len(df))
+    if df.empty or 'stage' not in df.columns:
+        thread_safe_add_log(shared_data['logs'], "❌ JTL file has no stage-tagged samples.", agent_name="AgentError")
+        return {}
+    df['success'] = df['success'] if df['success'].dtype == bool else df['success'].astype(str).str.lower() == 'true'
+
+    with stage_timer("aggregate"):
+        stage_table = _aggregate_samples(df, 'stage')
+        curve = _aggregate_samples(df, 'stage_vusers').rename(columns={'stage_vusers': 'vusers'})
+
+        llm_metrics_path = shared_data.get('llm_metrics_path', None)
+        if llm_metrics_path and os.path.exists(llm_metrics_path):
+            metrics_df = read_llm_metrics_csv(llm_metrics_path, shared_data, agent_name="LoadProfileAgent")
+            if not metrics_df.empty and 'stage' in metrics_df.columns:
+                kpi_df = compute_llm_kpis_from_metrics(metrics_df)
+                stage_table = stage_table.merge(_aggregate_llm_kpis(kpi_df, 'stage', stage_table), on='stage', how='left')
+                curve = curve.merge(
+                    _aggregate_llm_kpis(kpi_df, 'stage_vusers', curve.rename(columns={'vusers': 'stage_vusers'})).rename(columns={'stage_vusers': 'vusers'}),
+                    on='vusers', how='left')
+
+        # Stage names/plan come from the saved profile; KPIs come from the samples
+        plan = pd.DataFrame(profile['stages'])[['stage', 'name', 'vusers', 'ramp_up', 'hold', 'stop_reason']]
+        stage_table = plan.merge(stage_table, on='stage', how='left')
+
+        # Scaling efficiency: throughput per user relative to the lowest concurrency level
+        curve = curve.sort_values('vusers').reset_index(drop=True)
+        base = curve.iloc[0]
+        base_per_user = base['throughput_rps'] / base['vusers'] if base['vusers'] else 0
+        curve['scaling_efficiency_pct'] = (curve['throughput_rps'] / (curve['vusers'] * base_per_user) * 100) if base_per_user else np.nan
+
+    thread_safe_add_log(shared_data['logs'], f"✅ Load profile analysis complete: {len(stage_table)} stages, {len(curve)} concurrency levels", agent_name="LoadProfileAgent")
+    return {
+        "load_profile": {
+            "stage_table": stage_table,
+            "scalability_df": curve,
+            "planned_stages": profile.get('planned_stages', len(stage_table)),
+        }
+    }
+
+# ========================= Persistence =========================
+
+def get_load_profile_file(run_timestamp: str) -> str:
+    """Return the load profile (stage windows) file path stored next to the run artifacts."""
+    return os.path.join(jmeter_results_path, f"{run_timestamp}_load_profile.json")
+
+def load_load_profile(run_timestamp: str) -> Optional[Dict[str, Any]]:
+    """Load the saved load profile of a run (None if the run was not a load profile run)."""
+    if not run_timestamp:
+        return None
+    profile_file = get_load_profile_file(run_timestamp)
+    if not os.path.exists(profile_file):
+        return None
+    try:
+        with open(profile_file, 'r') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def merge_stage_outputs(stage_runs: List[Dict[str, Any]], run_files: Dict[str, str]) -> int:
+    """
+    Concatenate the per-stage JTL, LLM metrics and LLM responses files into the run's files,
+    tagging every row with stage, stage_name and stage_vusers. Returns the number of JTL samples merged.
+    """
+    samples = _merge_csv_files(stage_runs, 'jmeter_jtl_path', run_files['jmeter_jtl_path'])
+    _merge_csv_files(stage_runs, 'llm_metrics_path', run_files['llm_metrics_path'])
+
+    with open(run_files['llm_responses_path'], 'w', encoding='utf-8') as out:
+        for stage_run in stage_runs:
+            for line in _read_lines(stage_run['files']['llm_responses_path']):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                record.update(_stage_tags(stage_run))
+                out.write(json.dumps(record) + "\n")
+
+    with open(run_files['jmeter_log_path'], 'w', encoding='utf-8') as out:
+        for stage_run in stage_runs:
+            out.write(f"===== Stage {stage_run['stage']}: {stage_run['name']} ({stage_run['vusers']} users) =====\n")
+            out.writelines(line + "\n" for line in _read_lines(stage_run['files']['jmeter_log_path']))
+
+    if not KEEP_STAGE_FILES:
+        for stage_run in stage_runs:
+            for path in stage_run['files'].values():
+                if os.path.exists(path):
+                    os.remove(path)
+    return samples
+
+# ========================= Helper Functions =========================
+
+def _as_int(value) -> Optional[int]:
+    """Convert an editor cell to int; empty cells (None/NaN) become None."""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value == "":
+        return None
+    return int(value)
+
+def _stage_tags(stage_run: Dict[str, Any]) -> Dict[str, Any]:
+    return {"stage": stage_run['stage'], "stage_name": stage_run['name'], "stage_vusers": stage_run['vusers']}
+
+def _read_lines(path: str) -> List[str]:
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        return [line.rstrip("\r\n") for line in file if line.strip()]
+
+def _merge_csv_files(stage_runs: List[Dict[str, Any]], file_key: str, output_path: str) -> int:
+    """Merge CSV files with a header row, appending the stage tag columns. Returns the data row count."""
+    header = None
+    rows = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as out:
+        writer = csv.writer(out)
+        for stage_run in stage_runs:
+            path = stage_run['files'][file_key]
+            if not os.path.exists(path):
+                continue
+            tags = list(_stage_tags(stage_run).values())
+            with open(path, 'r', newline='', encoding='utf-8', errors='replace') as file:
+                reader = csv.reader(file)
+                stage_header = next(reader, None)
+                if stage_header is None:
+                    continue
+                if header is None:
+                    header = stage_header
+                    writer.writerow(header + ["stage", "stage_name", "stage_vusers"])
+                for row in reader:
+                    if not row or row == stage_header:
+                        continue
+                    writer.writerow(row + tags)
+                    rows += 1
+    return rows
+
+def _stage_window_seconds(df: pd.DataFrame) -> float:
+    """Sum of the per-stage sample windows (first sample start to last sample end) in seconds."""
+    ends = (df['timeStamp'] + df['elapsed']).groupby(df['stage']).max()
+    starts = df.groupby('stage')['timeStamp'].min()
+    return float(((ends - starts) / 1000).sum())
+
+def _aggregate_samples(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Response time, error and throughput KPIs of JTL samples grouped by 'key'."""
+    rows = []
+    for value, group in df.groupby(key):
+        window = _stage_window_seconds(group)
+        elapsed = group['elapsed']
+        rows.append({
+            key: value,
+            "samples": len(group),
+            "errors": int((~group['success']).sum()),
+            "error_rate": (~group['success']).mean() * 100,
+            "avg": elapsed.mean(),
+            "pct50": np.percentile(elapsed, 50),
+            "pct90": np.percentile(elapsed, 90),
+            "pct95": np.percentile(elapsed, 95),
+            "max": elapsed.max(),
+            "window_seconds": window,
+            "throughput_rps": len(group) / window if window > 0 else 0,
+        })
+    return pd.DataFrame(rows)
+
+def _aggregate_llm_kpis(kpi_df: pd.DataFrame, key: str, windows: pd.DataFrame) -> pd.DataFrame:
+    """TTFT/TPOT/TPS KPIs grouped by 'key'; output tokens/s uses the JTL sample windows."""
+    window_by_key = windows.set_index(key)['window_seconds'] if key in windows.columns else pd.Series(dtype=float)
+    rows = []
+    for value, group in kpi_df.groupby(key):
+        window = window_by_key.get(value, 0)
+        rows.append({
+            key: value,
+            "ttft_avg": group['TTFT'].mean(),
+            "ttft_pct90": np.percentile(group['TTFT'], 90),
+            "tpot_avg": group['TPOT'].mean(),
+            "tps_avg": group['TPS'].mean(),
+            "output_tokens_per_sec": group['eval_count'].sum() / window if window > 0 else 0,
+        })
+    return pd.DataFrame(rows)
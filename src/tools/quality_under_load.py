@@ -0,0 +1,155 @@
+# Module to correlate DeepEval quality outcomes with the load conditions of each request
+import os
+import numpy as np
+import pandas as pd
+from statistics import NormalDist
+from typing import Dict, Any, Optional
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+from src.utils.profiler import profile_node, stage_timer, record_rows
+from src.tools.llm_kpi_calculator import read_llm_metrics_csv, calculate_ttft
+from src.tools.jmeter_executor import get_run_file_paths
+from src.tools.deepeval_results_store import ResultsStore
+
+# Load configurations
+config = load_config()
+quality_config = config.get("quality_under_load", {})
+
+JOIN_TOLERANCE_MS = quality_config.get("join_tolerance_ms", 2000)          # Max distance between a response and its metrics row
+TIME_WINDOW_SECONDS = quality_config.get("time_window_seconds", 60)        # Width of the time windows
+TTFT_BUCKETS = quality_config.get("ttft_buckets", 4)                       # Number of TTFT quantile buckets
+CONFIDENCE = quality_config.get("confidence", 0.95)                        # Confidence level of the intervals
+
+# ========================= Framework Node Functions =========================
+
+@profile_node("analyze_quality_under_load")
+def analyze_quality_under_load_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Join the per-case DeepEval results (columnar results store) with the _llm_metrics.csv rows of the same requests and
+    break pass rate and mean score down by concurrency (allThreads), TTFT bucket and time window.
+
+    Returns:
+        dict: {"quality_under_load": {...}} to merge into the DeepEval analysis, or None if nothing could be joined.
+    """
+    run_timestamp = shared_data['run_timestamp']
+    metrics_path = shared_data.get('llm_metrics_path') or get_run_file_paths(run_timestamp)['llm_metrics_path']
+    if not os.path.exists(metrics_path):
+        thread_safe_add_log(shared_data['logs'], f"⚠️ Quality under load skipped: {os.path.basename(metrics_path)} not found.", agent_name="DeepEvalAgent")
+        return None
+
+    with stage_timer("load_inputs"):
+        cases_df = build_case_frame(ResultsStore(shared_data['results_store_file']))
+        metrics_df = read_llm_metrics_csv(metrics_path, shared_data, agent_name="DeepEvalAgent")
+    if cases_df.empty or metrics_df.empty:
+        return None
+
+    with stage_timer("join"):
+        joined = join_cases_with_metrics(cases_df, metrics_df)
+    record_rows(len(joined))
+    matched = joined['allThreads'].notna().sum() if 'allThreads' in joined.columns else 0
+    thread_safe_add_log(shared_data['logs'], f"📈 Quality under load: matched {matched}/{len(cases_df)} cases to their load metrics.", agent_name="DeepEvalAgent")
+    if not matched:
+        return None
+
+    joined = joined[joined['allThreads'].notna()].copy()
+    joined['allThreads'] = joined['allThreads'].astype(int)
+    joined['ttft_bucket'] = ttft_buckets(joined['ttft_ms'])
+    start_ms = joined['timestamp'].min()
+    joined['time_window_s'] = ((joined['timestamp'] - start_ms) // (TIME_WINDOW_SECONDS * 1000) * TIME_WINDOW_SECONDS).astype(int)
+
+    with stage_timer("breakdowns"):
+        result = {
+            "by_concurrency": quality_breakdown(joined, 'allThreads').to_dict(orient="records"),
+            "by_ttft_bucket": quality_breakdown(joined, 'ttft_bucket').to_dict(orient="records"),
+            "by_time_window": quality_breakdown(joined, 'time_window_s').to_dict(orient="records"),
+            "matched_cases": int(matched),
+            "total_cases": int(len(cases_df)),
+            "confidence": CONFIDENCE,
+            "time_window_seconds": TIME_WINDOW_SECONDS,
+        }
+    return {"quality_under_load": result}
+
+# ========================= Supporting Utility Functions =========================
+
+def build_case_frame(store: ResultsStore) -> pd.DataFrame:
+    """One row per DeepEval case: order, question_number, sample_timestamp, success, score (mean of its metric scores, read from the results store)."""
+    cases_df = store.read_columns(["case_number", "question_number", "sample_timestamp", "success", "score"])
+    cases_df["order"] = cases_df.pop("case_number") - 1
+    cases_df["question_number"] = cases_df["question_number"].astype(str)
+    return cases_df[["order", "question_number", "sample_timestamp", "success", "score"]]
+
+def join_cases_with_metrics(cases_df: pd.DataFrame, metrics_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attach timestamp, allThreads and TTFT of the matching metrics row to each case.
+    Cases with a sample_timestamp use a sorted as-of join on the timestamp within the same
+    question_number (nearest row within JOIN_TOLERANCE_MS). Older response files without it are
+    matched by the n-th occurrence of the question_number in time order.
+    """
+    metrics = metrics_df.copy()
+    metrics["question_number"] = metrics["question_number"].astype(str)
+    metrics["timestamp"] = pd.to_numeric(metrics["timestamp"], errors="coerce")
+    metrics = metrics.dropna(subset=["timestamp"])
+    metrics["ttft_ms"] = calculate_ttft(metrics["load_duration_ms"], metrics["prompt_eval_duration_ms"])
+    columns = ["question_number", "timestamp", "allThreads", "ttft_ms"]
+    metrics = metrics[[col for col in columns if col in metrics.columns]].sort_values("timestamp", kind="mergesort")
+    metrics["timestamp"] = metrics["timestamp"].astype("int64")
+
+    timed = cases_df[cases_df["sample_timestamp"].notna()].copy()
+    untimed = cases_df[cases_df["sample_timestamp"].isna()].copy()
+    parts = []
+
+    if not timed.empty:
+        timed["sample_timestamp"] = timed["sample_timestamp"].astype("int64")
+        parts.append(pd.merge_asof(
+            timed.sort_values("sample_timestamp", kind="mergesort"),
+            metrics,
+            left_on="sample_timestamp",
+            right_on="timestamp",
+            by="question_number",
+            direction="nearest",
+            tolerance=JOIN_TOLERANCE_MS,
+        ))
+
+    if not untimed.empty:
+        untimed["occurrence"] = untimed.sort_values("order").groupby("question_number").cumcount()
+        metrics["occurrence"] = metrics.groupby("question_number").cumcount()
+        parts.append(untimed.merge(metrics, on=["question_number", "occurrence"], how="left").drop(columns="occurrence"))
+
+    joined = pd.concat(parts, ignore_index=True) if parts else cases_df.assign(timestamp=np.nan, allThreads=np.nan, ttft_ms=np.nan)
+    return joined.sort_values("order", kind="mergesort").reset_index(drop=True)
+
+def ttft_buckets(ttft_ms: pd.Series) -> pd.Series:
+    """Ordered quantile buckets of TTFT labelled with their ms range (fewer buckets when values repeat)."""
+    buckets = pd.qcut(ttft_ms, q=TTFT_BUCKETS, duplicates="drop")
+    return buckets.cat.rename_categories(lambda interval: f"{interval.left:.0f}–{interval.right:.0f} ms")
+
+def wilson_interval(passes: np.ndarray, n: np.ndarray, confidence: float = CONFIDENCE):
+    """Wilson score interval of a binomial proportion (vectorized), in percent."""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    n = n.astype(float)
+    p = np.divide(passes, n, out=np.zeros_like(n), where=n > 0)
+    denominator = 1 + z ** 2 / n
+    center = (p + z ** 2 / (2 * n)) / denominator
+    margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return (center - margin) * 100, (center + margin) * 100
+
+def quality_breakdown(joined: pd.DataFrame, column: str, confidence: float = CONFIDENCE) -> pd.DataFrame:
+    """Pass rate and mean score per value of 'column' (returned as 'group') with Wilson (pass rate) and normal-approximation (score) confidence intervals."""
+    grouped = joined.groupby(column, sort=True, observed=True).agg(
+        cases=("success", "size"),
+        passes=("success", "sum"),
+        mean_score=("score", "mean"),
+        score_std=("score", "std"),
+    ).reset_index()
+
+    ci_low, ci_high = wilson_interval(grouped["passes"].to_numpy(), grouped["cases"].to_numpy(), confidence)
+    grouped["pass_rate_pct"] = grouped["passes"] / grouped["cases"] * 100
+    grouped["pass_rate_ci_low"] = ci_low
+    grouped["pass_rate_ci_high"] = ci_high
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    margin = z * grouped["score_std"].fillna(0) / np.sqrt(grouped["cases"])
+    grouped["score_ci_low"] = (grouped["mean_score"] - margin).clip(lower=0)
+    grouped["score_ci_high"] = (grouped["mean_score"] + margin).clip(upper=1)
+    return grouped.drop(columns="score_std").rename(columns={column: "group"})
@@ -0,0 +1,264 @@
+# Module to run parameter sweeps (vusers x temperature x prompt_num x model) as a queue of load tests
+import os
+import json
+import itertools
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import yaml
+import pandas as pd
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+from src.utils.cooldown import wait_cooldown
+from src.tools.jmeter_executor import (
+    run_jmeter_test_node,
+    analyze_jmeter_test_node,
+    analyze_llm_metrics_node,
+)
+from src.utils.profiler import save_pipeline_timings
+
+# Load configurations
+config = load_config()
+sweep_config = config.get("sweep", {})
+jmeter_results_path = config.get("jmeter", {}).get("jmeter_results_path", "jmeter/test_results")
+
+SWEEP_RESULTS_PATH = sweep_config.get("sweep_results_path", os.path.join(jmeter_results_path, "sweeps"))
+SWEEP_DEFINITIONS_PATH = sweep_config.get("sweep_definitions_path", os.path.join(config.get("jmeter", {}).get("jmeter_path", "jmeter"), "sweeps"))
+DEFAULT_COOLDOWN = sweep_config.get("cooldown", 30)            # Pause between runs (seconds)
+RETRY_FAILED = sweep_config.get("retry_failed", False)         # Re-run failed jobs when a sweep is resumed
+
+# Parameters that can be swept; everything else in 'base' is passed through unchanged
+SWEEP_PARAMETERS = ["vusers", "temperature", "prompt_num", "model"]
+JOB_DONE_STATES = ("completed", "aborted")
+
+# ========================= Sweep Definition =========================
+
+def parse_sweep_definition(text: str) -> Dict[str, Any]:
+    """
+    Parse and validate a YAML sweep definition:
+        name: <sweep name>
+        base: {ramp_up: 10, iterations: 5, duration: 300, use_rag: false}
+        matrix: {vusers: [1, 4, 8], temperature: [0.2, 0.8], prompt_num: [5], model: ["llama3.2:1b"]}
+        cooldown: 30
+    Raises ValueError when the definition is invalid.
+    """
+    try:
+        definition = yaml.safe_load(text) or {}
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML: {e}")
+    if not isinstance(definition, dict):
+        raise ValueError("Sweep definition must be a mapping")
+
+    matrix = definition.get("matrix") or {}
+    if not isinstance(matrix, dict) or not matrix:
+        raise ValueError("Sweep definition needs a non-empty 'matrix'")
+    unknown = set(matrix) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unsupported matrix parameters: {', '.join(sorted(unknown))} (supported: {', '.join(SWEEP_PARAMETERS)})")
+    for name, values in matrix.items():
+        if not isinstance(values, list):
+            matrix[name] = [values]
+        if not matrix[name]:
+            raise ValueError(f"Matrix parameter '{name}' has no values")
+
+    base = definition.get("base") or {}
+    if not isinstance(base, dict):
+        raise ValueError("'base' must be a mapping of JMeter settings")
+
+    return {
+        "name": str(definition.get("name") or "sweep"),
+        "base": base,
+        "matrix": matrix,
+        "cooldown": definition.get("cooldown", DEFAULT_COOLDOWN),
+    }
+
+def expand_sweep(definition: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Expand the matrix into the cartesian product of runs (in matrix key order) as queued jobs."""
+    names = list(definition["matrix"])
+    combinations = itertools.product(*(definition["matrix"][name] for name in names))
+    return [
+        {"job_id": f"job{index:03d}", "params": dict(zip(names, values)), "status": "pending",
+         "run_timestamp": None, "started_at": None, "finished_at": None, "kpis": None, "error": None}
+        for index, values in enumerate(combinations, start=1)
+    ]
+
+def list_sweep_definitions() -> List[str]:
+    """Return the YAML sweep definition files available in the sweep definitions folder."""
+    if not os.path.isdir(SWEEP_DEFINITIONS_PATH):
+        return []
+    return sorted(f for f in os.listdir(SWEEP_DEFINITIONS_PATH) if f.endswith((".yaml", ".yml")))
+
+def read_sweep_definition_file(filename: str) -> str:
+    with open(os.path.join(SWEEP_DEFINITIONS_PATH, filename), 'r') as file:
+        return file.read()
+
+# ========================= Sweep Manifest =========================
+
+def get_sweep_manifest_file(sweep_id: str) -> str:
+    """Return the manifest path of a sweep."""
+    return os.path.join(SWEEP_RESULTS_PATH, f"{sweep_id}_sweep_manifest.json")
+
+def create_sweep_manifest(definition: Dict[str, Any], jmx_path: str) -> Dict[str, Any]:
+    """Create and save the manifest (job queue + results) of a new sweep."""
+    sweep_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    manifest = {
+        "sweep_id": sweep_id,
+        "name": definition["name"],
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "jmx_path": jmx_path,
+        "definition": definition,
+        "jobs": expand_sweep(definition),
+    }
+    save_sweep_manifest(manifest)
+    return manifest
+
+def save_sweep_manifest(manifest: Dict[str, Any]):
+    """Write the manifest atomically so a crash mid-write never corrupts the job queue."""
+    manifest_file = get_sweep_manifest_file(manifest["sweep_id"])
+    os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+    temp_file = manifest_file + ".tmp"
+    with open(temp_file, 'w') as file:
+        json.dump(manifest, file, indent=2, default=str)
+    os.replace(temp_file, manifest_file)
+
+def load_sweep_manifest(sweep_id: str) -> Optional[Dict[str, Any]]:
+    manifest_file = get_sweep_manifest_file(sweep_id)
+    if not os.path.exists(manifest_file):
+        return None
+    try:
+        with open(manifest_file, 'r') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def list_sweep_manifests() -> List[Dict[str, Any]]:
+    """Return a summary of the saved sweeps, newest first (used to pick a sweep to resume)."""
+    if not os.path.isdir(SWEEP_RESULTS_PATH):
+        return []
+    sweeps = []
+    for filename in sorted(os.listdir(SWEEP_RESULTS_PATH), reverse=True):
+        if not filename.endswith("_sweep_manifest.json"):
+            continue
+        manifest = load_sweep_manifest(filename[:-len("_sweep_manifest.json")])
+        if manifest:
+            sweeps.append({
+                "sweep_id": manifest["sweep_id"],
+                "name": manifest["name"],
+                "jobs": len(manifest["jobs"]),
+                "done": sum(1 for job in manifest["jobs"] if job["status"] in JOB_DONE_STATES),
+            })
+    return sweeps
+
+def get_pending_jobs(manifest: Dict[str, Any], retry_failed: bool = RETRY_FAILED) -> List[Dict[str, Any]]:
+    """
+    Jobs still to run. A job left 'running' was interrupted (crash or stop) and is re-run;
+    failed jobs are re-run only when retry_failed is set.
+    """
+    retry_states = ("pending", "running", "stopped") + (("failed",) if retry_failed else ())
+    return [job for job in manifest["jobs"] if job["status"] in retry_states]
+
+# ========================= Sweep Nodes =========================
+
+def run_sweep_node(shared_data: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute the pending jobs of a sweep one at a time with run_jmeter_test_node,
+    analyzing each run and recording its KPIs in the sweep manifest after every job.
+    Returns the final manifest.
+    """
+    sweep_id = state.get("sweep_id")
+    manifest = load_sweep_manifest(sweep_id) if sweep_id else None
+    if not manifest:
+        thread_safe_add_log(shared_data['logs'], f"❌ Sweep manifest not found: {sweep_id}", agent_name="AgentError")
+        return {}
+
+    shared_data['logs'].set_run(sweep_id)   # Sweep-level logs; each job logs to its own run log
+    definition = manifest["definition"]
+    cooldown = definition.get("cooldown", DEFAULT_COOLDOWN) or 0
+    pending = get_pending_jobs(manifest)
+    total = len(manifest["jobs"])
+    thread_safe_add_log(shared_data['logs'], f"🧮 Sweep '{manifest['name']}' ({sweep_id}): {len(pending)} of {total} runs queued", agent_name="SweepAgent")
+
+    for position, job in enumerate(pending, start=1):
+        if shared_data.get('stop_requested'):
+            break
+
+        job.update(status="running", started_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), error=None)
+        save_sweep_manifest(manifest)
+        shared_data['current_job'] = job["job_id"]
+        params = ", ".join(f"{name}={value}" for name, value in job["params"].items())
+        thread_safe_add_log(shared_data['logs'], f"🧮 Run {position}/{len(pending)} [{job['job_id']}]: {params}", agent_name="SweepAgent")
+
+        job_state = {**state, **definition.get("base", {}), **job["params"], "jmx_path": manifest["jmx_path"]}
+        shared_data['run_timestamp'] = ""
+        shared_data['pipeline_timings'] = []
+        shared_data['abort_reason'] = None
+        try:
+            result = run_jmeter_test_node(shared_data, job_state)
+            if shared_data.get('stop_requested'):
+                job["status"] = "stopped"
+            elif not result:
+                job.update(status="failed", error="JMeter run failed")
+            else:
+                job["run_timestamp"] = result["run_timestamp"]
+                job["kpis"] = _analyze_job(shared_data, job_state, result)
+                job["status"] = "aborted" if shared_data.get('abort_reason') else "completed"
+                if job["kpis"] is None:
+                    job.update(status="failed", error="No JMeter analysis results")
+        except Exception as e:
+            job.update(status="failed", error=str(e))
+            thread_safe_add_log(shared_data['logs'], f"❌ Sweep run {job['job_id']} failed: {e}", agent_name="AgentError")
+        finally:
+            job["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            save_sweep_manifest(manifest)
+            save_pipeline_timings(shared_data, job.get("run_timestamp"))
+            shared_data['logs'].set_run(sweep_id)
+
+        thread_safe_add_log(shared_data['logs'], f"🧮 [{job['job_id']}] {job['status']}", agent_name="SweepAgent")
+        if cooldown and position < len(pending) and not shared_data.get('stop_requested'):
+            wait_cooldown(shared_data, cooldown, "run", "SweepAgent")
+
+    shared_data['current_job'] = None
+    done = sum(1 for job in manifest["jobs"] if job["status"] in JOB_DONE_STATES)
+    thread_safe_add_log(shared_data['logs'], f"🏁 Sweep '{manifest['name']}': {done}/{total} runs done. Manifest: {get_sweep_manifest_file(sweep_id)}", agent_name="SweepAgent")
+    return manifest
+
+def build_sweep_comparison(manifest: Dict[str, Any]) -> pd.DataFrame:
+    """Collect the parameters and KPIs of every finished job into a single comparison table."""
+    rows = [
+        {"job_id": job["job_id"], **job["params"], "status": job["status"], "run_timestamp": job["run_timestamp"], **job["kpis"]}
+        for job in manifest.get("jobs", []) if job.get("kpis")
+    ]
+    return pd.DataFrame(rows)
+
+# ========================= Helper Functions =========================
+
+def _analyze_job(shared_data: Dict[str, Any], job_state: Dict[str, Any], result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Run the regular JMeter and LLM analysis on a finished run and reduce it to scalar KPIs."""
+    shared_data['run_timestamp'] = result["run_timestamp"]
+    shared_data['jmeter_jtl_path'] = result["jmeter_jtl_path"]
+    shared_data['llm_metrics_path'] = result["llm_metrics_path"]
+
+    jmeter_analysis = analyze_jmeter_test_node(shared_data, job_state)
+    if not jmeter_analysis:
+        return None
+    llm_analysis = analyze_llm_metrics_node(shared_data, job_state) or {}
+
+    duration_s = jmeter_analysis["duration"].total_seconds()
+    samples = int(jmeter_analysis["agg_table"]["samples"].sum())
+    return {
+        "samples": samples,
+        "duration_s": duration_s,
+        "throughput_rps": samples / duration_s if duration_s > 0 else 0,
+        "error_rate": float(jmeter_analysis["error_rate"]),
+        "avg_response_ms": float(jmeter_analysis["avg_response_time"]),
+        "pct90_response_ms": float(jmeter_analysis["pct90_response_time"]),
+        "ttft_avg_ms": _as_float(llm_analysis.get("llm_ttft_avg")),
+        "ttft_pct90_ms": _as_float(llm_analysis.get("llm_ttft_90th")),
+        "tpot_avg_ms": _as_float(llm_analysis.get("llm_tpot_avg")),
+        "tps_avg": _as_float(llm_analysis.get("llm_tps_avg")),
+        "abort_reason": jmeter_analysis.get("abort_reason"),
+    }
+
+def _as_float(value) -> Optional[float]:
+    """Convert numpy scalars to plain floats so the manifest stays valid JSON."""
+    return None if value is None else float(value)
@@ -12,6 +12,7 @@ from src.ui.page_header import render_page_header  # Importing page header
 from src.ui.page_title import render_jmeter_title  # Importing page body
 from src.ui.page_body_jmeter import (
     render_jmeter_config_area,      # Importing JMeter configuration settings area
+    render_load_profile_area,       # Importing multi-stage load profile editor
     render_jmeter_viewer_area,      # Importing JMeter viewer area and buttons
 )
 
@@ -36,6 +37,7 @@ def render_ui():
     render_page_header()    # Render the page header
     render_jmeter_title()   # Render the page body (title, subtitle, etc.)
     render_jmeter_config_area()             # Render the JMeter configuration settings area
+    render_load_profile_area()              # Render the multi-stage load profile editor
     render_jmeter_viewer_area(jmeter_path)  # Render the JMeter viewer and buttons
 
 # --- Main Function ---------------------------------------------------------
@@ -12,6 +12,7 @@ from src.ui.page_header import render_page_header  # Importing page header
 from src.ui.page_title import render_report_title  # Importing page body
 from src.ui.page_body_report import (
     render_report_viewer,           # Importing report viewer area
+    render_run_log_history,         # Importing run log history viewer
 )
 
 # --- Load Configuration -----------------------------------------------------
@@ -32,6 +33,7 @@ def render_ui():
     render_page_header()    # Render the page header
     render_report_title()   # Render the page body (title, subtitle, etc.)
     render_report_viewer()  # Render the report viewer area
+    render_run_log_history()  # Render the persisted run logs
 
 # --- Main Function -----------------------------------------------------------
 
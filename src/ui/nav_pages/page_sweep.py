@@ -0,0 +1,37 @@
+import sys
+import asyncio
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+import streamlit as st
+from src.utils.config import load_config  # Importing configuration loader
+from src.ui.page_header import render_page_header  # Importing page header
+from src.ui.page_title import render_sweep_title  # Importing page body
+from src.ui.page_body_sweep import (
+    render_sweep_viewer_area,       # Importing sweep definition, viewer area and buttons
+    render_sweep_comparison,        # Importing sweep comparison table and charts
+)
+
+# --- Load Configuration -----------------------------------------------------
+# This module loads the configuration from config.yaml
+module_config = load_config()
+jmeter_config = module_config.get("jmeter", {})
+
+jmeter_path = jmeter_config.get("jmeter_path", "jmeter")  # Default to 'jmeter' if not specified in config
+
+# --- Render UI ---------------------------------------------------------------
+
+def render_ui():
+    """
+    Render the main UI for the parameter sweep page.
+    This function renders the header, title, sweep definition/viewer area and the comparison of finished runs.
+    """
+    render_page_header()    # Render the page header
+    render_sweep_title()    # Render the page body (title, subtitle, etc.)
+    render_sweep_viewer_area(jmeter_path)   # Render the sweep definition, viewer and buttons
+    render_sweep_comparison()               # Render the comparison table and charts
+
+# --- Main Function ---------------------------------------------------------
+
+if __name__ == "__main__":
+    render_ui()
@@ -1,15 +1,14 @@
 import altair as alt
 import streamlit as st
 import streamlit.components.v1 as components
-from streamlit_autorefresh import st_autorefresh
 from pathlib import Path
-import os, sys
+import os, sys, time
 from datetime import datetime
 import pandas as pd
 
 # Import configuration loader
 from src.utils.config import load_config
-from src.ui.page_utils import initialize_session_state
+from src.ui.page_utils import initialize_session_state, render_live_fragment
 from src.ui.page_styles import (
     inject_deepeval_viewer_styles,
     inject_deepeval_button_styles
@@ -17,9 +16,13 @@ from src.ui.page_styles import (
 from src.utils.event_logs import (
     add_deepeval_log,
 )
-from src.utils.test_state import TestState, DeepEvalTestState
+from src.utils.test_state import DeepEvalTestState, has_results
+from src.utils.profiler import record_ui_sync
 # Import UI handlers for DeepEval actions
 from src.ui.ui_handlers import handle_start_deepeval_assessment
+from src.tools.deepeval_sampling import SAMPLING_MARGIN
+from src.tools.deepeval_metrics import METRIC_REGISTRY, resolve_metrics
+from src.tools.job_client import sync_job
 
 config = load_config()      # Load the full configuration from config.yaml
 initialize_session_state()  # Initialize session state for the application
@@ -37,11 +40,11 @@ def get_button_states():
 
     return {
         "start_deepeval_disabled": (
-            str(jmeter_state) != str(TestState.COMPLETED) and 
+            not has_results(jmeter_state) and 
             str(deepeval_state) != str(DeepEvalTestState.RUNNING)
         ),
         "clear_deepeval_logs_disabled": (
-            str(jmeter_state) != str(TestState.COMPLETED) and 
+            not has_results(jmeter_state) and 
             len(st.session_state.deepeval_logs) == 0
         )
     }
@@ -59,9 +62,10 @@ def render_deepeval_configuration():
         # Select metrics for evaluation
         selected_metrics = st.multiselect(
             "Select Quality Metrics",
-            options=["correctness", "robustness", "relevance", "coherence"],
+            options=list(METRIC_REGISTRY),
+            format_func=lambda key: METRIC_REGISTRY[key]["name"] + (" (local)" if METRIC_REGISTRY[key]["kind"] == "lexical" else ""),
             default=None,  # Default selection
-            help="Choose the quality metrics to evaluate the LLM responses.",
+            help="Choose the quality metrics to evaluate the LLM responses. Local metrics are computed in milliseconds without the LLM judge.",
             key="deepeval_selected_metrics",
             placeholder="Select metrics to evaluate",
             label_visibility="collapsed",  # Hide the label for a cleaner look
@@ -70,6 +74,33 @@ def render_deepeval_configuration():
         # Update session state with selected metrics
         st.session_state.deepeval_state['selected_metrics'] = selected_metrics
 
+        # Opt-in: judge responses in micro-batches while the next load test runs
+        st.session_state.deepeval_state['streaming_enabled'] = st.toggle(
+            "📡 Evaluate during load test",
+            value=st.session_state.deepeval_state.get('streaming_enabled', False),
+            key="deepeval_streaming_enabled",
+            help="Judge correctness while the next JMeter test runs, with low judge concurrency so the system under test is not disturbed.",
+        )
+
+        # Opt-in: judge a stratified sample (question x time window) sized for a target precision
+        st.session_state.deepeval_state['sampling_enabled'] = st.toggle(
+            "🎲 Sample responses",
+            value=st.session_state.deepeval_state.get('sampling_enabled', False),
+            key="deepeval_sampling_enabled",
+            help="Judge a stratified random sample instead of every response; the sample size follows from the target margin, not from the run length.",
+        )
+        if st.session_state.deepeval_state['sampling_enabled']:
+            margin_pp = st.number_input(
+                "Target margin (± percentage points)",
+                min_value=0.5,
+                max_value=20.0,
+                value=float((st.session_state.deepeval_state.get('sampling_margin') or SAMPLING_MARGIN) * 100),
+                step=0.5,
+                key="deepeval_sampling_margin",
+                help="Half-width of the pass rate confidence interval. To refine an estimate, lower the margin and start again: the sample grows and cases judged before are reused.",
+            )
+            st.session_state.deepeval_state['sampling_margin'] = margin_pp / 100
+
         # Log metric selection changes to DeepEval Viewer (only when metrics change)
         previous_metrics = st.session_state.deepeval_state.get('previous_selected_metrics', [])
         if selected_metrics != previous_metrics:
@@ -78,8 +109,7 @@ def render_deepeval_configuration():
             
             if selected_metrics:
                 # Check for unsupported metrics
-                unsupported_metrics = [metric for metric in selected_metrics if metric != "correctness"]
-                supported_metrics = [metric for metric in selected_metrics if metric == "correctness"]
+                supported_metrics, unsupported_metrics = resolve_metrics(selected_metrics)
                 
                 # Log selected metrics
                 add_deepeval_log(f"📋 Metrics selected: {', '.join(selected_metrics)}", agent_name="DeepEvalAgent")
@@ -92,7 +122,6 @@ def render_deepeval_configuration():
                         f"⚠️ Unsupported metrics (will be skipped): {', '.join(unsupported_metrics)}", 
                         agent_name="DeepEvalAgent"
                     )
-                    add_deepeval_log("💡 Note: Only 'correctness' metric is currently implemented.", agent_name="DeepEvalAgent")
             else:
                 add_deepeval_log("📝 No metrics selected. Please select at least one metric to proceed.", agent_name="DeepEvalAgent")
 
@@ -104,6 +133,9 @@ def render_deepeval_viewer():
     inject_deepeval_viewer_styles()  # Inject custom styles for the DeepEval viewer
     inject_deepeval_button_styles()  # Inject custom styles for the DeepEval buttons
 
+    # Sync background thread data first so the buttons reflect the current assessment state
+    sync_deepeval_thread_data()
+
     # Get current running state
     test_state = get_button_states()
     start_deepeval_disabled, clear_deepeval_logs_disabled = (
@@ -111,32 +143,6 @@ def render_deepeval_viewer():
         test_state["clear_deepeval_logs_disabled"]  # True if test is completed (Clear Logs button)
     )
 
-    # === SYNC BACKGROUND THREAD DATA (ADD HERE) ===
-    # Sync background thread data with UI
-    shared_data = st.session_state.get("deepeval_thread_data", {})
-    
-    # Sync logs from background thread
-    if shared_data.get('logs'):
-        st.session_state['deepeval_logs'].extend(shared_data['logs'])
-        shared_data['logs'].clear()
-
-    # Sync status from background thread
-    if shared_data.get('status') and st.session_state.deepeval_test_state != shared_data['status']:
-        st.session_state.deepeval_test_state = shared_data['status']
-        st.rerun()  # Force UI refresh when status changes
-
-    # Sync results from background thread
-    if shared_data.get('results'):
-        st.session_state.deepeval_state['llm_responses_path'] = shared_data['results'].get('llm_responses_path', "")
-        st.session_state.deepeval_state['total_test_cases'] = shared_data['results'].get('test_cases_count', 0)
-        shared_data['results'] = None  # Clear after syncing
-        
-    # Sync analysis results
-    if shared_data.get('analysis'):
-        st.session_state.deepeval_state['deepeval_test_results'] = shared_data['analysis']
-        shared_data['analysis'] = None  # Clear after syncing
-    # === END SYNC SECTION ===
-
     # Centered column for the DeepEval viewer
     col_left, col_deepeval_viewer, col_right = st.columns([2, 6, 2], border=False)
 
@@ -162,15 +168,14 @@ def render_deepeval_viewer():
             ):
 
             # Validate prerequisites and log status messages
-            if str(st.session_state.jmeter_test_state) == str(TestState.COMPLETED):
+            if has_results(st.session_state.jmeter_test_state):
                 if selected_metrics:
                     # Check for running state
                     if str(st.session_state.deepeval_test_state) == str(DeepEvalTestState.RUNNING):
                         add_deepeval_log("⚠️ DeepEval is already running. Please wait for completion.", agent_name="DeepEvalAgent")
                     else:
                         # Filter to only supported metrics and log status
-                        supported_metrics = [m for m in selected_metrics if m == "correctness"]
-                        unsupported_metrics = [m for m in selected_metrics if m != "correctness"]
+                        supported_metrics, unsupported_metrics = resolve_metrics(selected_metrics)
                         
                         if supported_metrics:
                             # Log start messages
@@ -190,27 +195,17 @@ def render_deepeval_viewer():
                             # Call the handler function
                             handle_start_deepeval_assessment()
                         else:
-                            add_deepeval_log("❌ No supported metrics selected. Please select 'correctness' to proceed.", agent_name="DeepEvalAgent")
+                            add_deepeval_log(f"❌ No supported metrics selected. Please select one of: {', '.join(METRIC_REGISTRY)}.", agent_name="DeepEvalAgent")
                 else:
                     add_deepeval_log("❌ No metrics selected. Please select at least one quality metric.", agent_name="DeepEvalAgent")
             else:
-                add_deepeval_log("❌ JMeter test must be completed before starting DeepEval.", agent_name="DeepEvalAgent")
+                add_deepeval_log("❌ JMeter test must be completed (or aborted by a guardrail) before starting DeepEval.", agent_name="DeepEvalAgent")
 
     # Display the DeepEval results
     with col_deepeval_viewer:
         st.markdown("<div class='deepeval-results-subtitle'>📟 DeepEval Results Viewer</div>", unsafe_allow_html=True)
 
-        # Join all log entries with newlines
-        log_text = "\n".join(st.session_state.deepeval_logs) if st.session_state.deepeval_logs else ""
-        st.text_area(
-            label="DeepEval Activity Logs", 
-            value=log_text, 
-            height=350, 
-            key="deepeval_viewer_text", 
-            disabled=False,
-            label_visibility="collapsed",  # Hides the label visually but keeps it for accessibility
-            placeholder="🚀 No DeepEval activity yet. Please run a JMeter test first then click on an action button to start."  # Placeholder text when no logs are present
-        )
+        live_pane = st.container()  # Filled by the live fragment once the buttons have run
 
     with col_right:
         # Button to clear DeepEval logs
@@ -219,8 +214,74 @@ def render_deepeval_viewer():
                 help="Clear all DeepEval logs and results.",
                 key="clear_deepeval_logs"
             ):
-            st.session_state.deepeval_logs = []  # Clear the logs
+            st.session_state.deepeval_logs.clear()  # Clear the logs
             add_deepeval_log("🧹 DeepEval logs cleared.", agent_name="DeepEvalAgent")
 
-    # Auto-refresh every 2 seconds for live updates
-    st_autorefresh(interval=2000, key="deepeval_autorefresh")
\ No newline at end of file
+    # Only the log pane and progress refresh on their own, fast while judging and not at all when idle
+    with live_pane:
+        render_live_fragment(
+            render_deepeval_live_logs,
+            lambda: st.session_state.deepeval_test_state == DeepEvalTestState.RUNNING,
+            "deepeval_thread",
+        )
+
+def render_deepeval_live_logs():
+    """
+    Live part of the DeepEval viewer, rerun as a fragment: syncs the background thread data and
+    shows the log pane and judging progress. A status change reruns the whole page so the buttons follow it.
+    """
+    if sync_deepeval_thread_data():
+        st.rerun(scope="app")
+
+    # Join all log entries with newlines
+    log_text = st.session_state.deepeval_logs.text()
+    st.text_area(
+        label="DeepEval Activity Logs", 
+        value=log_text, 
+        height=350, 
+        key="deepeval_viewer_text", 
+        disabled=False,
+        label_visibility="collapsed",  # Hides the label visually but keeps it for accessibility
+        placeholder="🚀 No DeepEval activity yet. Please run a JMeter test first then click on an action button to start."  # Placeholder text when no logs are present
+    )
+
+    # Judging progress published by the evaluation executor
+    if st.session_state.deepeval_test_state == DeepEvalTestState.RUNNING:
+        shared_data = st.session_state.get("deepeval_thread_data", {})
+        st.progress(
+            min(shared_data.get('progress', 0), 100) / 100,
+            text=f"⚖️ Judged {shared_data.get('current_test_case', 0)} test cases ({shared_data.get('progress', 0)}%)"
+        )
+
+def sync_deepeval_thread_data():
+    """
+    Sync logs, status, results and analysis published by the DeepEval background thread into session state.
+    Returns True when the assessment status changed.
+    """
+    shared_data = st.session_state.get("deepeval_thread_data", {})
+    sync_start = time.perf_counter()
+    
+    # Pull what the job manager published (no-op when the job runs on a UI thread)
+    sync_job(shared_data)
+
+    # Sync the log records added since the last refresh
+    st.session_state.deepeval_logs.refresh(shared_data['logs'])
+
+    # Sync status from background thread
+    status_changed = bool(shared_data.get('status')) and st.session_state.deepeval_test_state != shared_data['status']
+    if status_changed:
+        st.session_state.deepeval_test_state = shared_data['status']
+
+    # Sync results from background thread
+    if shared_data.get('results'):
+        st.session_state.deepeval_state['llm_responses_path'] = shared_data['results'].get('llm_responses_path', "")
+        st.session_state.deepeval_state['total_test_cases'] = shared_data['results'].get('test_cases_count', 0)
+        st.session_state.deepeval_state['deepeval_results_path'] = shared_data['results'].get('assessment_dir', "")
+        shared_data['results'] = None  # Clear after syncing
+        
+    # Sync analysis results (only the analysis id; the analysis stays in the analysis store)
+    if shared_data.get('analysis'):
+        st.session_state.deepeval_state['analysis_id'] = shared_data['analysis']
+        shared_data['analysis'] = None  # Clear after syncing
+    record_ui_sync(shared_data, time.perf_counter() - sync_start)
+    return status_changed
\ No newline at end of file
@@ -16,6 +16,9 @@ from src.utils.event_logs import (
     add_deepeval_log,
 )
 from src.utils.test_state import TestState, DeepEvalTestState
+from src.tools.deepeval_results_store import RESULTS_SCHEMA
+from src.tools.analysis_store import load_analysis
+from src.tools.deepeval_assessment import get_analysis_dir
 
 config = load_config()      # Load the full configuration from config.yaml
 initialize_session_state()  # Initialize session state for the application
@@ -34,25 +37,27 @@ def render_geval_report_viewer():
     col_left, col_report_viewer, col_right = st.columns([0.10, 0.80, 0.10], border=False)  # Define three columns with specified widths and borders
 
     with col_report_viewer:
-        # Create the report viewer section
-        if st.session_state.get('deepeval_state', {}).get('deepeval_test_results'):
-            # Extract latest DeepEval analysis dict  and unpack all needed analysis keys once
-            analysis = st.session_state.get('deepeval_state', {}).get('deepeval_test_results', {})
+        # Create the report viewer section (the session only holds the analysis id; the analysis is shared on disk)
+        analysis_id = st.session_state.get('deepeval_state', {}).get('analysis_id')
+        analysis = load_analysis(get_analysis_dir(analysis_id)) if analysis_id else None
+        if analysis:
+            # Unpack all needed analysis keys once
             summary = analysis.get('summary', {})
-            detailed = analysis.get('detailed_results', [])
+            results_store = analysis.get('results_store')
+            metric_results_store = analysis.get('metric_results_store')
             distribution = analysis.get('score_distribution', {})
             insights = analysis.get('quality_insights', {})
-            cases = analysis.get('individual_cases', [])
             execm = insights.get('execution_metrics', {})
 
             # Create the report viewer section
             st.markdown('<div class="report-viewer-title">📊 DeepEval Quality Assessment:</div>', unsafe_allow_html=True)
-            tab1, tab2, tab3, tab4, tab5 = st.tabs([
+            tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
                 "📋 Summary", 
                 "📉 Results",  
                 "📊 Score Chart", 
                 "🔍 Quality Analysis", 
-                "🛠️ Test Cases"])
+                "🛠️ Test Cases",
+                "📈 Quality Under Load"])
 
             with tab1:
                 tab1.markdown('<h2 class="tab-subheader">DeepEval Results Summary</h2>', unsafe_allow_html=True)
@@ -72,10 +77,37 @@ def render_geval_report_viewer():
                     unsafe_allow_html=True,
                 )
                 st.markdown(
-                    f'<div class="overview-row"><span class="overview-label">Mean G-Eval Score:</span> <span class="overview-value">{summary.get("average_score", 0):.2f}</span></div>',
+                    f'<div class="overview-row"><span class="overview-label">Mean Case Score (mean of the selected metrics):</span> <span class="overview-value">{summary.get("average_score", 0):.2f}</span></div>',
+                    unsafe_allow_html=True,
+                )
+                st.markdown(
+                    f'<div class="overview-row"><span class="overview-label">Verdicts Graded Locally / Cached / By Judge / Deduplicated:</span> <span class="overview-value">{summary.get("local_graded", 0)} / {summary.get("cache_graded", 0)} / {summary.get("judge_graded", summary.get("total_questions", 0))} / {summary.get("dedup_graded", 0)}</span></div>',
                     unsafe_allow_html=True,
                 )
 
+                # Sampled assessment: population estimate with its confidence interval
+                sampling = summary.get("sampling")
+                if sampling:
+                    st.markdown(
+                        f'<div class="overview-row"><span class="overview-label">Sampled Responses:</span> <span class="overview-value">{sampling["judged"]} of {sampling["population"]} ({sampling["sampledStrata"]}/{sampling["strata"]} question x time-window strata)</span></div>',
+                        unsafe_allow_html=True,
+                    )
+                    st.markdown(
+                        f'<div class="overview-row"><span class="overview-label">Estimated Pass Rate:</span> <span class="overview-value">{sampling["pass_rate"]:.1f}% ± {sampling["margin"]:.1f} pp ({sampling["confidence"] * 100:.0f}% CI {sampling["ci_low"]:.1f}–{sampling["ci_high"]:.1f}%)</span></div>',
+                        unsafe_allow_html=True,
+                    )
+                    estimate = pd.DataFrame([{"Estimate": "Pass rate", **sampling}])
+                    estimate_chart = alt.Chart(estimate).mark_point(filled=True, size=100, color="#2ecc40").encode(
+                        x=alt.X("pass_rate:Q", title=f"Estimated pass rate % ({sampling['confidence'] * 100:.0f}% CI)", scale=alt.Scale(domain=[0, 100])),
+                        y=alt.Y("Estimate:N", title=""),
+                        tooltip=[alt.Tooltip("pass_rate:Q", format=".1f"), alt.Tooltip("ci_low:Q", format=".1f"), alt.Tooltip("ci_high:Q", format=".1f")],
+                    ) + alt.Chart(estimate).mark_errorbar(color="#2ecc40", thickness=2).encode(
+                        x=alt.X("ci_low:Q", title=""),
+                        x2="ci_high:Q",
+                        y="Estimate:N",
+                    )
+                    st.altair_chart(estimate_chart.properties(height=80), use_container_width=True)
+
                 # Section 2: Key Metrics
                 st.markdown('<h4 class="metric_subtitle">Key Metrics</h4>', unsafe_allow_html=True)
                 col1, col2, col3, col4, col5 = st.columns(5, border=True)  # Define four columns with borders
@@ -85,6 +117,26 @@ def render_geval_report_viewer():
                 col4.metric("Avg Duration per Case", f"{execm.get('average_duration_per_case', 0):.2f} sec.")
                 col5.metric("Total Cost", f"${execm.get('total_cost', 0):.2f}")
 
+                # Per-metric results: a case passes only when it passes every selected metric
+                metrics = summary.get("metrics") or []
+                if metrics:
+                    st.markdown('<h4 class="metric_subtitle">Results by Metric</h4>', unsafe_allow_html=True)
+                    metrics_df = pd.DataFrame(metrics)
+                    metric_chart = alt.Chart(metrics_df).mark_bar(color="#2ecc40").encode(
+                        x=alt.X("pass_rate:Q", title="Pass rate %", scale=alt.Scale(domain=[0, 100])),
+                        y=alt.Y("metric:N", title="", sort=None),
+                        tooltip=["metric", "cases", "passed", alt.Tooltip("pass_rate:Q", format=".1f"), alt.Tooltip("mean_score:Q", format=".2f")],
+                    ).properties(height=40 * len(metrics_df) + 20)
+                    st.altair_chart(metric_chart, use_container_width=True)
+                    st.dataframe(
+                        metrics_df.rename(columns={
+                            "metric": "Metric", "cases": "Cases", "passed": "Passed", "errors": "Judge Errors",
+                            "pass_rate": "Pass Rate (%)", "mean_score": "Mean Score", "score_std": "Score Std", "cost": "Cost ($)",
+                        }).round(3),
+                        use_container_width=True,
+                        hide_index=True,
+                    )
+
                 # Section 3: Pass/Fail Summary
                 st.markdown('<h4 class="pass-fail-summary">Pass/Fail Summary</h4>', unsafe_allow_html=True)
                 pie_data = pd.DataFrame({
@@ -103,38 +155,30 @@ def render_geval_report_viewer():
             with tab2:
                 tab2.markdown('<h2 class="tab-subheader">DeepEval Results</h2>', unsafe_allow_html=True)
 
-                # Prepare the DataFrame, truncating fields for readability
-                df = pd.DataFrame(detailed)
-                if 'input_prompt' in df.columns:
-                    # Optionally rename for clarity
-                    df.rename(columns={'input_prompt': 'Question'}, inplace=True)
-                    # Truncate long questions for display
-                    df['Question'] = df['Question'].apply(lambda q: (q[:80] + '…') if q and len(q) > 80 else q)
-
-                if 'reasoning' in df.columns:
-                    # Truncate long reasoning for display
-                    df['reasoning'] = df['reasoning'].apply(lambda r: (r[:100] + '…') if r and len(r) > 100 else r)
-
-                # Optional: Add a human-friendly Pass/Fail column
-                if 'success' in df.columns:
-                    df['Result'] = df['success'].apply(lambda x: "✅ Pass" if x else "❌ Fail")
+                # Only the current page is read from the results store and formatted
+                df = select_results_page(results_store, key="geval_results")
+                df['Question'] = df['input'].str.slice(0, 80).where(df['input'].str.len() <= 80, df['input'].str.slice(0, 80) + '…')
+                df['reasoning'] = df['reasoning'].where(df['reasoning'].str.len() <= 100, df['reasoning'].str.slice(0, 100) + '…')
+                df['score'] = df['score'].fillna(0)
+                df['Result'] = df['success'].map({True: "✅ Pass", False: "❌ Fail"})
+                df = df.rename(columns={'case_number': 'question_number', 'score': 'mean_score'})
 
                 columns = [
-                    'question_number', 'Question', 'expected_output', 'actual_output', 'score', 'Result', 'reasoning'
+                    'question_number', 'Question', 'expected_output', 'actual_output', 'mean_score', 'Result', 'graded_by', 'reasoning'
                 ]
-                # Only keep the columns that exist in the DataFrame
-                df = df[[col for col in columns if col in df.columns]]
+                df = df[columns]
 
                 # Style: highlight rows based on pass/fail if using Styler (for st.dataframe)
                 def highlight_fail(row):
                     return ['background-color: #FEE' if row['Result']=='❌ Fail' else '' for _ in row]
 
-                styled_df = df.style.apply(highlight_fail, axis=1) if 'Result' in df.columns else df
+                styled_df = df.style.apply(highlight_fail, axis=1)
 
                 # Show with Streamlit
                 st.dataframe(
                     styled_df,
                     use_container_width=True,
+                    hide_index=True,
                     height=min(40*len(df)+40, 600)  # auto-size for number of questions, capped at 600px
                 )
 
@@ -199,7 +243,104 @@ def render_geval_report_viewer():
 
             with tab5:
                 tab5.markdown('<h2 class="tab-subheader">Test Cases</h2>', unsafe_allow_html=True)
+                cases_page = select_results_page(results_store, key="geval_cases", page_sizes=(10, 25, 50))
+                # Per-metric verdicts of the cases on this page (one row per case and metric)
+                page_metrics = (metric_results_store.read_cases(int(cases_page['case_number'].min()), int(cases_page['case_number'].max()))
+                                if metric_results_store is not None and not cases_page.empty else pd.DataFrame(columns=["case_number"]))
+                for case in cases_page.itertuples(index=False):
+                    with st.expander(f"{'✅' if case.success else '❌'} Case {case.case_number}: expected {case.expected_output}, got {case.actual_output}"):
+                        st.markdown(f"**Input:** {case.input}")
+                        st.markdown(f"**Graded by:** {case.graded_by} · **Duration:** {case.duration:.2f} sec. · **Cost:** ${case.cost:.4f}")
+                        case_metrics = page_metrics[page_metrics['case_number'] == case.case_number]
+                        if case_metrics.empty:
+                            st.markdown(f"**Score:** {0 if pd.isna(case.score) else case.score:.2f}")
+                            st.markdown(f"**Reasoning:** {case.reasoning}")
+                        for metric in case_metrics.itertuples(index=False):
+                            st.markdown(f"{'✅' if metric.success else '❌'} **{metric.metric}** · **Score:** {0 if pd.isna(metric.score) else metric.score:.2f} · {metric.reason or 'No reason provided'}")
+
+            with tab6:
+                tab6.markdown('<h2 class="tab-subheader">Quality Under Load</h2>', unsafe_allow_html=True)
+                render_quality_under_load(analysis.get('quality_under_load'))
 
         else:
             st.info("No DeepEval quality assessment yet. Please run DeepEval first.")
 
+
+def select_results_page(results_store, key, page_sizes=(50, 100, 250, 500)):
+    """
+    Render page size and page number controls and return the selected page of the results store.
+    Only the row groups holding that page are read from disk.
+    """
+    total = len(results_store) if results_store is not None else 0
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    page_size = col_size.selectbox("Rows per page", page_sizes, key=f"{key}_page_size")
+    page_count = max(1, -(-total // page_size))
+    page = col_page.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key=f"{key}_page")
+    start = (page - 1) * page_size
+    col_info.caption(f"Cases {min(start + 1, total)}–{min(start + page_size, total)} of {total}")
+    if not total:
+        return pd.DataFrame(columns=RESULTS_SCHEMA.names)
+    return results_store.read_rows(start, start + page_size)
+
+def render_quality_under_load(quality):
+    """
+    Render pass rate and mean score by concurrency level, TTFT bucket and time window,
+    with confidence intervals as error bars.
+    """
+    if not quality:
+        st.info("No load metrics could be matched to these test cases. Run the assessment on responses from a load test with a _llm_metrics.csv.")
+        return
+
+    confidence = int(quality.get('confidence', 0.95) * 100)
+    st.markdown(
+        f'<div class="overview-row"><span class="overview-label">Matched Cases:</span> <span class="overview-value">{quality.get("matched_cases", 0)} / {quality.get("total_cases", 0)}</span></div>',
+        unsafe_allow_html=True,
+    )
+
+    breakdowns = [
+        ("by_concurrency", "Quality by Concurrency (allThreads)", "Active threads", "O"),
+        ("by_ttft_bucket", "Quality by TTFT Bucket", "TTFT", "N"),
+        ("by_time_window", f"Quality over Time ({quality.get('time_window_seconds', 60)}s windows)", "Seconds since start", "O"),
+    ]
+    for key, title, axis_title, axis_type in breakdowns:
+        df = pd.DataFrame(quality.get(key, []))
+        if df.empty:
+            continue
+        st.markdown(f'<h4 class="metric_subtitle">{title}</h4>', unsafe_allow_html=True)
+
+        x = alt.X(f"group:{axis_type}", title=axis_title, sort=None)
+        base = alt.Chart(df)
+        pass_rate = base.mark_point(filled=True, size=80, color="#2ecc40").encode(
+            x=x,
+            y=alt.Y("pass_rate_pct:Q", title=f"Pass rate % ({confidence}% CI)", scale=alt.Scale(domain=[0, 100])),
+            tooltip=["group", "cases", "passes", alt.Tooltip("pass_rate_pct:Q", format=".1f")],
+        ) + base.mark_errorbar(color="#2ecc40").encode(
+            x=x,
+            y=alt.Y("pass_rate_ci_low:Q", title=""),
+            y2="pass_rate_ci_high:Q",
+        )
+        mean_score = base.mark_point(filled=True, size=80, color="#0074d9").encode(
+            x=x,
+            y=alt.Y("mean_score:Q", title=f"Mean score ({confidence}% CI)", scale=alt.Scale(domain=[0, 1])),
+            tooltip=["group", "cases", alt.Tooltip("mean_score:Q", format=".3f")],
+        ) + base.mark_errorbar(color="#0074d9").encode(
+            x=x,
+            y=alt.Y("score_ci_low:Q", title=""),
+            y2="score_ci_high:Q",
+        )
+        col1, col2 = st.columns(2)
+        col1.altair_chart(pass_rate, use_container_width=True)
+        col2.altair_chart(mean_score, use_container_width=True)
+
+        table = df.rename(columns={
+            "group": axis_title,
+            "cases": "Cases",
+            "passes": "Passed",
+            "pass_rate_pct": "Pass Rate %",
+            "pass_rate_ci_low": "Pass Rate CI Low",
+            "pass_rate_ci_high": "Pass Rate CI High",
+            "mean_score": "Mean Score",
+            "score_ci_low": "Score CI Low",
+            "score_ci_high": "Score CI High",
+        })
+        st.dataframe(table.round(3), use_container_width=True, hide_index=True)
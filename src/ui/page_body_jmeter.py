@@ -1,15 +1,14 @@
 import altair as alt
 import streamlit as st
 import streamlit.components.v1 as components
-from streamlit_autorefresh import st_autorefresh
 from pathlib import Path
-import os, sys
+import os, sys, time
 from datetime import datetime
 import pandas as pd
 
 # Import configuration loader
 from src.utils.config import load_config
-from src.ui.page_utils import initialize_session_state
+from src.ui.page_utils import initialize_session_state, render_live_fragment
 from src.ui.ui_handlers import (
     handle_start_jmeter_test,
     handle_stop_jmeter_test,
@@ -26,6 +25,15 @@ from src.utils.event_logs import (
     add_jmeter_log,
 )
 from src.utils.test_state import TestState, DeepEvalTestState
+from src.utils.profiler import record_ui_sync
+from src.tools.job_client import sync_job
+from src.tools.load_profile import (
+    PRESETS as LOAD_PROFILE_PRESETS,
+    STAGE_FIELDS,
+    build_preset_profile,
+    normalize_load_profile,
+    describe_load_profile,
+)
 
 config = load_config()  # Load the full configuration from config.yaml
 initialize_session_state()  # Initialize all session state variables used across the application
@@ -152,6 +160,62 @@ def render_jmeter_config_area():
         )
         st.session_state.jmeter_state["iterations"] = iterations
 
+def render_load_profile_area():
+    """
+    Render the multi-stage load profile editor (step, spike, soak).
+    When enabled, the stages replace the single virtual users/ramp-up/duration settings above.
+    """
+    inject_jmeter_config_styles()  # Inject custom styles for JMeter configuration
+    running = st.session_state.jmeter_test_state == TestState.RUNNING
+
+    with st.expander("🪜 Load Profile (multi-stage)", expanded=st.session_state.jmeter_state.get("load_profile_enabled", False)):
+        enabled = st.toggle(
+            "Run load profile",
+            value=st.session_state.jmeter_state.get("load_profile_enabled", False),
+            disabled=running,
+            key="load_profile_enabled_toggle",
+            help="Run the stages below in sequence against the same target instead of a single run.",
+        )
+        st.session_state.jmeter_state["load_profile_enabled"] = enabled
+
+        # The editor is seeded from a preset; edits are kept by the widget until a new preset is applied
+        if "load_profile_editor_base" not in st.session_state:
+            st.session_state.load_profile_editor_base = build_preset_profile(LOAD_PROFILE_PRESETS[0])
+
+        col_preset, col_apply = st.columns([0.75, 0.25], vertical_alignment="bottom")
+        with col_preset:
+            preset = st.selectbox("Preset", LOAD_PROFILE_PRESETS, key="load_profile_preset", disabled=running)
+        with col_apply:
+            if st.button("Apply Preset", key="apply_load_profile_preset", disabled=running):
+                st.session_state.load_profile_editor_base = build_preset_profile(preset)
+                st.session_state.pop("load_profile_editor", None)
+
+        edited_df = st.data_editor(
+            pd.DataFrame(st.session_state.load_profile_editor_base, columns=STAGE_FIELDS),
+            key="load_profile_editor",
+            num_rows="dynamic",
+            disabled=running,
+            use_container_width=True,
+            column_config={
+                "name": st.column_config.TextColumn("Stage", help="Stage label shown in the report"),
+                "vusers": st.column_config.NumberColumn("Virtual Users", min_value=1, step=1, format="%d"),
+                "ramp_up": st.column_config.NumberColumn("Ramp-Up (sec)", min_value=0, step=1, format="%d"),
+                "hold": st.column_config.NumberColumn("Hold (sec)", min_value=1, step=1, format="%d"),
+            },
+        )
+
+        try:
+            stages = normalize_load_profile(edited_df.to_dict("records"))
+            st.session_state.jmeter_state["load_profile"] = stages
+            st.markdown(
+                f'<span class="jmeter-config-label">Load Profile:</span> '
+                f'<span class="jmeter-config-value">{describe_load_profile(stages)}</span>',
+                unsafe_allow_html=True
+            )
+        except ValueError as e:
+            st.session_state.jmeter_state["load_profile"] = []
+            st.error(f"Invalid load profile: {e}")
+
 def render_jmeter_viewer_area(jmeter_path):
     """
     Render the JMeter test viewer and buttons on the webpage.
@@ -159,6 +223,9 @@ def render_jmeter_viewer_area(jmeter_path):
     inject_jmeter_viewer_styles()  # Inject custom styles for JMeter viewer
     inject_jmeter_button_styles()  # Inject custom styles for JMeter buttons
 
+    # Sync background thread data first so the buttons reflect the current test state
+    sync_jmeter_thread_data()
+
     # Get current running state
     test_state = get_button_states()
     start_disabled, stop_disabled, rag_disabled, clear_logs_disabled = (
@@ -168,36 +235,6 @@ def render_jmeter_viewer_area(jmeter_path):
         test_state["clear_logs_disabled"]  # Disabled if test is running (Clear Logs button)
     )
 
-    # === SYNC BACKGROUND THREAD DATA (ADD HERE) ===
-    # Sync background thread data with UI
-    shared_data = st.session_state.get("jmeter_thread_data", {})
-    
-    # Sync logs from background thread
-    if shared_data.get('logs'):
-        st.session_state['jmeter_logs'].extend(shared_data['logs'])
-        shared_data['logs'].clear()
-
-    # Sync status from background thread
-    if shared_data.get('status') and st.session_state.jmeter_test_state != shared_data['status']:
-        st.session_state.jmeter_test_state = shared_data['status']
-        st.rerun()  # Force UI refresh when status changes
-
-    # Sync results from background thread
-    if shared_data.get('results'):
-        st.session_state.jmeter_state['jmeter_jtl_path'] = shared_data['results'].get('jmeter_jtl_path', "")
-        st.session_state.jmeter_state['jmeter_log_path'] = shared_data['results'].get('jmeter_log_path', "")
-        st.session_state.jmeter_state['llm_kpis_path'] = shared_data['results'].get('llm_kpis_path', "")
-        st.session_state.jmeter_state['llm_metrics_path'] = shared_data['results'].get('llm_metrics_path', "")
-        st.session_state.jmeter_state['llm_responses_path'] = shared_data['results'].get('llm_responses_path', "")
-        st.session_state.jmeter_state['run_timestamp'] = shared_data['run_timestamp']    # Universal timestamp for all output files
-        shared_data['results'] = None  # Clear after syncing
-        
-    # Sync analysis results
-    if shared_data.get('analysis'):
-        st.session_state.jmeter_state['jmeter_test_results'] = shared_data['analysis']
-        shared_data['analysis'] = None  # Clear after syncing
-    # === END SYNC SECTION ===
-
     # Centered column for the JMeter page
     col_left, col_viewer, col_right = st.columns([2, 6, 2], border=False)  # Define three columns with specified widths and borders
 
@@ -226,17 +263,7 @@ def render_jmeter_viewer_area(jmeter_path):
         # Create the JMeter section
         st.markdown('<div class="jmeter-viewer-title">📊 JMeter Performance Test Viewer</div>', unsafe_allow_html=True)
 
-        # Join all log entries with newlines
-        log_text = "\n".join(st.session_state.jmeter_logs) if st.session_state.jmeter_logs else ""
-        st.text_area(
-            label="JMeter Activity Logs", 
-            value=log_text, 
-            height=350, 
-            key="jmeter_viewer_text", 
-            disabled=False,
-            label_visibility="collapsed",  # Hides the label visually but keeps it for accessibility
-            placeholder="🚀 No JMeter activity yet. Click on an action button to start."  # Placeholder text when no logs are present
-        )
+        live_pane = st.container()  # Filled by the live fragment once the buttons have run
 
     with col_right:
         # Get the number of prompts from the config.yaml file and set it in session state
@@ -287,8 +314,69 @@ def render_jmeter_viewer_area(jmeter_path):
                 help="Clear all JMeter logs from the viewer.",
                 key="clear_jmeter_logs"
             ):
-            st.session_state.jmeter_logs = []  # Clear the logs
+            st.session_state.jmeter_logs.clear()  # Clear the logs
             add_jmeter_log("🧹 JMeter logs cleared.", agent_name="JMeterAgent")
 
-    # Auto-refresh every 2 seconds for live updates
-    st_autorefresh(interval=2000, key="jmeter_autorefresh")
+    # Only the log pane refreshes on its own, fast while a test runs and not at all when idle
+    with live_pane:
+        render_live_fragment(
+            render_jmeter_live_logs,
+            lambda: st.session_state.jmeter_test_state == TestState.RUNNING,
+            "jmeter_thread",
+        )
+
+def render_jmeter_live_logs():
+    """
+    Live part of the JMeter viewer, rerun as a fragment: syncs the background thread data and
+    shows the log pane. A status change reruns the whole page so the buttons follow it.
+    """
+    if sync_jmeter_thread_data():
+        st.rerun(scope="app")
+
+    # Join all log entries with newlines
+    log_text = st.session_state.jmeter_logs.text()
+    st.text_area(
+        label="JMeter Activity Logs", 
+        value=log_text, 
+        height=350, 
+        key="jmeter_viewer_text", 
+        disabled=False,
+        label_visibility="collapsed",  # Hides the label visually but keeps it for accessibility
+        placeholder="🚀 No JMeter activity yet. Click on an action button to start."  # Placeholder text when no logs are present
+    )
+
+def sync_jmeter_thread_data():
+    """
+    Sync logs, status, results and analysis published by the JMeter background thread into session state.
+    Returns True when the test status changed.
+    """
+    shared_data = st.session_state.get("jmeter_thread_data", {})
+    sync_start = time.perf_counter()
+    
+    # Pull what the job manager published (no-op when the job runs on a UI thread)
+    sync_job(shared_data)
+
+    # Sync the log records added since the last refresh
+    st.session_state.jmeter_logs.refresh(shared_data['logs'])
+
+    # Sync status from background thread
+    status_changed = bool(shared_data.get('status')) and st.session_state.jmeter_test_state != shared_data['status']
+    if status_changed:
+        st.session_state.jmeter_test_state = shared_data['status']
+
+    # Sync results from background thread
+    if shared_data.get('results'):
+        st.session_state.jmeter_state['jmeter_jtl_path'] = shared_data['results'].get('jmeter_jtl_path', "")
+        st.session_state.jmeter_state['jmeter_log_path'] = shared_data['results'].get('jmeter_log_path', "")
+        st.session_state.jmeter_state['llm_kpis_path'] = shared_data['results'].get('llm_kpis_path', "")
+        st.session_state.jmeter_state['llm_metrics_path'] = shared_data['results'].get('llm_metrics_path', "")
+        st.session_state.jmeter_state['llm_responses_path'] = shared_data['results'].get('llm_responses_path', "")
+        st.session_state.jmeter_state['run_timestamp'] = shared_data['run_timestamp']    # Universal timestamp for all output files
+        shared_data['results'] = None  # Clear after syncing
+        
+    # Sync analysis results (only the run id; the analysis stays in the analysis store)
+    if shared_data.get('analysis'):
+        st.session_state.jmeter_state['analysis_run_id'] = shared_data['analysis']
+        shared_data['analysis'] = None  # Clear after syncing
+    record_ui_sync(shared_data, time.perf_counter() - sync_start)
+    return status_changed
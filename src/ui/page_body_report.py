@@ -1,7 +1,6 @@
 import altair as alt
 import streamlit as st
 import streamlit.components.v1 as components
-from streamlit_autorefresh import st_autorefresh
 from pathlib import Path
 import os, sys
 from datetime import datetime
@@ -18,6 +17,10 @@ from src.ui.page_utils import (
     format_datetime,
 )
 from src.utils.test_state import TestState, DeepEvalTestState
+from src.utils.profiler import load_pipeline_timings
+from src.tools.analysis_store import load_analysis
+from src.tools.jmeter_executor import get_analysis_dir
+from src.utils.run_logs import RUN_LOG_PATH, RUN_LOG_PAGE_SIZE, list_run_logs, read_run_log_page, get_run_log_file
 
 config = load_config()      # Load the full configuration from config.yaml
 initialize_session_state()  # Initialize all session state variables used across the application
@@ -35,9 +38,10 @@ def render_report_viewer():
     col_left, col_report_viewer, col_right = st.columns([0.10, 0.80, 0.10], border=False)  # Define three columns with specified widths and borders
 
     with col_report_viewer:
-        # Create the report viewer section
-        if st.session_state.get('jmeter_state', {}).get('jmeter_test_results'):
-            results = st.session_state["jmeter_state"]["jmeter_test_results"]
+        # Create the report viewer section (the session only holds the run id; the analysis is shared on disk)
+        analysis_run_id = st.session_state.get('jmeter_state', {}).get('analysis_run_id')
+        results = load_analysis(get_analysis_dir(analysis_run_id)) if analysis_run_id else None
+        if results:
             overlay_df = results['overlay_df']  # DataFrame with time, pct90_response, and vusers columns
             duration = results['duration']      # timedelta
             start_time = results['start_time']  # datetime
@@ -56,13 +60,17 @@ def render_report_viewer():
 
             # Create the report viewer section
             st.markdown('<div class="report-viewer-title">📊 Performance Test Results</div>', unsafe_allow_html=True)
-            tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+            if results.get('abort_reason'):
+                st.warning(f"🚨 This test was aborted by a guardrail: {results['abort_reason']}. Results below cover the partial run.")
+            tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
                 "📋 Results Summary", 
                 "📉 Results Table",  
                 "📈 Results Chart", 
                 "🛠️📈 TTFT", 
                 "🛠️📈 TPOT", 
-                "🛠️📈 TPS"])
+                "🛠️📈 TPS",
+                "⏱️ Pipeline Timing",
+                "🪜 Load Profile"])
 
             with tab1:
                 tab1.markdown('<h2 class="tab-subheader">Results Summary</h2>', unsafe_allow_html=True)
@@ -345,5 +353,140 @@ def render_report_viewer():
                     else:
                         st.info("🤖 LLM performance metrics not available.")
 
+            with tab7:
+                tab7.markdown('<h2 class="tab-subheader">Pipeline Timing</h2>', unsafe_allow_html=True)
+                render_pipeline_timing_panel(st.session_state.jmeter_state.get('run_timestamp', ''))
+
+            with tab8:
+                tab8.markdown('<h2 class="tab-subheader">Load Profile</h2>', unsafe_allow_html=True)
+                render_load_profile_panel(results.get('load_profile'))
+
         else:
             st.info("No JMeter test results yet. Please run a JMeter test first.")
+
+def render_run_log_history():
+    """
+    Render the persisted logs of any run, one page at a time, from its JSONL run log file.
+    """
+    col_left, col_log_viewer, col_right = st.columns([0.10, 0.80, 0.10], border=False)
+
+    with col_log_viewer:
+        st.markdown('<div class="report-viewer-title">🗂️ Run Logs</div>', unsafe_allow_html=True)
+        run_ids = list_run_logs()
+        if not run_ids:
+            st.info(f"🗂️ No run logs yet. The logs of each run are saved to {RUN_LOG_PATH} while it runs.")
+            return
+
+        col_run, col_page = st.columns([0.75, 0.25], vertical_alignment="bottom")
+        with col_run:
+            run_id = st.selectbox("Run", run_ids, key="run_log_run_id")
+        _, total = read_run_log_page(run_id, 0, page_size=0)
+        pages = max(1, -(-total // RUN_LOG_PAGE_SIZE))
+        with col_page:
+            # Opens on the last page (most recent records); the key keeps a page per run
+            page = st.number_input("Page", min_value=1, max_value=pages, value=pages, step=1, key=f"run_log_page_{run_id}")
+
+        records, total = read_run_log_page(run_id, int(page) - 1)
+        st.caption(f"{total:,} records · page {int(page)} of {pages} · {get_run_log_file(run_id)}")
+        log_df = pd.DataFrame(records, columns=["timestamp", "channel", "level", "agent_name", "message"])
+        st.dataframe(log_df, use_container_width=True, hide_index=True, height=400)
+
+def render_load_profile_panel(load_profile):
+    """
+    Render the per-stage KPI table and the scalability curve of a multi-stage load profile run.
+    """
+    if not load_profile:
+        st.info("🪜 This run did not use a load profile. Enable one on the JMeter page to compare stages.")
+        return
+
+    stage_table = load_profile['stage_table']
+    curve = load_profile['scalability_df']
+    if len(stage_table) < load_profile.get('planned_stages', len(stage_table)):
+        st.warning(f"Only {len(stage_table)} of {load_profile['planned_stages']} planned stages ran.")
+
+    # Section 1: Per-stage KPI table
+    st.markdown('<h4 class="metric_subtitle">Per-Stage KPIs</h4>', unsafe_allow_html=True)
+    columns = {
+        'stage': 'Stage', 'name': 'Name', 'vusers': 'Virtual Users', 'samples': 'Requests',
+        'error_rate': 'Error Rate (%)', 'avg': 'Avg (ms)', 'pct90': '90th % (ms)', 'pct95': '95th % (ms)',
+        'throughput_rps': 'Throughput (req/s)', 'ttft_pct90': '90th % TTFT (ms)', 'tpot_avg': 'Avg TPOT (ms)',
+        'output_tokens_per_sec': 'Output Tokens/s',
+    }
+    stage_df = stage_table[[column for column in columns if column in stage_table.columns]].rename(columns=columns)
+    st.dataframe(stage_df.round(2), use_container_width=True, hide_index=True)
+
+    # Section 2: Scalability curve (throughput and p90 latency by concurrency)
+    st.markdown('<h4 class="metric_subtitle">Scalability Curve</h4>', unsafe_allow_html=True)
+    base = alt.Chart(curve).encode(x=alt.X('vusers:Q', title='Virtual Users'))
+    throughput_line = base.mark_line(point=True, color='#1f77b4').encode(
+        y=alt.Y('throughput_rps:Q', title='Throughput (req/s)', axis=alt.Axis(titleColor='#1f77b4')),
+        tooltip=['vusers', alt.Tooltip('throughput_rps:Q', format='.2f'), alt.Tooltip('pct90:Q', format='.0f')]
+    )
+    p90_line = base.mark_line(point=True, color='#ff7f0e').encode(
+        y=alt.Y('pct90:Q', title='90th % Response Time (ms)', axis=alt.Axis(titleColor='#ff7f0e'))
+    )
+    st.altair_chart(alt.layer(throughput_line, p90_line).resolve_scale(y='independent'), use_container_width=True)
+
+    if 'output_tokens_per_sec' in curve.columns:
+        token_chart = base.mark_line(point=True, color='#2ca02c').encode(
+            y=alt.Y('output_tokens_per_sec:Q', title='Output Tokens/s'),
+            tooltip=['vusers', alt.Tooltip('output_tokens_per_sec:Q', format='.1f'), alt.Tooltip('ttft_pct90:Q', format='.0f')]
+        )
+        st.altair_chart(token_chart, use_container_width=True)
+
+    curve_columns = {'vusers': 'Virtual Users', 'throughput_rps': 'Throughput (req/s)', 'pct90': '90th % (ms)',
+                     'error_rate': 'Error Rate (%)', 'scaling_efficiency_pct': 'Scaling Efficiency (%)'}
+    st.dataframe(curve[list(curve_columns)].rename(columns=curve_columns).round(2), use_container_width=True, hide_index=True)
+
+def render_pipeline_timing_panel(run_timestamp):
+    """
+    Render the per-stage timing panel (wall time, CPU time, peak memory, rows) for a run.
+    """
+    stages = load_pipeline_timings(run_timestamp)
+    if not stages:
+        st.info("⏱️ No pipeline timings recorded for this run yet.")
+        return
+
+    # Section 1: Stage summary table
+    st.markdown('<h4 class="metric_subtitle">Stage Summary</h4>', unsafe_allow_html=True)
+    timing_df = pd.DataFrame([{
+        'Stage': stage.get('stage'),
+        'Started': stage.get('started_at'),
+        'Wall Time (s)': stage.get('wall_s', 0),
+        'CPU Time (s)': stage.get('cpu_s', 0),
+        'Child CPU (s)': stage.get('child_cpu_s', 0),
+        'Peak Memory (MB)': stage.get('peak_mem_mb'),
+        'Rows': stage.get('rows'),
+    } for stage in stages])
+    timing_df['Rows/s'] = timing_df['Rows'] / timing_df['Wall Time (s)'].where(timing_df['Wall Time (s)'] > 0)
+    st.dataframe(timing_df, use_container_width=True, hide_index=True)
+
+    # Section 2: Sub-stage breakdown chart
+    substage_df = pd.DataFrame([{
+        'Stage': stage.get('stage'),
+        'Sub-stage': sub.get('stage'),
+        'Wall Time (s)': sub.get('wall_s', 0),
+    } for stage in stages for sub in stage.get('substages', [])])
+    if not substage_df.empty:
+        st.markdown('<h4 class="metric_subtitle">Where the Time Went</h4>', unsafe_allow_html=True)
+        chart = alt.Chart(substage_df).mark_bar().encode(
+            x=alt.X('sum(Wall Time (s)):Q', title='Wall Time (s)'),
+            y=alt.Y('Stage:N', sort='-x', title=None),
+            color=alt.Color('Sub-stage:N'),
+            tooltip=['Stage', 'Sub-stage', alt.Tooltip('Wall Time (s):Q', format='.3f')]
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+    # Section 3: UI sync overhead (measured live in this session)
+    ui_sync = st.session_state.get('jmeter_thread_data', {}).get('ui_sync_stats')
+    if ui_sync and ui_sync.get('count'):
+        st.markdown('<h4 class="metric_subtitle">UI Sync</h4>', unsafe_allow_html=True)
+        col1, col2, col3 = st.columns(3, border=True)
+        col1.metric("Sync Passes", f"{ui_sync['count']:,}")
+        col2.metric("Avg Sync (ms)", f"{ui_sync['total_ms'] / ui_sync['count']:.2f}")
+        col3.metric("Max Sync (ms)", f"{ui_sync['max_ms']:.2f}")
+
+    # Optional profiler output files
+    profile_files = [stage['profile_file'] for stage in stages if stage.get('profile_file')]
+    for profile_file in profile_files:
+        st.caption(f"🔬 Profile captured: {profile_file}")
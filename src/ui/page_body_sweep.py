@@ -0,0 +1,221 @@
+import altair as alt
+import streamlit as st
+import time
+import pandas as pd
+
+# Import configuration loader
+from src.utils.config import load_config
+from src.ui.page_utils import initialize_session_state, file_selector, render_live_fragment
+from src.ui.ui_handlers import (
+    handle_start_sweep,
+    handle_stop_sweep,
+)
+from src.ui.page_styles import (
+    inject_jmeter_config_styles,     # JMeter configuration styles (shared by the sweep definition area)
+    inject_jmeter_viewer_styles,     # JMeter viewer styles (shared by the sweep viewer)
+    inject_jmeter_button_styles,
+    inject_report_viewer_styles,
+)
+from src.tools.sweep_runner import (
+    JOB_DONE_STATES,
+    parse_sweep_definition,
+    expand_sweep,
+    list_sweep_definitions,
+    read_sweep_definition_file,
+    list_sweep_manifests,
+    load_sweep_manifest,
+    build_sweep_comparison,
+)
+from src.utils.event_logs import add_sweep_log
+from src.utils.test_state import TestState
+from src.utils.profiler import record_ui_sync
+from src.tools.job_client import sync_job
+
+config = load_config()  # Load the full configuration from config.yaml
+initialize_session_state()  # Initialize all session state variables used across the application
+
+# ============================================================================
+# Sweep Page Body: This section contains the main body of the parameter sweep page.
+# It includes the sweep definition, the job queue viewer, buttons and the comparison.
+# ============================================================================
+def render_sweep_viewer_area(jmeter_path):
+    """
+    Render the sweep definition editor, the job queue/log viewer and the sweep buttons.
+    """
+    inject_jmeter_config_styles()
+    inject_jmeter_viewer_styles()
+    inject_jmeter_button_styles()
+
+    _sync_sweep_thread_data()  # Sync first so the buttons reflect the current sweep state
+
+    running = st.session_state.sweep_test_state == TestState.RUNNING
+    col_left, col_viewer, col_right = st.columns([3, 5, 2], border=False)
+
+    with col_left:
+        file_selector(jmeter_path)  # JMX file used by new sweeps
+
+        # Sweep definition: start from a saved YAML file, then edit in place
+        st.markdown('<div class="jmeter-config-subtitle">Sweep Definition (YAML)</div>', unsafe_allow_html=True)
+        definition_files = list_sweep_definitions()
+        if definition_files:
+            selected_file = st.selectbox("Load definition", definition_files, index=None, key="sweep_definition_file",
+                                         placeholder="Load a saved sweep definition...", disabled=running, label_visibility="collapsed")
+            if selected_file and selected_file != st.session_state.get("sweep_definition_loaded"):
+                st.session_state.sweep_state["definition_text"] = read_sweep_definition_file(selected_file)
+                st.session_state["sweep_definition_loaded"] = selected_file
+                st.session_state.pop("sweep_definition_text", None)
+
+        definition_text = st.text_area(
+            "Sweep definition",
+            value=st.session_state.sweep_state.get("definition_text", ""),
+            height=260,
+            key="sweep_definition_text",
+            disabled=running,
+            label_visibility="collapsed",
+            placeholder="name: my-sweep\nbase: {ramp_up: 10, iterations: 5}\nmatrix:\n  vusers: [1, 4, 8]\n  temperature: [0.2, 0.8]",
+        )
+        st.session_state.sweep_state["definition_text"] = definition_text
+
+        if definition_text.strip():
+            try:
+                jobs = expand_sweep(parse_sweep_definition(definition_text))
+                st.markdown(
+                    f'<span class="jmeter-config-label">Runs queued:</span> '
+                    f'<span class="jmeter-config-value">{len(jobs)}</span>',
+                    unsafe_allow_html=True
+                )
+            except ValueError as e:
+                st.error(str(e))
+
+    with col_viewer:
+        st.markdown('<div class="jmeter-viewer-title">🧮 Sweep Viewer</div>', unsafe_allow_html=True)
+        live_pane = st.container()  # Filled by the live fragment once the buttons have run
+
+    with col_right:
+        if st.button("▶️ Start Sweep", disabled=running, key="start_sweep",
+                     help="Create a sweep from the definition and run its jobs one after another."):
+            add_sweep_log("🏃‍♂️ Starting parameter sweep...")
+            handle_start_sweep()
+
+        if st.button("🛑 Stop Sweep", disabled=not running, key="stop_sweep",
+                     help="Stop the current run and the sweep. Unfinished jobs can be resumed later."):
+            handle_stop_sweep()
+
+        # Resume an interrupted sweep (stopped, crashed or with failed runs)
+        resumable = [sweep for sweep in list_sweep_manifests() if sweep["done"] < sweep["jobs"]]
+        if resumable:
+            st.markdown('<div class="toggle-button-title">Resume Sweep</div>', unsafe_allow_html=True)
+            labels = {f"{sweep['name']} ({sweep['sweep_id']}) {sweep['done']}/{sweep['jobs']}": sweep["sweep_id"] for sweep in resumable}
+            selected = st.selectbox("Resume sweep", list(labels), key="resume_sweep_select", disabled=running, label_visibility="collapsed")
+            if st.button("🔁 Resume", disabled=running or not selected, key="resume_sweep"):
+                handle_start_sweep(resume_sweep_id=labels[selected])
+
+        if st.button("🧹 Clear Logs", disabled=running, key="clear_sweep_logs"):
+            st.session_state.sweep_logs.clear()
+            add_sweep_log("🧹 Sweep logs cleared.")
+
+    # Only the log pane and job queue refresh on their own, fast while a sweep runs and not at all when idle
+    with live_pane:
+        render_live_fragment(
+            _render_sweep_live_view,
+            lambda: st.session_state.sweep_test_state == TestState.RUNNING,
+            "sweep_thread",
+        )
+
+def render_sweep_comparison():
+    """
+    Render the comparison table and charts of the finished runs of the sweep being shown.
+    """
+    inject_report_viewer_styles()
+    manifest = _current_manifest()
+    comparison_df = build_sweep_comparison(manifest) if manifest else pd.DataFrame()
+    if comparison_df.empty:
+        return
+
+    st.markdown('<div class="report-viewer-title">📊 Sweep Comparison</div>', unsafe_allow_html=True)
+    st.dataframe(comparison_df.round(2), use_container_width=True, hide_index=True)
+
+    # Plot KPIs against the first swept parameter; the other swept parameters become the series
+    swept = [name for name in manifest["definition"]["matrix"] if name in comparison_df.columns]
+    x_param = "vusers" if "vusers" in swept else swept[0]
+    series_params = [name for name in swept if name != x_param and comparison_df[name].nunique() > 1]
+    comparison_df["series"] = comparison_df[series_params].astype(str).agg(", ".join, axis=1) if series_params else "all runs"
+    x_type = "Q" if pd.api.types.is_numeric_dtype(comparison_df[x_param]) else "N"
+
+    kpi_titles = {
+        "throughput_rps": "Throughput (req/s)",
+        "pct90_response_ms": "90th % Response Time (ms)",
+        "ttft_pct90_ms": "90th % TTFT (ms)",
+        "tps_avg": "Avg Tokens/s",
+        "error_rate": "Error Rate (%)",
+    }
+    chart_cols = st.columns(2)
+    for index, (kpi, title) in enumerate(kpi_titles.items()):
+        if kpi not in comparison_df.columns or comparison_df[kpi].isna().all():
+            continue
+        chart = alt.Chart(comparison_df).mark_line(point=True).encode(
+            x=alt.X(f"{x_param}:{x_type}", title=x_param),
+            y=alt.Y(f"{kpi}:Q", title=title),
+            color=alt.Color("series:N", title=", ".join(series_params) or None),
+            tooltip=["job_id"] + swept + [alt.Tooltip(f"{kpi}:Q", format=".2f")],
+        ).properties(title=title, height=260)
+        chart_cols[index % 2].altair_chart(chart, use_container_width=True)
+
+# ========================= Helper Functions =========================
+
+def _render_sweep_live_view():
+    """Live part of the sweep viewer (log pane and job queue), rerun as a fragment."""
+    if _sync_sweep_thread_data():
+        st.rerun(scope="app")  # Buttons follow the new sweep status
+
+    log_text = st.session_state.sweep_logs.text()
+    st.text_area(
+        label="Sweep Activity Logs",
+        value=log_text,
+        height=250,
+        key="sweep_viewer_text",
+        label_visibility="collapsed",
+        placeholder="🚀 No sweep activity yet. Define a sweep and click Start Sweep."
+    )
+
+    # Job queue of the sweep being shown (read from its manifest so it survives restarts)
+    manifest = _current_manifest()
+    if manifest:
+        done = sum(1 for job in manifest["jobs"] if job["status"] in JOB_DONE_STATES)
+        st.progress(done / len(manifest["jobs"]) if manifest["jobs"] else 0,
+                    text=f"{manifest['name']} ({manifest['sweep_id']}): {done}/{len(manifest['jobs'])} runs done")
+        queue_df = pd.DataFrame([{"Job": job["job_id"], **job["params"], "Status": job["status"],
+                                  "Run": job["run_timestamp"] or "", "Error": job["error"] or ""}
+                                 for job in manifest["jobs"]])
+        st.dataframe(queue_df, use_container_width=True, hide_index=True, height=200)
+
+        # A newly finished run reruns the page so the comparison below picks it up
+        jobs_done = (manifest["sweep_id"], done)
+        if st.session_state.get("sweep_jobs_done", jobs_done) != jobs_done:
+            st.session_state.sweep_jobs_done = jobs_done
+            st.rerun(scope="app")
+        st.session_state.sweep_jobs_done = jobs_done
+
+def _sync_sweep_thread_data():
+    """Sync logs and status published by the sweep thread; returns True when the status changed."""
+    shared_data = st.session_state.get("sweep_thread_data", {})
+    sync_start = time.perf_counter()
+
+    sync_job(shared_data)  # Pull the job manager's updates first (no-op for a UI thread)
+    st.session_state.sweep_logs.refresh(shared_data['logs'])
+
+    status_changed = bool(shared_data.get('status')) and st.session_state.sweep_test_state != shared_data['status']
+    if status_changed:
+        st.session_state.sweep_test_state = shared_data['status']
+    record_ui_sync(shared_data, time.perf_counter() - sync_start)
+    return status_changed
+
+def _current_manifest():
+    """Manifest of the sweep being shown: the final one from the thread, else the saved file."""
+    sweep_id = st.session_state.sweep_state.get("sweep_id")
+    if not sweep_id:
+        return None
+    manifest = st.session_state.get("sweep_thread_data", {}).get("manifest")
+    if manifest and manifest.get("sweep_id") == sweep_id:
+        return manifest
+    return load_sweep_manifest(sweep_id)
@@ -61,6 +61,25 @@ def render_report_title():
         unsafe_allow_html=True
     )
 
+def render_sweep_title():
+    """
+    Render the title and subtitle for the parameter sweep page.
+    """
+    # Inject custom CSS for centering and font styling
+    inject_page_title_styles()
+
+    # Main title (centered, bold)
+    st.markdown('<div class="centered-title">Parameter Sweep</div>', unsafe_allow_html=True)
+
+    # Subtitle/description (centered)
+    st.markdown(
+        '<div class="centered-subtitle">'
+        'Queue a matrix of load tests across users, temperatures, prompts and models.<br>'
+        'Runs execute one after another and are compared side by side when the sweep finishes.'
+        '</div>',
+        unsafe_allow_html=True
+    )
+
 def render_deepeval_title():
     """
     Render the title and subtitle for the DeepEval page.
@@ -7,6 +7,22 @@ import streamlit as st
 
 from src.ui.page_styles import inject_jmeter_config_styles
 from src.utils.test_state import TestState, DeepEvalTestState
+from src.utils.config import load_config
+from src.utils.event_logs import LogChannel, LogView
+from src.tools.job_client import list_jobs, attach_job
+
+# Load configurations
+config = load_config()
+ui_config = config.get("user_interface", {})
+
+LIVE_REFRESH_INTERVAL = ui_config.get("live_refresh_interval", 1.0)  # Seconds between live viewer refreshes while a background task works
+
+# Thread data and thread keys of the viewer of each job kind
+JOB_VIEWERS = {
+    "jmeter": ("jmeter_thread_data", "jmeter_thread"),
+    "sweep": ("sweep_thread_data", "sweep_thread"),
+    "deepeval": ("deepeval_thread_data", "deepeval_thread"),
+}
 
 def initialize_session_state():
     """
@@ -24,7 +40,7 @@ def initialize_session_state():
     
     # Initialize the JMeter logs in session state if not already present
     if "jmeter_logs" not in st.session_state:
-        st.session_state.jmeter_logs = []
+        st.session_state.jmeter_logs = LogView()   # Lines shown by this session's viewer
     
     # initialize the JMeter state in session state if not already present
     if "jmeter_state" not in st.session_state:
@@ -36,7 +52,7 @@ def initialize_session_state():
             "ramp_up": None,
             "duration": None,
             "iterations": None,
-            "jmeter_test_results": {},  # Dictionary to store JMeter test results
+            "analysis_run_id": "",      # Run whose analysis is shown (the analysis itself lives in the analysis store)
             "jmeter_jtl_path": "",
             "jmeter_log_path": "",
             "llm_kpis_path": "",        # Path to LLM KPIs file
@@ -47,7 +63,9 @@ def initialize_session_state():
             "prompt_num": 1,    # Number of prompts to use from input JSON file
             "run_timestamp": "",
             "temperature": 0.2, # Default temperature for LLM
-            "model": ""         # Model will be selected in UI
+            "model": "",        # Model will be selected in UI
+            "load_profile_enabled": False,  # Run the multi-stage load profile instead of a single stage
+            "load_profile": []              # Load profile stages: name, vusers, ramp_up, hold
         }
     
     # Initialize the selected RAG file in session state if not already present
@@ -69,7 +87,7 @@ def initialize_session_state():
     # Initialize JMeter thread data for background processing
     if 'jmeter_thread_data' not in st.session_state:
         st.session_state['jmeter_thread_data'] = {
-            'logs': [],
+            'logs': LogChannel("jmeter"), # Log records written by the background thread and UI handlers
             'status': None,
             'results': None,
             'jmeter_jtl_path': "",
@@ -80,11 +98,41 @@ def initialize_session_state():
             "run_timestamp": "",
             'analysis': None,
             'stop_requested': False,
+            'jmeter_process': None,     # Supervisor of the running JMeter process (used to stop it)
+            'abort_reason': None,       # Guardrail rule that aborted the last run, if any
+            'load_profile_path': "",    # Stage windows of the last load profile run, if any
+            'streaming_judge': None,    # Streaming DeepEval judge fed by this run's responses, if enabled
+        }
+
+    # Initialize the parameter sweep logs in session state if not already present
+    if "sweep_logs" not in st.session_state:
+        st.session_state.sweep_logs = LogView()   # Lines shown by this session's viewer
+
+    # Initialize parameter sweep state (mirrors JMeter pattern)
+    if "sweep_test_state" not in st.session_state:
+        st.session_state.sweep_test_state = TestState.NOT_STARTED
+
+    if "sweep_state" not in st.session_state:
+        st.session_state.sweep_state = {
+            "definition_text": "",      # YAML sweep definition being edited
+            "sweep_id": "",             # Sweep currently shown (running, resumed or finished)
+        }
+
+    # Initialize parameter sweep thread data for background processing
+    if 'sweep_thread_data' not in st.session_state:
+        st.session_state['sweep_thread_data'] = {
+            'logs': LogChannel("sweep"),  # Log records written by the background thread and UI handlers
+            'status': None,
+            'manifest': None,           # Final sweep manifest (jobs, params and KPIs)
+            'current_job': None,        # Job id of the run in progress
+            'stop_requested': False,
+            'jmeter_process': None,     # Supervisor of the running JMeter process (used to stop it)
+            'abort_reason': None,       # Guardrail rule that aborted the current run, if any
         }
 
     # Initialize the DeepEval logs in session state if not already present
     if "deepeval_logs" not in st.session_state:
-        st.session_state.deepeval_logs = []
+        st.session_state.deepeval_logs = LogView()   # Lines shown by this session's viewer
 
     # Initialize DeepEval test state (mirrors JMeter pattern)
     if "deepeval_test_state" not in st.session_state:
@@ -96,21 +144,24 @@ def initialize_session_state():
             "selected_metrics": ["correctness"], # List of selected quality metrics
             "previous_selected_metrics": [],     # Track previous metric selections to prevent duplicate logging
             "deepeval_test_cases": [],           # List of test cases for DeepEval
-            "deepeval_test_results": {},         # Dictionary to store DeepEval results
+            "analysis_id": "",                   # Assessment whose analysis is shown ("{run_timestamp}/{assessment_id}", see analysis_store)
             "llm_responses_path": "",            # Path to LLM responses JSON file
-            "deepeval_results_path": "",         # Path to DeepEval results output
+            "deepeval_results_path": "",         # Run-scoped directory of the last DeepEval assessment
             "run_timestamp": "",                 # Timestamp of last DeepEval run
             "total_test_cases": 0,               # Total number of test cases analyzed
             "analysis_complete": False,          # Flag indicating analysis completion
             "backup_files": {},                  # Track renamed old result files for transparency
             "validation_status": "pending",      # Integrity check: "pending", "valid", "invalid"
             "question_count_match": False,       # 1-to-1 correlation test between JMeter and DeepEval
+            "streaming_enabled": False,          # Judge responses while the next JMeter test runs
+            "sampling_enabled": False,           # Judge a stratified sample sized for a target precision
+            "sampling_margin": None,             # Target pass rate CI half-width (None = config default)
         }
 
     # Initialize DeepEval thread data for background processing
     if 'deepeval_thread_data' not in st.session_state:
         st.session_state['deepeval_thread_data'] = {
-            'logs': [],                          # Real-time execution logs
+            'logs': LogChannel("deepeval"),      # Real-time execution logs
             'status': None,                      # Current execution status
             'results': None,                     # Raw DeepEval results
             'analysis': None,                    # Processed analysis for UI display
@@ -126,6 +177,11 @@ def initialize_session_state():
             'start_time': None,                  # Start time of the current DeepEval run
             'end_time': None,                    # End time of the current DeepEval run
             'run_timestamp': "",                 # Timestamp of the current DeepEval run
+            'streaming_judge': None,             # StreamingJudge of a load test being evaluated live
+            'assessment_id': "",                 # Assessment id (metric set) of the current DeepEval run
+            'assessment_paths': {},              # Run-scoped output paths of the current DeepEval run
+            'sampling': None,                    # Sampling settings of the current DeepEval run (None = judge all responses)
+            'sampling_plan': None,               # Sample size and strata chosen for the current DeepEval run
         }
 
     # Enhanced error tracking for DeepEval
@@ -136,6 +192,47 @@ def initialize_session_state():
             "error_history": []
         }
 
+    # Follow the latest job manager jobs, so a reloaded page (or another browser) picks them up
+    if "jobs_attached" not in st.session_state:
+        st.session_state.jobs_attached = True
+        attach_latest_jobs()
+
+def attach_latest_jobs():
+    """Attach each viewer (JMeter, sweep, DeepEval) to the newest job of its kind in the job manager, if any."""
+    attached = set()
+    for summary in list_jobs():   # Newest first
+        if summary["kind"] in attached or summary["kind"] not in JOB_VIEWERS:
+            continue
+        attached.add(summary["kind"])
+        thread_data_key, thread_key = JOB_VIEWERS[summary["kind"]]
+        st.session_state[thread_key] = attach_job(st.session_state[thread_data_key], summary)
+
+def live_refresh_interval(running, thread_key):
+    """
+    Refresh interval of a live viewer (seconds, for st.fragment's run_every).
+    Fast while the test is running or its background thread is still finishing (the analysis is
+    published after the final status), None when idle so an idle page costs no reruns at all.
+    """
+    thread = st.session_state.get(thread_key)
+    active = running or (thread is not None and thread.is_alive())
+    return LIVE_REFRESH_INTERVAL if active else None
+
+def render_live_fragment(render, is_running, thread_key):
+    """
+    Render a live viewer (log pane, progress, status sync) as a Streamlit fragment.
+    On each tick only the fragment reruns; page styles, layout and config widgets are left alone.
+    render() itself triggers a page rerun when the synced status changes; the page also reruns when
+    the viewer becomes idle or busy, so buttons and the refresh interval follow the new state.
+    """
+    run_every = live_refresh_interval(is_running(), thread_key)
+
+    def live_viewer():
+        render()
+        if live_refresh_interval(is_running(), thread_key) != run_every:
+            st.rerun(scope="app")
+
+    st.fragment(live_viewer, run_every=run_every)()
+
 def format_duration(duration):
     """
     Function to format a duration into a human-readable string
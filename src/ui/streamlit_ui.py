@@ -39,11 +39,12 @@ def render_ui():
     page_homepage = st.Page("nav_pages/page_homepage.py", title="Home", icon="🏠")
     page_jmeter = st.Page("nav_pages/page_jmeter.py", title="JMeter", icon="📊")
     page_report = st.Page("nav_pages/page_report.py", title="Report", icon="📋")
+    page_sweep = st.Page("nav_pages/page_sweep.py", title="Sweep", icon="🧮")
     page_deepeval = st.Page("nav_pages/page_deepeval.py", title="DeepEval", icon="📈")
     page_geval = st.Page("nav_pages/page_geval.py", title="GEval", icon="📝")
 
     pg = st.navigation(
-        pages=[page_homepage, page_jmeter, page_report, page_deepeval, page_geval],
+        pages=[page_homepage, page_jmeter, page_report, page_sweep, page_deepeval, page_geval],
         position="sidebar",
     )
     pg.run()
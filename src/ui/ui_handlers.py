@@ -5,99 +5,87 @@ import re
 import streamlit as st
 from datetime import datetime
 from threading import Thread
-import shutil
 
 from src.utils.event_logs import (
     add_jmeter_log,
     thread_safe_add_log,
     add_deepeval_log,
+    add_sweep_log,
 )
-from src.tools.jmeter_executor import (
-    run_jmeter_test_node,
-    analyze_jmeter_test_node,
-    stop_jmeter_test_node,
-    analyze_llm_metrics_node
+from src.tools.jmeter_executor import stop_jmeter_test_node
+from src.tools.sweep_runner import (
+    parse_sweep_definition,
+    create_sweep_manifest,
+    load_sweep_manifest,
+    get_pending_jobs,
 )
 from src.tools.deepeval_assessment import (
-    run_deepeval_assessment_node,
-    analyze_deepeval_results_node
+    make_assessment_id,
+    get_assessment_paths,
 )
-from src.utils.test_state import TestState, DeepEvalTestState
+from src.tools.deepeval_streaming import StreamingJudge
+from src.tools.job_runners import run_jmeter_job, run_sweep_job, run_deepeval_job
+from src.tools.job_client import JOB_MANAGER_ENABLED, JOB_MANAGER_RESTART, submit_job, attach_job, stop_job
+from src.tools.deepeval_sampling import SAMPLING_MARGIN, SAMPLING_CONFIDENCE
+from src.tools.deepeval_metrics import resolve_metrics
+from src.utils.test_state import TestState, DeepEvalTestState, has_results
 # Import configuration loader
 from src.utils.config import load_config
 
 # Load configurations
 config = load_config()
 deepeval_config = config.get("deepeval", {})
-#  ========================= JMeter UI Handlers =========================
-def __start_jmeter_thread(shared_data, state_snapshot):
-    """Background thread target to run JMeter and update session state/logs."""
-    try:
-        # Update status to running in shared data
-        shared_data['status'] = TestState.RUNNING
-        shared_data['stop_requested'] = False  # Add stop flag
-        
-        result = run_jmeter_test_node(shared_data, state_snapshot)
-
-        # Check if stop was requested before processing results
-        if shared_data.get('stop_requested', False):
-            thread_safe_add_log(shared_data['logs'], "🛑 JMeter test was stopped by user request.", agent_name="JMeterAgent")
-            thread_safe_add_log(shared_data['logs'], "🔍 Skipping analysis - test was stopped.", agent_name="JMeterAgent")
-            shared_data['status'] = TestState.STOPPED
-            return  # Exit early, don't process results
-        # If we reach here, it means the test ran successfully
-        if result:
-            thread_safe_add_log(shared_data['logs'], "✅ JMeter load test executed successfully.", agent_name="JMeterAgent")
-            shared_data['status'] = TestState.COMPLETED
-            shared_data['results'] = result
-            shared_data['jmeter_jtl_path'] = result['jmeter_jtl_path']
-            shared_data['jmeter_log_path'] = result['jmeter_log_path']
-            shared_data['llm_kpis_path'] = result.get('llm_kpis_path', "")
-            shared_data['llm_metrics_path'] = result.get('llm_metrics_path', "")
-            shared_data['llm_responses_path'] = result.get('llm_responses_path', "")
-            shared_data['run_timestamp'] = result.get('run_timestamp', 'NOT_FOUND')
-            thread_safe_add_log(shared_data['logs'], f"📊🔥 Load test results saved to {result['jmeter_jtl_path']}", agent_name="JMeterAgent")
-            thread_safe_add_log(shared_data['logs'], f"📊🔥 Load test log saved to {result['jmeter_log_path']}", agent_name="JMeterAgent")
-            thread_safe_add_log(shared_data['logs'], f"📊🔥 LLM Metrics saved to {result['llm_metrics_path']}", agent_name="JMeterAgent")
-            thread_safe_add_log(shared_data['logs'], f"📊🔥 LLM Responses saved to {result['llm_responses_path']}", agent_name="JMeterAgent")
-
-            # Analyze results in background thread. Only analyze if not stopped
-            if not shared_data.get('stop_requested', False):
-                # --- JMeter Analysis ---
-                thread_safe_add_log(shared_data['logs'], "🔍 Analyzing JMeter load test results...", agent_name="JMeterAgent")
-                jmeter_analysis_result = analyze_jmeter_test_node(shared_data, state_snapshot)
-                if not jmeter_analysis_result:
-                    thread_safe_add_log(shared_data['logs'], "⚠️ No JMeter analysis results found. Check JTL file.", agent_name="AgentError")
-                    shared_data['status'] = TestState.FAILED
-                    return
+#  ========================= Job Start =========================
+def __start_job(kind, target, state, shared_data, thread_key, add_log, linked_data=None):
+    """
+    Run a job in the job manager process and follow it from this session, or on a background thread of
+    the UI process when the job manager is disabled or unreachable. 'linked_data' is the DeepEval thread
+    data of a streaming assessment riding along with a JMeter job.
+    """
+    shared_data['job'] = None
+    if linked_data is not None:
+        linked_data['job'] = None
+    submitted = submit_job(kind, state, shared_data, linked_data)
+    if submitted:
+        st.session_state[thread_key] = attach_job(shared_data, submitted['job'])   # Followed like a thread by the live viewers
+        if submitted.get('linked_job'):
+            st.session_state.deepeval_thread = attach_job(linked_data, submitted['linked_job'])
+        add_log(f"📨 Job {submitted['job']['job_id']} submitted to the job manager.")
+        if submitted.get('stale'):
+            add_log("⚠️ The job manager runs older code or config.yaml; " + ("it restarts with the next job submitted while it is idle." if JOB_MANAGER_RESTART else "restart it to apply the changes."))
+        return
 
-                thread_safe_add_log(shared_data['logs'], "✅ JMeter load test analysis completed successfully.", agent_name="JMeterAgent")
+    if JOB_MANAGER_ENABLED:
+        add_log("⚠️ Job manager unavailable; the job runs in the UI process instead.")
+    if linked_data is not None:
+        judge = StreamingJudge(linked_data)   # Fed by the JMeter thread with each run's responses file
+        linked_data['streaming_judge'] = judge
+        shared_data['streaming_judge'] = judge
+    thread = threading.Thread(target=target, args=(shared_data, state), daemon=True)
+    st.session_state[thread_key] = thread   # Live viewers keep refreshing while it is alive
+    thread.start()
 
-                # --- LLM Metrics Analysis ---
-                thread_safe_add_log(shared_data['logs'], "🔍 Analyzing LLM token metrics...", agent_name="JMeterAgent")
-                llm_analysis_result = analyze_llm_metrics_node(shared_data, state_snapshot)
+#  ========================= JMeter UI Handlers =========================
+def __prepare_streaming_deepeval():
+    """Prepare the streaming DeepEval assessment of the JMeter run (opt-in on the DeepEval page); returns its thread data."""
+    if str(st.session_state.deepeval_test_state) == str(DeepEvalTestState.RUNNING):
+        add_jmeter_log("⚠️ DeepEval is already running; streaming evaluation is skipped for this run.", agent_name="JMeterAgent")
+        return None
 
-                if not llm_analysis_result:
-                    thread_safe_add_log(shared_data['logs'], "⚠️ No LLM metrics found. Test will continue with JMeter results only.", agent_name="JMeterAgent")
-                    # Don't fail the test - LLM metrics are optional
-                    shared_data['analysis'] = jmeter_analysis_result
-                else:
-                    thread_safe_add_log(shared_data['logs'], "✅ LLM metrics analysis completed successfully.", agent_name="JMeterAgent")
-                    # Combine both analysis results
-                    combined_analysis = {**jmeter_analysis_result, **llm_analysis_result}
-                    shared_data['analysis'] = combined_analysis
+    deepeval_data = st.session_state.get("deepeval_thread_data", {})
+    deepeval_data['selected_metrics'] = resolve_metrics(st.session_state.deepeval_state.get('selected_metrics'))[0] or ["correctness"]
+    deepeval_data['stop_requested'] = False
+    deepeval_data['start_time'] = datetime.now()
+    deepeval_data['pipeline_timings'] = []
+    deepeval_data['progress'] = 0
+    deepeval_data['current_test_case'] = 0
+    deepeval_data['assessment_id'] = make_assessment_id(deepeval_data['selected_metrics'])
+    deepeval_data['status'] = DeepEvalTestState.RUNNING   # Set before the thread starts so the UI sync never sees a stale status
 
-            else:
-                thread_safe_add_log(shared_data['logs'], "🔍 Skipping analysis - test was stopped.", agent_name="JMeterAgent")
-
-        else:
-            thread_safe_add_log(shared_data['logs'], "❌ JMeter load test failed to execute.", agent_name="AgentError")
-            shared_data['status'] = TestState.FAILED
-            shared_data['results'] = None
-    except Exception as e:
-        thread_safe_add_log(shared_data['logs'], f"❌ JMeter load test execution failed: {str(e)}", agent_name="AgentError")
-        shared_data['status'] = TestState.FAILED
-        shared_data['results'] = None
+    st.session_state.deepeval_test_state = DeepEvalTestState.RUNNING
+    add_deepeval_log("📡 Streaming DeepEval armed: responses are judged while the load test runs.", agent_name="DeepEvalAgent")
+    add_jmeter_log("📡 Streaming DeepEval enabled for this run.", agent_name="JMeterAgent")
+    return deepeval_data
 
 def handle_start_jmeter_test():
     """Handler for starting the JMeter test."""
@@ -115,11 +103,26 @@ def handle_start_jmeter_test():
         st.session_state.jmeter_test_state = TestState.FAILED
         return
     
+    if st.session_state.get("sweep_test_state") == TestState.RUNNING:
+        add_jmeter_log("⚠️ A parameter sweep is running. Wait for it to finish or stop it first.", agent_name="JMeterAgent")
+        return
+
+    if state.get("load_profile_enabled") and not state.get("load_profile"):
+        add_jmeter_log("❌ Load profile is enabled but has no stages. Add stages or disable the load profile.", agent_name="AgentError")
+        return
+
+    shared_data['streaming_judge'] = None
+    deepeval_data = None
+    if st.session_state.deepeval_state.get("streaming_enabled"):
+        deepeval_data = __prepare_streaming_deepeval()
+
     add_jmeter_log(f"Using JMX file at: {jmx_path}", agent_name="JMeterAgent")
     add_jmeter_log("🔧 Invoking JMeter load test tool...", agent_name="JMeterAgent")
 
-    thread = threading.Thread(target=__start_jmeter_thread, args=(shared_data, state), daemon=True)
-    thread.start()
+    shared_data['status'] = TestState.RUNNING   # Set before the job starts so the UI sync never sees a stale status
+    st.session_state.jmeter_test_state = TestState.RUNNING
+    __start_job("jmeter", run_jmeter_job, state, shared_data, "jmeter_thread",
+                lambda message: add_jmeter_log(message, agent_name="JMeterAgent"), linked_data=deepeval_data)
 
 def handle_stop_jmeter_test():
     """Handler for stopping the JMeter test."""
@@ -136,6 +139,13 @@ def handle_stop_jmeter_test():
     shared_data['status'] = TestState.STOPPED
     add_jmeter_log("🛑 Stopping JMeter load test...", agent_name="JMeterAgent")
 
+    job = shared_data.get('job')
+    if job is not None and job.is_alive():
+        # The JMeter process belongs to the job manager: it stops it and publishes the final status
+        if not stop_job(job.job_id):
+            add_jmeter_log(f"❌ The job manager did not accept the stop request for job {job.job_id}.", agent_name="AgentError")
+        return
+
     try:
         # Call the JMeter stop test node
         result = stop_jmeter_test_node(shared_data, state)
@@ -152,55 +162,73 @@ def handle_stop_jmeter_test():
         # Mark as stopped even on error to prevent stuck state
         st.session_state.jmeter_test_state = TestState.STOPPED
 
-# ========================== DeepEval UI Handlers =========================
-def __start_deepeval_thread(shared_data, state_snapshot):
+# ========================== Sweep UI Handlers =========================
+def handle_start_sweep(resume_sweep_id=None):
     """
-    Background thread to run DeepEval quality assessment and update session state/logs.
+    Handler for starting a new parameter sweep from the YAML definition in the UI,
+    or resuming the pending jobs of a saved sweep when 'resume_sweep_id' is given.
     """
-    try:
-        # 1. Start analysis
-        shared_data['status'] = DeepEvalTestState.RUNNING
-        shared_data['start_time'] = datetime.now()
-        thread_safe_add_log(shared_data['logs'], "🔄 Running DeepEval assessment node...", agent_name="DeepEvalAgent")
-        result = run_deepeval_assessment_node(shared_data, state_snapshot)
+    if st.session_state.sweep_test_state == TestState.RUNNING:
+        add_sweep_log("⚠️ A sweep is already running. Please wait for completion.")
+        return
+    if st.session_state.jmeter_test_state == TestState.RUNNING:
+        add_sweep_log("⚠️ A JMeter test is running. Wait for it to finish before starting a sweep.")
+        return
 
-        if result:
-            shared_data['status'] = DeepEvalTestState.COMPLETED
-            shared_data['results'] = result
-            shared_data['deepeval_output_file'] = result.get('deepeval_output_file', '')
-            thread_safe_add_log(shared_data['logs'], "✅ DeepEval assessment node completed.", agent_name="DeepEvalAgent")
+    if resume_sweep_id:
+        manifest = load_sweep_manifest(resume_sweep_id)
+        if not manifest:
+            add_sweep_log(f"❌ Sweep manifest not found: {resume_sweep_id}", agent_name="AgentError")
+            return
+        if not get_pending_jobs(manifest):
+            add_sweep_log(f"✅ Sweep '{manifest['name']}' has no pending jobs to resume.")
+            return
+        add_sweep_log(f"🔁 Resuming sweep '{manifest['name']}' ({resume_sweep_id})")
+    else:
+        jmx_path = st.session_state.jmeter_state.get("jmx_path")
+        if not jmx_path or not os.path.exists(jmx_path):
+            add_sweep_log("❌ No valid JMX file found. Please select JMX first.", agent_name="AgentError")
+            return
+        try:
+            definition = parse_sweep_definition(st.session_state.sweep_state.get("definition_text", ""))
+        except ValueError as e:
+            add_sweep_log(f"❌ Invalid sweep definition: {e}", agent_name="AgentError")
+            return
+        manifest = create_sweep_manifest(definition, jmx_path)
+        add_sweep_log(f"🧮 Created sweep '{manifest['name']}' ({manifest['sweep_id']}) with {len(manifest['jobs'])} runs")
 
-            # 2. Process analysis results
-            thread_safe_add_log(shared_data['logs'], "🔍 Analyzing DeepEval results...", agent_name="DeepEvalAgent")
-            analysis = analyze_deepeval_results_node(shared_data, state_snapshot)            
-            if not analysis:
-                thread_safe_add_log(shared_data['logs'], "⚠️ No DeepEval analysis results found. Check results file.", agent_name="AgentError")
-                shared_data['status'] = DeepEvalTestState.FAILED
-                shared_data['analysis'] = None
-                shared_data['error_message'] = "No analysis results found."
-                return
+    st.session_state.sweep_state["sweep_id"] = manifest["sweep_id"]
+    # Runs inherit the JMeter page settings (RAG mode, prompts, temperature) unless the sweep overrides them
+    state = {**st.session_state.get("jmeter_state", {}), "sweep_id": manifest["sweep_id"]}
+    shared_data = st.session_state.get("sweep_thread_data", {})
+    shared_data['manifest'] = None
+    shared_data['status'] = TestState.RUNNING   # Set before the thread starts so the UI sync never sees a stale status
+    st.session_state.sweep_test_state = TestState.RUNNING
 
-            # 3. Finalize
-            thread_safe_add_log(shared_data['logs'], "🏁 DeepEval assessment completed successfully.", agent_name="DeepEvalAgent")
-            shared_data['status'] = DeepEvalTestState.COMPLETED
-            shared_data['analysis'] = analysis
+    __start_job("sweep", run_sweep_job, state, shared_data, "sweep_thread", add_sweep_log)
 
-        else:
-            error = result.get('error', 'Unknown error')
-            thread_safe_add_log(shared_data['logs'], f"❌ DeepEval assessment failed: {error}", agent_name="DeepEvalAgent")
-            # Update shared_data instead of session state directly
-            shared_data['status'] = DeepEvalTestState.FAILED
-            shared_data['error_message'] = error
-            shared_data['results'] = None
-            return
+def handle_stop_sweep():
+    """Handler for stopping a running sweep after stopping its current JMeter run."""
+    if st.session_state.sweep_test_state != TestState.RUNNING:
+        add_sweep_log("⚠️ Cannot stop sweep - no sweep is currently running.")
+        return
 
+    shared_data = st.session_state.get("sweep_thread_data", {})
+    shared_data['stop_requested'] = True
+    add_sweep_log("🛑 Stopping parameter sweep...")
+    job = shared_data.get('job')
+    if job is not None and job.is_alive():
+        if not stop_job(job.job_id):
+            add_sweep_log(f"❌ The job manager did not accept the stop request for job {job.job_id}.", agent_name="AgentError")
+        return
+    if shared_data.get('jmeter_process') is None:
+        return  # Between runs (cooldown): the sweep thread exits on the stop flag
+    try:
+        stop_jmeter_test_node(shared_data, {})
     except Exception as e:
-        # Unexpected error handling
-        thread_safe_add_log(shared_data['logs'], f"💥 DeepEval thread error: {str(e)}", agent_name="DeepEvalAgent")
-        shared_data['status'] = DeepEvalTestState.FAILED
-        shared_data['error_message'] = str(e)
-        shared_data['results'] = None
+        add_sweep_log(f"❌ Error stopping the current sweep run: {str(e)}", agent_name="AgentError")
 
+# ========================== DeepEval UI Handlers =========================
 def handle_start_deepeval_assessment():
     """
     Handle the start of DeepEval assessment process.
@@ -216,8 +244,8 @@ def handle_start_deepeval_assessment():
             return
         
         # Validate JMeter test completion
-        if str(st.session_state.jmeter_test_state) != str(TestState.COMPLETED):
-            add_deepeval_log("❌ JMeter test must be completed before starting DeepEval.", agent_name="DeepEvalAgent")
+        if not has_results(st.session_state.jmeter_test_state):
+            add_deepeval_log("❌ JMeter test must be completed (or aborted by a guardrail) before starting DeepEval.", agent_name="DeepEvalAgent")
             return
         
         # Validate metrics selection
@@ -243,6 +271,13 @@ def handle_start_deepeval_assessment():
         shared_data['llm_responses_file'] = state.get('llm_responses_path', '')
         shared_data['selected_metrics'] = state.get('selected_metrics', [])
         shared_data['run_timestamp'] = state.get('run_timestamp', 'NOT_FOUND')
+        shared_data['logs'].set_run(state.get('run_timestamp', ''))   # Assessment logs join the log of the assessed run
+        shared_data['assessment_id'] = make_assessment_id(shared_data['selected_metrics'])
+        shared_data['assessment_paths'] = get_assessment_paths(shared_data['run_timestamp'], shared_data['assessment_id'])
+        shared_data['sampling'] = {
+            'margin': state.get('sampling_margin') or SAMPLING_MARGIN,
+            'confidence': SAMPLING_CONFIDENCE,
+        } if state.get('sampling_enabled') else None
         add_deepeval_log(f"Loaded llm_responses_file: {shared_data['llm_responses_file']}", agent_name="DeepEvalAgent")
         add_deepeval_log(f"Loaded selected_metrics: {shared_data['selected_metrics']}", agent_name="DeepEvalAgent")
         add_deepeval_log(f"Loaded run_timestamp: {shared_data['run_timestamp']}", agent_name="DeepEvalAgent")
@@ -252,21 +287,16 @@ def handle_start_deepeval_assessment():
         st.session_state.deepeval_test_state = DeepEvalTestState.RUNNING
         add_deepeval_log("🔄 DeepEval state updated to RUNNING.", agent_name="DeepEvalAgent")
 
-        # 4. File cleanup and backup operations
-        add_deepeval_log("🧹 Performing file cleanup and backup operations...", agent_name="DeepEvalAgent")
-        perform_deepeval_file_cleanup(shared_data)
-        add_deepeval_log("✅ File cleanup completed successfully.", agent_name="DeepEvalAgent")
-
-        # 5. Initialize thread data
+        # 4. Initialize thread data (the job backs up previous results once it has claimed the assessment)
         add_deepeval_log("⚙️ Initializing thread data...", agent_name="DeepEvalAgent")
         add_deepeval_log("✅ Thread data initialized successfully.", agent_name="DeepEvalAgent")
 
-        # 6. Start background thread
+        # 5. Start the assessment job
         st.session_state.deepeval_shared_data = shared_data
-        add_deepeval_log("🚀 Starting background thread for DeepEval execution...", agent_name="DeepEvalAgent")
-        thread = threading.Thread(target=__start_deepeval_thread, args=(shared_data, state), daemon=True)
-        thread.start()
-        add_deepeval_log("✅ DeepEval background thread started successfully.", agent_name="DeepEvalAgent")
+        add_deepeval_log("🚀 Starting DeepEval assessment job...", agent_name="DeepEvalAgent")
+        shared_data['status'] = DeepEvalTestState.RUNNING   # Set before the job starts so the UI sync never sees a stale status
+        __start_job("deepeval", run_deepeval_job, state, shared_data, "deepeval_thread",
+                    lambda message: add_deepeval_log(message, agent_name="DeepEvalAgent"))
         
     except Exception as e:
         # Error handling and user notification
@@ -275,36 +305,3 @@ def handle_start_deepeval_assessment():
         st.session_state.deepeval_test_state = DeepEvalTestState.FAILED
         st.session_state.deepeval_errors['last_error'] = str(e)
         st.session_state.deepeval_errors['error_count'] += 1
-
-def perform_deepeval_file_cleanup(shared_data):
-    """Handle pre-assessment file cleanup and backup operations."""
-    try:
-        # Path to the DeepEval output directory
-        deepeval_results_path = deepeval_config.get("deepeval_results_path", ".deepeval")
-        latest_test_run_path = os.path.join(deepeval_results_path, ".latest_test_run.json")
-
-        # Create .old subdirectory if it doesn't exist
-        old_dir = os.path.join(deepeval_results_path, ".old")
-        if not os.path.exists(old_dir):
-            os.makedirs(old_dir)
-            add_deepeval_log("📁 Created .old directory for backup files.", agent_name="DeepEvalAgent")
-        
-        # Check if .latest_test_run.json exists
-        if os.path.exists(latest_test_run_path):
-            # Generate backup filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"backup_{timestamp}_.latest_test_run.json"
-            backup_path = os.path.join(old_dir, backup_filename)
-            
-            # Move existing file to backup
-            shutil.move(latest_test_run_path, backup_path)
-            add_deepeval_log(f"🗂️ Existing .latest_test_run.json backed up to: {backup_filename}", agent_name="DeepEvalAgent")
-            
-            # Track backup in session state
-            st.session_state.deepeval_state['backup_files'][latest_test_run_path] = backup_path
-        else:
-            add_deepeval_log("📝 No existing .latest_test_run.json file found - no cleanup needed.", agent_name="DeepEvalAgent")
-            
-    except Exception as e:
-        add_deepeval_log(f"⚠️ File cleanup warning: {str(e)}", agent_name="DeepEvalAgent")
-        shared_data['error_details'] = f"File cleanup error: {str(e)}"
@@ -0,0 +1,15 @@
+# Module for the pauses between load test runs (load profile stages, sweep jobs)
+import time
+from typing import Dict, Any
+
+from src.utils.event_logs import thread_safe_add_log
+
+def wait_cooldown(shared_data: Dict[str, Any], seconds: float, next_step: str, agent_name: str):
+    """Pause before the next run ('next_step', e.g. "stage"), returning early when a stop is requested."""
+    thread_safe_add_log(shared_data['logs'], f"⏸️ Cooling down for {seconds}s before the next {next_step}", agent_name=agent_name)
+    deadline = time.monotonic() + seconds
+    while not shared_data.get('stop_requested'):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(max(0.0, min(1.0, remaining)))
@@ -1,47 +1,148 @@
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from itertools import islice
 import streamlit as st
 from langchain_core.callbacks import BaseCallbackHandler
 
+from src.utils.config import load_config
+from src.utils.run_logs import emit_run_log
+
+# Load configurations
+config = load_config()
+logging_config = config.get("logging", {})
+
+VIEWER_LOG_CAPACITY = logging_config.get("viewer_log_capacity", 1000)  # Log lines kept per channel and per viewer
+
+# --- Log Channels ------------------------------------------------
+# Background threads and UI handlers write log records into a LogChannel kept in the thread data
+# ('logs'); each viewer reads them through its own LogView in session state, and every record is
+# also persisted to the JSONL log of the channel's current run (run_logs).
+class LogChannel:
+    """
+    Bounded, thread-safe log channel (ring buffer) between writer threads and the UI.
+    Records are (sequence, created, agent_name, message) tuples with monotonically increasing
+    sequences, so readers ask for what is newer than the last record they rendered instead of
+    draining a shared list: nothing is lost to a clear() racing with a writer, and any number of
+    viewers can read the same channel. When full, the oldest records fall off (the run log keeps them).
+    """
+    def __init__(self, name: str, capacity: int = VIEWER_LOG_CAPACITY):
+        self.name = name            # "jmeter", "deepeval" or "sweep"
+        self.run_timestamp = ""     # Run whose log file receives the records ("" = session log)
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._last_seq = 0
+
+    def append(self, message: str, agent_name: str, level: str = None) -> int:
+        """Add a record (formatted only when a viewer shows it) and return its sequence number."""
+        created = time.time()
+        level = level or log_level_of(message, agent_name)
+        with self._lock:
+            self._last_seq += 1
+            self._records.append((self._last_seq, created, agent_name, message))
+            # Enqueued under the lock so the run log is in sequence order (the write happens off-thread)
+            emit_run_log(self.name, self.run_timestamp, self._last_seq, created, agent_name, level, message)
+            return self._last_seq
+
+    def mirror(self, records) -> int:
+        """
+        Add (created, agent_name, message) records that another process already wrote to its run log
+        (job manager jobs): they get sequences of this channel but are not persisted again.
+        """
+        with self._lock:
+            for created, agent_name, message in records:
+                self._last_seq += 1
+                self._records.append((self._last_seq, created, agent_name, message))
+            return self._last_seq
+
+    def set_run(self, run_timestamp: str):
+        """Send the following records to the log file of this run."""
+        self.run_timestamp = run_timestamp or ""
+
+    def since(self, seq: int) -> list:
+        """Records newer than 'seq', oldest first. Walks back from the newest end: O(new records)."""
+        with self._lock:
+            new = min(self._last_seq - seq, len(self._records))
+            if new <= 0:
+                return []
+            return list(islice(reversed(self._records), new))[::-1]
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def __len__(self):
+        return len(self._records)
+
+class LogView:
+    """
+    Log lines of one channel as rendered by one UI session.
+    refresh() formats only the records after the last rendered sequence, and the joined text is
+    rebuilt only when lines were added, so an idle refresh costs nothing.
+    """
+    def __init__(self, capacity: int = VIEWER_LOG_CAPACITY):
+        self._lines = deque(maxlen=capacity)
+        self._text = ""
+        self.last_seq = 0
+
+    def refresh(self, channel: LogChannel) -> int:
+        """Append the channel records this view has not shown yet; returns how many were added."""
+        records = channel.since(self.last_seq)
+        if records:
+            if records[0][0] > self.last_seq + 1:
+                self._lines.append(f"... {records[0][0] - self.last_seq - 1} log lines dropped (viewer fell behind) ...")
+            self._lines.extend(format_log_record(record) for record in records)
+            self.last_seq = records[-1][0]
+            self._text = "\n".join(self._lines)
+        return len(records)
+
+    def clear(self):
+        """Empty the view; cleared lines do not come back since the last sequence is kept."""
+        self._lines.clear()
+        self._text = ""
+
+    def text(self) -> str:
+        return self._text
+
+    def __len__(self):
+        return len(self._lines)
+
+def format_log_record(record) -> str:
+    """Viewer line of a channel record: "[HH:MM:SS] agent: message"."""
+    _, created, agent_name, message = record
+    return f"[{time.strftime('%H:%M:%S', time.localtime(created))}] {agent_name}: {message}"
+
+def log_level_of(message: str, agent_name: str) -> str:
+    """Run log level of a viewer message: errors are logged by "AgentError", warnings start with ⚠️."""
+    if agent_name == "AgentError":
+        return "ERROR"
+    return "WARNING" if message.startswith("⚠️") else "INFO"
+
+def thread_safe_add_log(channel: LogChannel, message: str, agent_name: str = "JMeterAgent", level: str = None):
+    """Add a log entry from a background thread to the channel of its thread data (shared_data['logs'])."""
+    channel.append(message, agent_name, level)
+
+def _session_channel(thread_data_key: str) -> LogChannel:
+    """Log channel of a thread data dict in session state, initializing session state if needed."""
+    if thread_data_key not in st.session_state:
+        from src.ui.page_utils import initialize_session_state  # Deferred: page_utils is a UI module
+        initialize_session_state()
+    return st.session_state[thread_data_key]['logs']
+
 # --- JMeter Logs ------------------------------------------------
 # This module handles logging to the JMeter viewer.
 def add_jmeter_log(message: str, agent_name: str = "JMeterAgent"):
     """Add a log entry to the JMeter Viewer."""
-    # Check if the session state for agent logs exists, if not, create it
-    if "jmeter_logs" not in st.session_state:
-        st.session_state.jmeter_logs = []
-    
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    log_entry = f"[{timestamp}] {agent_name}: {message}"
-    
-    # Update logs and force UI refresh
-    st.session_state.jmeter_logs.append(log_entry)
-    
-    # Optional log size limit
-    if len(st.session_state.jmeter_logs) > 1000:
-        st.session_state.jmeter_logs = st.session_state.jmeter_logs[-1000:]
-
-def thread_safe_add_log(log_list, message: str, agent_name: str = "JMeterAgent"):
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    log_entry = f"[{timestamp}] {agent_name}: {message}"
-    log_list.append(log_entry)
-    # Optional: limit log size
-    if len(log_list) > 1000:
-        del log_list[:-1000]
+    _session_channel("jmeter_thread_data").append(message, agent_name)
+
+# --- Sweep Logs ------------------------------------------------
+# This module handles logging to the parameter sweep viewer.
+def add_sweep_log(message: str, agent_name: str = "SweepAgent"):
+    """Add a log entry to the Sweep Viewer."""
+    _session_channel("sweep_thread_data").append(message, agent_name)
 
 # --- DeepEval Logs ------------------------------------------------
 # This module handles logging to the DeepEval viewer.
 def add_deepeval_log(message: str, agent_name: str = "DeepEvalAgent"):
     """Add a log entry to the DeepEval Viewer."""
-    # Check if the session state for agent logs exists, if not, create it
-    if "deepeval_logs" not in st.session_state:
-        st.session_state.deepeval_logs = []
-    
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    log_entry = f"[{timestamp}] {agent_name}: {message}"
-    
-    st.session_state.deepeval_logs.append(log_entry)
-    
-    # Optional: Limit log size
-    if len(st.session_state.deepeval_logs) > 1000:
-        st.session_state.deepeval_logs = st.session_state.deepeval_logs[-1000:]
-
+    _session_channel("deepeval_thread_data").append(message, agent_name)
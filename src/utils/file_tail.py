@@ -0,0 +1,48 @@
+# Module for incrementally reading files that are still being appended to
+import os
+from typing import List
+
+class FileTailer:
+    """
+    Incrementally reads complete lines appended to a file that is still being written
+    (JTL, _llm_metrics.csv, _llm_responses.json). Only new bytes are read on each call,
+    and a trailing partial line is held back until its newline arrives.
+    """
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.offset = 0
+        self.lines_read = 0
+        self._partial = b""
+
+    def read_new_lines(self, max_bytes: int = -1) -> List[str]:
+        """Return the complete, non-empty lines appended since the last call."""
+        if not self.path or not os.path.exists(self.path):
+            return []
+
+        # The file was truncated or replaced: start again from the beginning
+        if os.path.getsize(self.path) < self.offset:
+            self.offset = 0
+            self._partial = b""
+
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            data = file.read(max_bytes)
+        if not data:
+            return []
+
+        self.offset += len(data)
+        chunks = (self._partial + data).split(b"\n")
+        self._partial = chunks.pop()  # Incomplete last line (empty if data ended with a newline)
+        lines = [chunk.decode(self.encoding, errors="replace").rstrip("\r") for chunk in chunks if chunk.strip()]
+        self.lines_read += len(lines)
+        return lines
+
+    def read_final_lines(self) -> List[str]:
+        """Read any remaining lines, including an unterminated last line, once the writer has finished."""
+        lines = self.read_new_lines()
+        if self._partial.strip():
+            lines.append(self._partial.decode(self.encoding, errors="replace").rstrip("\r"))
+            self.lines_read += 1
+        self._partial = b""
+        return lines
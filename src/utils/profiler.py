@@ -0,0 +1,294 @@
+# Module for per-stage profiling of the run pipeline
+import os
+import json
+import time
+import threading
+import functools
+import tracemalloc
+import cProfile
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from src.utils.config import load_config
+from src.utils.event_logs import thread_safe_add_log
+
+try:
+    import resource  # POSIX only: used for the process RSS high-water mark
+except ImportError:
+    resource = None
+
+try:
+    from pyinstrument import Profiler as PyInstrumentProfiler  # Optional dependency
+except ImportError:
+    PyInstrumentProfiler = None
+
+# Load configurations
+config = load_config()
+profiling_config = config.get("profiling", {})
+jmeter_results_path = config.get("jmeter", {}).get("jmeter_results_path", "jmeter/test_results")
+
+PROFILING_ENABLED = profiling_config.get("enabled", True)
+TRACK_MEMORY = profiling_config.get("track_memory", False)   # tracemalloc slows every thread down; enable to investigate memory only
+PROFILER = str(profiling_config.get("profiler", "none")).lower()   # "none", "cprofile" or "pyinstrument"
+PROFILE_PATH = profiling_config.get("profile_path", jmeter_results_path)
+
+# Each pipeline runs in its own background thread, so the active stage is tracked per thread.
+_local = threading.local()
+
+# tracemalloc is process wide; keep it running while at least one stage needs it. Its peak is process
+# wide too: it is only reset when no other stage is being traced, so the peak of overlapping stages
+# (e.g. a JMeter analysis next to a DeepEval job) covers all of them instead of being reset by each other.
+_trace_lock = threading.Lock()
+_trace_users = 0
+
+# cProfile hooks the whole interpreter, so only one node is profiled at a time; a node that overlaps
+# it (streaming DeepEval next to JMeter, job manager workers) runs without a profile.
+_profiler_lock = threading.Lock()
+_profiler_active = False
+
+# ========================= Stage Instrumentation =========================
+
+def profile_node(stage_name: str):
+    """
+    Decorator for pipeline nodes with the (shared_data, state) signature.
+    Records wall time, CPU time, peak memory, row counts and sub-stage timings
+    into shared_data['pipeline_timings'] and optionally captures a profile.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(shared_data: Dict[str, Any], state: Dict[str, Any]):
+            if not PROFILING_ENABLED:
+                return func(shared_data, state)
+
+            record = _new_record(stage_name)
+            _stack().append(record)
+            tracing = _start_memory_trace()
+            profiler = None
+
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            child_start = _children_cpu()
+            result = None
+            try:
+                profiler = _start_profiler(shared_data, stage_name)
+                result = func(shared_data, state)
+                return result
+            finally:
+                record["wall_s"] = time.perf_counter() - wall_start
+                record["cpu_s"] = time.thread_time() - cpu_start
+                record["child_cpu_s"] = _children_cpu() - child_start
+                if tracing:
+                    record["peak_mem_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                    _stop_memory_trace()
+                record["max_rss_mb"] = _max_rss_mb()
+                _stack().pop()
+
+                run_timestamp = _resolve_run_timestamp(shared_data, result)
+                record["run_timestamp"] = run_timestamp
+                if profiler is not None:
+                    record["profile_file"] = _stop_profiler(profiler, stage_name, run_timestamp)
+
+                shared_data.setdefault('pipeline_timings', []).append(record)
+                if 'logs' in shared_data:
+                    thread_safe_add_log(shared_data['logs'], f"⏱️ {format_stage_record(record)}", agent_name="Profiler")
+        return wrapper
+    return decorator
+
+@contextmanager
+def stage_timer(name: str):
+    """Time a sub-stage inside the currently profiled node (no-op outside a node)."""
+    parent = _stack()[-1] if _stack() else None
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        if parent is not None:
+            parent["substages"].append({
+                "stage": name,
+                "wall_s": time.perf_counter() - wall_start,
+                "cpu_s": time.thread_time() - cpu_start,
+            })
+
+def record_substage(name: str, wall_s: float):
+    """Record a sub-stage measured outside stage_timer (e.g. from process output timestamps)."""
+    if _stack() and wall_s is not None:
+        _stack()[-1]["substages"].append({"stage": name, "wall_s": wall_s, "cpu_s": 0.0})
+
+def record_rows(rows: int):
+    """Record the number of rows processed by the currently profiled node."""
+    if _stack():
+        _stack()[-1]["rows"] = int(rows)
+
+def record_ui_sync(shared_data: Dict[str, Any], elapsed_s: float):
+    """Accumulate the cost of syncing background thread data into the UI."""
+    stats = shared_data.setdefault('ui_sync_stats', {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+    elapsed_ms = elapsed_s * 1000
+    stats["count"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+# ========================= Persistence =========================
+
+def get_pipeline_timings_file(run_timestamp: str) -> str:
+    """Return the pipeline timings file path stored next to the run artifacts."""
+    return os.path.join(jmeter_results_path, f"{run_timestamp}_pipeline_timings.json")
+
+def save_pipeline_timings(shared_data: Dict[str, Any], run_timestamp: Optional[str] = None) -> Optional[str]:
+    """
+    Merge the stage records collected in shared_data into the run's timings file.
+    Records for the same stage are replaced so re-runs (e.g. DeepEval) stay current.
+    """
+    records = shared_data.get('pipeline_timings') or []
+    run_timestamp = run_timestamp or shared_data.get('run_timestamp')
+    if not records or not run_timestamp or run_timestamp == 'NOT_FOUND':
+        return None
+
+    timings_file = get_pipeline_timings_file(run_timestamp)
+    try:
+        existing = load_pipeline_timings(run_timestamp)
+        new_stages = {record["stage"] for record in records}
+        merged = [record for record in existing if record.get("stage") not in new_stages] + records
+        os.makedirs(os.path.dirname(timings_file) or ".", exist_ok=True)
+        with open(timings_file, 'w') as file:
+            json.dump({"run_timestamp": run_timestamp, "stages": merged}, file, indent=2, default=str)
+        shared_data['pipeline_timings'] = []
+        if 'logs' in shared_data:
+            thread_safe_add_log(shared_data['logs'], f"⏱️ Pipeline timings saved to {timings_file}", agent_name="Profiler")
+        return timings_file
+    except OSError as e:
+        if 'logs' in shared_data:
+            thread_safe_add_log(shared_data['logs'], f"⚠️ Failed to save pipeline timings: {e}", agent_name="Profiler")
+        return None
+
+def load_pipeline_timings(run_timestamp: str) -> List[Dict[str, Any]]:
+    """Load the stage records saved for a run (empty list if none)."""
+    if not run_timestamp:
+        return []
+    timings_file = get_pipeline_timings_file(run_timestamp)
+    if not os.path.exists(timings_file):
+        return []
+    try:
+        with open(timings_file, 'r') as file:
+            return json.load(file).get("stages", [])
+    except (OSError, json.JSONDecodeError):
+        return []
+
+def format_stage_record(record: Dict[str, Any]) -> str:
+    """Format a stage record as a one-line summary for the activity logs."""
+    parts = [f"{record['stage']}: {record.get('wall_s', 0):.2f}s wall", f"{record.get('cpu_s', 0):.2f}s CPU"]
+    if record.get("child_cpu_s"):
+        parts.append(f"{record['child_cpu_s']:.2f}s child CPU")
+    if record.get("peak_mem_mb") is not None:
+        parts.append(f"{record['peak_mem_mb']:.1f} MB peak")
+    if record.get("rows") is not None:
+        parts.append(f"{record['rows']:,} rows")
+    return ", ".join(parts)
+
+# ========================= Helper Functions =========================
+
+def _stack() -> List[Dict[str, Any]]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+def _new_record(stage_name: str) -> Dict[str, Any]:
+    return {
+        "stage": stage_name,
+        "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "wall_s": 0.0,
+        "cpu_s": 0.0,
+        "child_cpu_s": 0.0,
+        "peak_mem_mb": None,
+        "max_rss_mb": None,
+        "rows": None,
+        "substages": [],
+    }
+
+def _resolve_run_timestamp(shared_data, result) -> str:
+    if isinstance(result, dict) and result.get("run_timestamp"):
+        return result["run_timestamp"]
+    return shared_data.get("run_timestamp") or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+def _children_cpu() -> float:
+    """CPU time of reaped child processes (e.g. JMeter); always 0 on Windows."""
+    times = os.times()
+    return times.children_user + times.children_system
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return max_rss / (1024 * 1024) if os.uname().sysname == "Darwin" else max_rss / 1024
+
+def _start_memory_trace() -> bool:
+    global _trace_users
+    if not TRACK_MEMORY:
+        return False
+    with _trace_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if _trace_users == 0:
+            tracemalloc.reset_peak()
+        _trace_users += 1
+    return True
+
+def _stop_memory_trace():
+    global _trace_users
+    with _trace_lock:
+        _trace_users = max(_trace_users - 1, 0)
+        if _trace_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def _start_profiler(shared_data: Dict[str, Any], stage_name: str):
+    """Start the configured profiler, or return None (logged) while another node is being profiled."""
+    global _profiler_active
+    if PROFILER != "cprofile" and not (PROFILER == "pyinstrument" and PyInstrumentProfiler is not None):
+        return None
+    with _profiler_lock:
+        if _profiler_active:
+            skipped = "another node is being profiled"
+        else:
+            _profiler_active = True
+            skipped = None
+    if skipped is None:
+        try:
+            if PROFILER == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            else:
+                profiler = PyInstrumentProfiler()
+                profiler.start()
+            return profiler
+        except (ValueError, RuntimeError) as e:  # A profiler outside this module is active
+            _release_profiler()
+            skipped = str(e)
+    if 'logs' in shared_data:
+        thread_safe_add_log(shared_data['logs'], f"⏱️ No {PROFILER} profile for {stage_name}: {skipped}.", agent_name="Profiler")
+    return None
+
+def _release_profiler():
+    global _profiler_active
+    with _profiler_lock:
+        _profiler_active = False
+
+def _stop_profiler(profiler, stage_name: str, run_timestamp: str) -> Optional[str]:
+    try:
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            os.makedirs(PROFILE_PATH, exist_ok=True)
+            profile_file = os.path.join(PROFILE_PATH, f"{run_timestamp}_{stage_name}.prof")
+            profiler.dump_stats(profile_file)
+        else:
+            profiler.stop()
+            os.makedirs(PROFILE_PATH, exist_ok=True)
+            profile_file = os.path.join(PROFILE_PATH, f"{run_timestamp}_{stage_name}.html")
+            with open(profile_file, 'w') as file:
+                file.write(profiler.output_html())
+        return profile_file
+    except OSError:
+        return None
+    finally:
+        _release_profiler()
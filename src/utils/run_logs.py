@@ -0,0 +1,172 @@
+# Module to persist the viewer log records of each run as structured JSONL, written off the caller's thread
+import os
+import json
+import atexit
+import logging
+import threading
+from queue import SimpleQueue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Any, List, Tuple
+
+from src.utils.config import load_config
+
+# Load configurations
+config = load_config()
+logging_config = config.get("logging", {})
+
+RUN_LOGS_ENABLED = logging_config.get("run_logs_enabled", True)       # Persist viewer logs to per-run JSONL files
+RUN_LOG_PATH = logging_config.get("log_path", "tmp/logs")             # Directory of the run log files
+RUN_LOG_PAGE_SIZE = logging_config.get("run_log_page_size", 200)      # Records per page of the run log viewer
+RUN_LOG_OPEN_FILES = 8                                                # Run log files kept open by the writer
+
+# Callers only enqueue the record (QueueHandler); the listener thread serializes it and writes to disk.
+_queue = SimpleQueue()
+_logger = logging.getLogger("llm_perf.run_logs")
+_listener = None
+_listener_lock = threading.Lock()
+
+# ========================= Run Log Writer =========================
+
+class RunLogFileHandler(logging.Handler):
+    """
+    Write each record as one JSON line to the file of its run ({run_timestamp}_run_log.jsonl).
+    Runs in the QueueListener thread only; keeps the most recently used files open.
+    """
+    def __init__(self, log_path: str = RUN_LOG_PATH):
+        super().__init__()
+        self.log_path = log_path
+        self._files = {}
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = {
+                "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+                "run_timestamp": record.run_timestamp,
+                "channel": record.channel,
+                "seq": record.seq,
+                "agent_name": record.agent_name,
+                "level": record.levelname,
+                "message": record.getMessage(),
+            }
+            file = self._file(get_run_log_file(record.run_timestamp, self.log_path))
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            file.flush()   # Readable (and greppable) while the run is still going
+        except Exception:
+            self.handleError(record)
+
+    def _file(self, path: str):
+        file = self._files.pop(path, None)
+        if file is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            file = open(path, "a", encoding="utf-8")
+            if len(self._files) >= RUN_LOG_OPEN_FILES:
+                self._files.pop(next(iter(self._files))).close()   # Least recently used
+        self._files[path] = file
+        return file
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+        super().close()
+
+def emit_run_log(channel: str, run_timestamp: str, seq: int, created: float, agent_name: str, level: str, message: str):
+    """Queue a viewer log record for its run log file; never blocks on disk."""
+    if not RUN_LOGS_ENABLED:
+        return
+    _ensure_listener()
+    record = _logger.makeRecord(_logger.name, logging.getLevelName(level), "", 0, message, None, None,
+                                extra={"channel": channel, "run_timestamp": run_timestamp, "seq": seq,
+                                       "agent_name": agent_name})
+    record.created = created
+    _logger.handle(record)
+
+def stop_run_log_writer():
+    """Flush the queued records and stop the writer thread (also done at exit)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+# ========================= Run Log Reader =========================
+
+def get_run_log_file(run_timestamp: str, log_path: str = RUN_LOG_PATH) -> str:
+    """Run log file of a run; records outside any run go to a daily session file."""
+    name = run_timestamp or f"{datetime.now().strftime('%Y%m%d')}_session"
+    return os.path.join(log_path, f"{name}_run_log.jsonl")
+
+def list_run_logs(log_path: str = RUN_LOG_PATH) -> List[str]:
+    """Run timestamps (or '<date>_session') that have a run log file, newest first."""
+    if not os.path.isdir(log_path):
+        return []
+    suffix = "_run_log.jsonl"
+    return sorted((name[:-len(suffix)] for name in os.listdir(log_path) if name.endswith(suffix)), reverse=True)
+
+# Line start offsets per run log file; files only grow, so the index is extended from where it stopped.
+_offset_index: Dict[str, Tuple[int, List[int]]] = {}
+
+def read_run_log_page(run_id: str, page: int, page_size: int = RUN_LOG_PAGE_SIZE, log_path: str = RUN_LOG_PATH) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Read one page (0-based, oldest records first) of a run log without loading the whole file:
+    the line offsets are indexed once and each page is a seek plus page_size lines.
+
+    Returns:
+        tuple: (records of the page, total number of records)
+    """
+    path = os.path.join(log_path, f"{run_id}_run_log.jsonl")
+    if not os.path.exists(path):
+        return [], 0
+    offsets = _line_offsets(path)
+    start = page * page_size
+    if start >= len(offsets):
+        return [], len(offsets)
+    records = []
+    with open(path, "rb") as file:
+        file.seek(offsets[start])
+        for _ in range(min(page_size, len(offsets) - start)):
+            line = file.readline()
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                records.append({"level": "ERROR", "message": f"Unreadable log line: {line[:200]!r}"})
+    return records, len(offsets)
+
+# ========================= Helper Functions =========================
+
+def _ensure_listener():
+    global _listener
+    if _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is None:
+            if not _logger.handlers:
+                _logger.addHandler(QueueHandler(_queue))
+                _logger.setLevel(logging.DEBUG)
+                _logger.propagate = False   # Run logs do not go to the root logger
+            _listener = QueueListener(_queue, RunLogFileHandler())
+            _listener.start()
+
+def _line_offsets(path: str) -> List[int]:
+    """Start offsets of the complete lines of a file, extended incrementally as the file grows."""
+    indexed_size, offsets = _offset_index.get(path, (0, []))
+    size = os.path.getsize(path)
+    if size < indexed_size:
+        indexed_size, offsets = 0, []   # File was replaced
+    if size > indexed_size:
+        offsets = list(offsets)
+        with open(path, "rb") as file:
+            file.seek(indexed_size)
+            position = indexed_size
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break   # Line still being written
+                offsets.append(position)
+                position += len(line)
+        _offset_index[path] = (position, offsets)
+    return offsets
+
+atexit.register(stop_run_log_writer)
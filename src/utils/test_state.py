@@ -6,6 +6,11 @@ class TestState(Enum):
     COMPLETED = 2
     FAILED = 3
     STOPPED = 4
+    ABORTED = 5     # Stopped automatically by a guardrail; partial results are still analyzed
+
+def has_results(state) -> bool:
+    """True for a finished JMeter run with analyzed results: completed, or aborted by a guardrail (partial results)."""
+    return str(state) in (str(TestState.COMPLETED), str(TestState.ABORTED))
 
 # src/utils/test_state.py (add to same file)
 class DeepEvalTestState(Enum):